@@ -0,0 +1,690 @@
+import asyncio
+import contextlib
+import hashlib
+import time
+import os
+import logging
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+from tqdm import tqdm
+
+from DownloadManifest import DownloadManifest
+from Scraper import PAGE_CHUNK, WebScraper, hash_file, print_line, RED, GREEN, YELLOW, RESET
+from Enumerator import MAX_PROBE_BODY, DirectoryEnumerator, ProbeResult, found_directory, parent_directories
+from Frontier import AsyncCrawlFrontier
+from LinkExtractor import extract_links, extract_listing
+from Politeness import THROTTLE_STATUSES
+from Sitemap import MAX_SITEMAPS, SITEMAP_CHUNK, SitemapParser, is_sitemap_url
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is only needed for --engine async
+    aiohttp = None
+
+logger = logging.getLogger("AsyncWebScraper")
+
+
+class AsyncWebScraper(WebScraper):
+    """WebScraper variant that runs crawling, enumeration and downloads on an event loop.
+
+    ``max_threads`` is the number of concurrent tasks (in-flight requests), and
+    ``per_host_limit`` caps the open connections to any single host. Requests
+    are paced by the same PolitenessScheduler as the threaded engine.
+    """
+
+    def __init__(self, *args, per_host_limit: int = 10, **kwargs):
+        if aiohttp is None:
+            raise RuntimeError("The async engine requires aiohttp (pip install aiohttp)")
+        super().__init__(*args, **kwargs)
+        self.per_host_limit = per_host_limit
+        # Files to download during the crawl (--pipeline), fed on the event loop
+        self._download_queue: Optional["asyncio.Queue[str]"] = None
+
+    def _client_session(self) -> "aiohttp.ClientSession":
+        """Create an aiohttp session mirroring the requests session settings."""
+        connector = aiohttp.TCPConnector(limit=self.max_threads, limit_per_host=self.per_host_limit)
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": self.user_agent},
+            cookies={cookie.name: cookie.value for cookie in self.session.cookies},
+        )
+
+    @contextlib.asynccontextmanager
+    async def _request(
+        self, client: "aiohttp.ClientSession", method: str, url: str, **kwargs
+    ) -> AsyncIterator["aiohttp.ClientResponse"]:
+        """Send a request through the politeness scheduler, like WebScraper.request.
+
+        The event loop is never blocked: the task sleeps until the host allows
+        another request. 429/503 responses pause the host and are retried. The
+        host slot and the request limit are held until the body has been read
+        and the response released.
+        """
+        for attempt in range(self.retries + 1):
+            with self.metrics.timer("webworm_politeness_wait_seconds"):
+                while True:
+                    wait = self.scheduler.try_acquire(url)
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+            start = time.monotonic()
+            limited = False
+            try:
+                # Requests in flight across every site of a parallel crawl
+                while self.request_limit and not self.request_limit.acquire(blocking=False):
+                    await asyncio.sleep(0.01)
+                limited = self.request_limit is not None
+                response = await client.request(method, url, **kwargs)
+            except BaseException as e:
+                # Also on cancellation, so the host slot is not leaked
+                self._release_async_request(url, None, time.monotonic() - start, limited)
+                if isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)):
+                    self.metrics.inc("webworm_request_errors_total", error=type(e).__name__)
+                raise
+            latency = time.monotonic() - start
+            self.metrics.observe("webworm_request_seconds", latency, method=method)
+            self.metrics.inc("webworm_responses_total", status=response.status)
+            if response.status not in THROTTLE_STATUSES or attempt == self.retries:
+                break
+            self._release_async_request(url, response.status, latency, limited)
+            self.metrics.inc("webworm_retries_total", status=response.status)
+            self.scheduler.backoff(url, response.headers.get("Retry-After"))
+            response.release()
+        try:
+            yield response
+        finally:
+            response.release()
+            self._release_async_request(url, response.status, latency, limited)
+
+    def _release_async_request(self, url: str, status: Optional[int], latency: float, limited: bool) -> None:
+        self.scheduler.release(url, status, latency)
+        if limited:
+            self.request_limit.release()
+
+    async def _ensure_robots(self, url: str) -> None:
+        """Fetch robots.txt for the origin of url off the event loop, so robots checks never block it."""
+        if (self.respect_robots_txt or self.sitemaps) and not self.robots.is_cached(url):
+            await asyncio.get_running_loop().run_in_executor(None, self.robots.rules_for, url)
+
+    async def _fetch(self, client: "aiohttp.ClientSession", url: str) -> Optional[bytes]:
+        """Fetch the content of a URL, or None if it failed or is not worth parsing."""
+        try:
+            logger.debug(f"Fetching {url}")
+            timeout = aiohttp.ClientTimeout(total=10)
+            with self.metrics.timer("webworm_fetch_seconds"):
+                headers = self.http_cache.conditional_headers(url) if self.http_cache else None
+                async with self._request(client, "GET", url, timeout=timeout, headers=headers) as response:
+                    if response.status != 304 or self.http_cache is None:
+                        return await self._read_page_async(url, response)
+                    body = self.http_cache.get_body(url)
+                    if body is not None:
+                        logger.debug(f"Not modified, using cached copy of {url}")
+                        self.metrics.inc("webworm_cache_hits_total")
+                        self.record(
+                            "page", url, status=response.status, size=len(body),
+                            content_type=response.headers.get("Content-Type")
+                        )
+                        return body
+                # The cached body was evicted meanwhile; fetch it again
+                async with self._request(client, "GET", url, timeout=timeout) as response:
+                    return await self._read_page_async(url, response)
+        except aiohttp.ClientResponseError as e:
+            logger.error(f"HTTP error occurred: {e.status} {e.message} for url: {url}")
+            print(f"{RED}HTTP error occurred: {e.status} {e.message} for url: {url}{RESET}")
+        except aiohttp.ClientConnectionError:
+            logger.error(f"Connection error occurred: can't connect to {url}")
+            print(f"{RED}Connection error occurred: can't connect to {url}{RESET}")
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout error occurred when connecting to {url}")
+            print(f"{RED}Timeout error occurred when connecting to {url}{RESET}")
+        except aiohttp.ClientError as e:
+            logger.error(f"Unexpected error occurred: {e}")
+            print(f"{RED}Unexpected error occurred: {e}{RESET}")
+        return None
+
+    async def _read_page_async(self, url: str, response: "aiohttp.ClientResponse") -> Optional[bytes]:
+        """Read a page response, stopping early like WebScraper._read_page."""
+        content_type = response.headers.get("Content-Type")
+        if not response.ok:
+            self.record("page", url, status=response.status, content_type=content_type)
+            response.raise_for_status()
+        reason = self.page_skip_reason(url, response.headers)
+        chunks = []
+        received = 0
+        if reason is None:
+            async for chunk in response.content.iter_chunked(PAGE_CHUNK):
+                received += len(chunk)
+                reason = self.chunk_skip_reason(url, chunk, received)
+                if reason:
+                    break
+                chunks.append(chunk)
+        self.metrics.inc("webworm_bytes_total", received, kind="page")
+        self.budget.spend_bytes(received)
+        if reason:
+            self.record("page", url, status=response.status, content_type=content_type)
+            self._page_skipped(url, reason)
+            return None
+        content = b"".join(chunks)
+        self.record("page", url, status=response.status, size=len(content), content_type=content_type)
+        if self.http_cache:
+            self.http_cache.store(url, response.headers, content)
+        if self.tech_detector and "html" in (content_type or "") and self.tech_detector.claim(url):
+            # Analyzing takes a while, so it runs off the event loop
+            cookies = {name: morsel.value for name, morsel in response.cookies.items()}
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._analyze_tech, url, response.headers, content, cookies)
+        return content
+
+    async def _scrape_page_async(
+        self, client: "aiohttp.ClientSession", url: str, current_depth: int
+    ) -> List[Tuple[str, int]]:
+        """Scrape a single page and return the links to crawl next."""
+        if current_depth > self.depth:
+            return []
+
+        logger.info(f"Scraping {url} at depth {current_depth}")
+        content = await self._fetch(client, url)
+        if content is None or self.is_binary_content(url, content):
+            return []
+        try:
+            listing = extract_listing(content)
+            if listing is not None:
+                with self.metrics.timer("webworm_parse_seconds", parser="autoindex"):
+                    file_links, anchors = self.listing_links(url, listing)
+                return self.process_links(url, file_links, anchors, current_depth)
+            with self.metrics.timer("webworm_parse_seconds", parser=self.parser):
+                if self._parse_pool is not None:
+                    loop = asyncio.get_running_loop()
+                    file_links, anchors = await loop.run_in_executor(
+                        self._parse_pool, extract_links, content, self.parser
+                    )
+                else:
+                    file_links, anchors = extract_links(content, self.parser)
+        except Exception as e:
+            logger.error(f"Error parsing content from {url}: {e}")
+            print(f"{RED}Error parsing content from {url}: {e}{RESET}")
+            return []
+        return self.process_links(url, file_links, anchors, current_depth)
+
+    def crawl(self, seeds: List[Tuple[str, int]], enumerate_dirs: bool = False) -> None:
+        """Crawl from the seed (url, depth) pairs on an event loop, enumerating directories alongside.
+
+        Like WebScraper.crawl, the crawl stops when the frontier is empty, the
+        budget is spent or the scraper is stopped (Ctrl-C, or the shared
+        interrupt of a parallel crawl); pages being fetched are finished first
+        and the rest of the frontier is kept for a checkpoint.
+        """
+        self._stop_event.clear()
+        if self.interrupt is not None and self.interrupt.is_set():
+            self._stop_event.set()
+        self.start_parse_pool()
+        self.budget.start()
+        try:
+            asyncio.run(self._crawl(seeds, enumerate_dirs))
+        finally:
+            self._stop_event.set()
+            self.stop_parse_pool()
+        if enumerate_dirs:
+            self._report_enumeration(self.enumeration_results)
+
+    async def _crawl(self, seeds: List[Tuple[str, int]], enumerate_dirs: bool = False) -> None:
+        frontier = self.frontier = AsyncCrawlFrontier(self.scorer.score)
+        frontier.restore(self._resumed_frontier)
+        self._resumed_frontier = []
+        budget_spent = asyncio.Event()
+        # Set once the crawl ends, so workers take no new page
+        stopping = asyncio.Event()
+        enum_queue: "asyncio.Queue[str]" = asyncio.Queue()
+        # Read by the enumeration queue gauge
+        self._enum_queue = enum_queue
+        # Queued directories, probes and sitemaps; the crawl is done once both this and the frontier are empty
+        enum_pending = 0
+        enum_idle = asyncio.Event()
+        enum_idle.set()
+        window = asyncio.Semaphore(self.max_threads * 4)
+        probes = set()
+        sitemap_tasks = set()
+
+        def push(entries: List[Tuple[str, int]]) -> None:
+            # URLs are claimed when queued, so each one is fetched once
+            frontier.push(entries, self.visited_urls)
+
+        def hold() -> None:
+            nonlocal enum_pending
+            enum_pending += 1
+            enum_idle.clear()
+
+        def release() -> None:
+            nonlocal enum_pending
+            enum_pending -= 1
+            if not enum_pending:
+                enum_idle.set()
+
+        def enqueue_enumeration(dir_url: str) -> None:
+            depth = self._enumeration_depth(dir_url)
+            if not enumerate_dirs or depth is None or depth > self.enum_depth or dir_url in self._enumerated:
+                return
+            self._enumerated.add(dir_url)
+            hold()
+            enum_queue.put_nowait(dir_url)
+
+        def enqueue_sitemap(sitemap_url: str) -> None:
+            if sitemap_url in self._sitemaps_seen or len(self._sitemaps_seen) >= MAX_SITEMAPS:
+                return
+            self._sitemaps_seen.add(sitemap_url)
+            hold()
+            task = asyncio.create_task(read_sitemap(sitemap_url))
+            sitemap_tasks.add(task)
+            task.add_done_callback(sitemap_tasks.discard)
+
+        # Seeds, links, probes and sitemaps are all on the start URL's origin
+        await self._ensure_robots(self.url)
+        push([(url, depth) for url, depth in seeds if depth <= self.depth and self.is_valid_seed(url)])
+        enqueue_enumeration(self._enum_base.geturl())
+
+        async def read_sitemap(sitemap_url: str) -> None:
+            try:
+                logger.info(f"Reading sitemap {sitemap_url}")
+                parser = SitemapParser()
+                async with self._request(client, "GET", sitemap_url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                    if resp.status != 200:
+                        logger.info(f"No sitemap at {sitemap_url} ({resp.status})")
+                        return
+                    print(f"{YELLOW}Reading sitemap {sitemap_url}...{RESET}")
+                    async for chunk in resp.content.iter_chunked(SITEMAP_CHUNK):
+                        await self._ensure_robots(self.url)
+                        push(self.sitemap_links(sitemap_url, parser.feed(chunk), enqueue_sitemap))
+                await self._ensure_robots(self.url)
+                push(self.sitemap_links(sitemap_url, parser.close(), enqueue_sitemap))
+            except Exception as e:
+                logger.error(f"Error reading sitemap {sitemap_url}: {e}")
+            finally:
+                release()
+
+        async def worker() -> None:
+            idle_since = time.perf_counter()
+            while not stopping.is_set():
+                url, depth = await frontier.get()
+                self.metrics.observe("webworm_queue_wait_seconds", time.perf_counter() - idle_since)
+                if not self.budget.take_page():
+                    # The entry stays in flight, so a checkpoint keeps it for the next run
+                    budget_spent.set()
+                    return
+                self.metrics.inc("webworm_pages_total")
+                links = []
+                try:
+                    # The rules may have expired since the crawl started
+                    await self._ensure_robots(url)
+                    links = await self._scrape_page_async(client, url, depth)
+                    for dir_url in parent_directories(url):
+                        enqueue_enumeration(dir_url)
+                except Exception as e:
+                    logger.error(f"Error in task: {e}")
+                # Not in a finally: a cancelled page stays in flight for the checkpoint
+                push(links)
+                frontier.task_done()
+                idle_since = time.perf_counter()
+
+        async def downloader() -> None:
+            while True:
+                file_url = await self._download_queue.get()
+                try:
+                    await self._download_file_async(client, file_url, self._pipeline_dir, self._pipeline_manifest)
+                finally:
+                    self._download_queue.task_done()
+
+        async def probe(enumerator: DirectoryEnumerator, url: str, calibration_locks: Dict[str, asyncio.Lock]) -> None:
+            try:
+                if not await self._test_url_exists_async(client, enumerator, url, calibration_locks):
+                    return
+                result = self.enumeration_results[url] = enumerator.results[url]
+                await self._ensure_robots(url)
+                # Paths that only answered 401/403 and the like are reported but not crawled
+                if result.status < 400 and self.is_valid_url(url):
+                    push([(url, 1)])
+                if result.status == 200 and is_sitemap_url(url):
+                    enqueue_sitemap(url)
+                dir_url = found_directory(url, result)
+                if dir_url:
+                    enqueue_enumeration(dir_url)
+            except Exception as e:
+                logger.error(f"Error probing {url}: {e}")
+            finally:
+                window.release()
+                release()
+
+        async def dispatcher() -> None:
+            while True:
+                dir_url = await enum_queue.get()
+                try:
+                    logger.info(f"Enumerating {dir_url}")
+                    print(f"{YELLOW}Enumerating directories for {dir_url}...{RESET}")
+                    enumerator = self.directory_enumerator(dir_url)
+                    calibration_locks: Dict[str, asyncio.Lock] = {}
+                    for test_url in enumerator.candidates():
+                        await window.acquire()
+                        hold()
+                        task = asyncio.create_task(probe(enumerator, test_url, calibration_locks))
+                        probes.add(task)
+                        task.add_done_callback(probes.discard)
+                except Exception as e:
+                    logger.error(f"Error enumerating {dir_url}: {e}")
+                finally:
+                    release()
+
+        async with self._client_session() as client:
+            workers = [asyncio.create_task(worker()) for _ in range(self.max_threads)]
+            others = [asyncio.create_task(dispatcher())]
+            if self.pipeline:
+                self._download_queue = asyncio.Queue()
+                # Files found before a resume that were never downloaded
+                for file_url in list(self.discovered_files):
+                    self._queue_download(file_url)
+                others += [asyncio.create_task(downloader()) for _ in range(self.download_threads)]
+            if self.sitemaps:
+                for sitemap_url in self.sitemap_urls():
+                    enqueue_sitemap(sitemap_url)
+
+            async def finished() -> None:
+                while True:
+                    await frontier.join()
+                    if enum_idle.is_set():
+                        return
+                    await enum_idle.wait()
+
+            async def stopped() -> None:
+                # Set on Ctrl-C in a parallel crawl of several sites
+                while not self._stop_event.is_set():
+                    await asyncio.sleep(0.5)
+
+            waiters = [
+                asyncio.create_task(finished()), asyncio.create_task(budget_spent.wait()),
+                asyncio.create_task(stopped())
+            ]
+            try:
+                await asyncio.wait(
+                    waiters, return_when=asyncio.FIRST_COMPLETED,
+                    timeout=self.budget.max_time - (time.monotonic() - self.budget.started)
+                    if self.budget.max_time is not None else None
+                )
+                # Entries taken by workers that found the budget spent are still unvisited
+                self._report_budget(frontier.qsize() + len(frontier.in_flight))
+                if self._download_queue is not None and not self._stop_event.is_set():
+                    # Files found by the last pages; downloads stop by themselves once the budget is spent
+                    await self._download_queue.join()
+            finally:
+                # Workers finish the page they are on, leaving the rest of the frontier intact
+                stopping.set()
+                idle = [task for task in workers if task not in frontier.in_flight]
+                tasks = waiters + idle + others + list(probes) + list(sitemap_tasks)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, *workers, return_exceptions=True)
+
+    def enumerate_directories(self, base_url: str) -> List[str]:
+        """Probe the wordlist paths under base_url on an event loop."""
+        logger.info(f"Starting directory enumeration for {base_url}")
+        print(f"{YELLOW}Enumerating directories for {base_url}...{RESET}")
+
+        enumerator = self.directory_enumerator(base_url)
+        discovered_urls = asyncio.run(self._enumerate(enumerator))
+        self._report_enumeration(enumerator.results)
+        return discovered_urls
+
+    async def _enumerate(self, enumerator: DirectoryEnumerator) -> List[str]:
+        discovered_urls: List[str] = []
+        calibration_locks: Dict[str, asyncio.Lock] = {}
+        # Bounded number of probes in flight, so the wordlist is consumed lazily
+        window = asyncio.Semaphore(self.max_threads * 4)
+
+        async def probe(url: str) -> None:
+            try:
+                if await self._test_url_exists_async(client, enumerator, url, calibration_locks):
+                    discovered_urls.append(url)
+            finally:
+                window.release()
+                pbar.update(1)
+
+        async with self._client_session() as client:
+            with tqdm(desc="Enumerating", unit="req") as pbar:
+                tasks = set()
+                for url in enumerator.candidates():
+                    await window.acquire()
+                    task = asyncio.create_task(probe(url))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                await asyncio.gather(*tasks)
+        return discovered_urls
+
+    async def _test_url_exists_async(
+        self,
+        client: "aiohttp.ClientSession",
+        enumerator: DirectoryEnumerator,
+        url: str,
+        calibration_locks: Dict[str, asyncio.Lock]
+    ) -> bool:
+        """Probe a candidate URL, calibrating its kind of path first, and tell if the enumerator accepts it."""
+        suffix = enumerator.needs_calibration(url)
+        if suffix is not None:
+            async with calibration_locks.setdefault(suffix, asyncio.Lock()):
+                if enumerator.needs_calibration(url) is not None:
+                    enumerator.learn(suffix, await asyncio.gather(*(
+                        self._probe_async(client, calibration_url)
+                        for calibration_url in enumerator.calibration_urls(suffix)
+                    )))
+        with self.metrics.timer("webworm_probe_seconds"):
+            result = await self._probe_async(client, url)
+        found = enumerator.accept(url, result)
+        self.metrics.inc("webworm_probes_total", result="found" if found else "miss")
+        if found:
+            self.record("probe", url, status=result.status, size=result.size, parent=enumerator.base_url)
+        return found
+
+    async def _probe_async(self, client: "aiohttp.ClientSession", url: str) -> Optional[ProbeResult]:
+        """GET url without following redirects and measure the start of its body."""
+        try:
+            async with self._request(
+                client, "GET", url, timeout=aiohttp.ClientTimeout(total=5), allow_redirects=False
+            ) as resp:
+                body = b""
+                while len(body) < MAX_PROBE_BODY:
+                    chunk = await resp.content.read(MAX_PROBE_BODY - len(body))
+                    if not chunk:
+                        break
+                    body += chunk
+                return ProbeResult.from_response(resp.status, resp.headers, body)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Probe of {url} failed: {e}")
+        return None
+
+    def start_download_pipeline(self) -> None:
+        """Prepare downloads during the crawl; they run on the crawl's event loop with the same client."""
+        self._pipeline_dir, self._pipeline_manifest = self._prepare_download_dir(self.output_dir)
+
+    def _queue_download(self, file_url: str) -> None:
+        if self._download_queue is not None and file_url not in self.completed_downloads:
+            self._download_queue.put_nowait(file_url)
+
+    def finish_download_pipeline(self) -> None:
+        """Save the download state once the crawl and its downloads are over."""
+        self._download_queue = None
+        if self._pipeline_manifest:
+            self._pipeline_manifest.save()
+        if self.store:
+            self.store.save()
+
+    def download_files(self, urls: Iterable[str], download_dir: str = "results") -> None:
+        """Download files concurrently on an event loop."""
+        download_dir, manifest = self._prepare_download_dir(download_dir)
+        try:
+            asyncio.run(self._download_all(urls, download_dir, manifest))
+        finally:
+            if manifest:
+                manifest.save()
+            if self.store:
+                self.store.save()
+
+    async def _precheck_files(self, client: "aiohttp.ClientSession", urls: Iterable[str]) -> List[str]:
+        """Check files with concurrent HEAD requests, like WebScraper.precheck_files."""
+        urls = [url for url in urls if url not in self.completed_downloads]
+        checks = await asyncio.gather(*(self._precheck_file_async(client, url) for url in urls))
+        kept = [url for url, (ok, _) in zip(urls, checks) if ok]
+        known_size = sum(size for ok, size in checks if ok and size)
+        print(f"{GREEN}HEAD check: {len(kept)} of {len(urls)} files to download "
+              f"({known_size} bytes known){RESET}")
+        logger.info(f"HEAD check kept {len(kept)} of {len(urls)} files, {known_size} bytes known")
+        return kept
+
+    async def _precheck_file_async(
+        self, client: "aiohttp.ClientSession", url: str
+    ) -> Tuple[bool, Optional[int]]:
+        timeout = aiohttp.ClientTimeout(total=10)
+        try:
+            async with self._request(client, "HEAD", url, timeout=timeout, allow_redirects=True) as resp:
+                status, headers = resp.status, resp.headers
+            if status in (405, 501):
+                async with self._request(client, "GET", url, timeout=timeout, headers={"Range": "bytes=0-0"}) as resp:
+                    status, headers = resp.status, resp.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"HEAD check of {url} failed: {e}")
+            return True, None
+        return self.file_check(url, status, headers)
+
+    async def _download_all(
+        self, urls: Iterable[str], download_dir: str, manifest: Optional[DownloadManifest] = None
+    ) -> None:
+        async with self._client_session() as client:
+            if self.head_check:
+                urls = await self._precheck_files(client, urls)
+            tasks = [
+                asyncio.create_task(self._download_file_async(client, url, download_dir, manifest))
+                for url in urls if url not in self.completed_downloads
+            ]
+            with tqdm(total=len(tasks), desc="Downloading files") as pbar:
+                for task in asyncio.as_completed(tasks):
+                    await task
+                    pbar.update(1)
+
+    async def _download_file_async(
+        self, client: "aiohttp.ClientSession", url: str, download_dir: str,
+        manifest: Optional[DownloadManifest] = None
+    ) -> bool:
+        """Download a single file."""
+        with self.metrics.timer("webworm_download_seconds"):
+            downloaded = await self._fetch_file_async(client, url, download_dir, manifest)
+        self.metrics.inc("webworm_downloads_total", result="ok" if downloaded else "failed")
+        return downloaded
+
+    async def _fetch_file_async(
+        self, client: "aiohttp.ClientSession", url: str, download_dir: str,
+        manifest: Optional[DownloadManifest] = None
+    ) -> bool:
+        """Download a file like WebScraper._fetch_file, incremental mode included."""
+        if self.pipeline and self.budget.exhausted(pages=False):
+            return False
+        if self.pipeline and self.head_check and not (await self._precheck_file_async(client, url))[0]:
+            return False
+        headers = {}
+        offset = 0
+        try:
+            if self.store:
+                file_path = self.store.path_for(url)
+            else:
+                file_path = os.path.join(download_dir, os.path.basename(urlparse(url).path))
+            part_path = file_path + ".part"
+            entry = manifest.get(url) if manifest else None
+            if entry and not entry.get("partial") and self._is_unchanged_on_disk(file_path, entry):
+                if entry.get("etag") or entry.get("last_modified"):
+                    if entry.get("etag"):
+                        headers["If-None-Match"] = entry["etag"]
+                    if entry.get("last_modified"):
+                        headers["If-Modified-Since"] = entry["last_modified"]
+                elif await self._head_matches_async(client, url, entry):
+                    return self._skip_unchanged(url)
+            elif entry and entry.get("partial") and os.path.exists(part_path):
+                offset = os.path.getsize(part_path)
+                headers["Range"] = f"bytes={offset}-"
+                validator = entry.get("etag") or entry.get("last_modified")
+                if validator:
+                    headers["If-Range"] = validator
+
+            async with self._request(client, "GET", url, headers=headers) as response:
+                if response.status == 304:
+                    return self._skip_unchanged(url)
+                response.raise_for_status()
+                if response.status != 206:
+                    # Full body: the server ignored or rejected the Range request
+                    offset = 0
+
+                # Check file size if max_file_size is set
+                if self.max_file_size:
+                    content_length = response.content_length
+                    if content_length and offset + content_length > self.max_file_size:
+                        return self._file_too_large(url)
+
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if manifest:
+                    manifest.update(url, partial=True, etag=etag, last_modified=last_modified)
+
+                # Download the file, hashing it on the way
+                digest = hashlib.sha256()
+                if offset:
+                    hash_file(part_path, digest)
+                os.makedirs(os.path.dirname(part_path), exist_ok=True)
+                received = 0
+                too_large = False
+                with open(part_path, "ab" if offset else "wb") as file:
+                    async for chunk in response.content.iter_chunked(8192):
+                        received += len(chunk)
+                        # Also catches files sent without a Content-Length
+                        if self.max_file_size and offset + received > self.max_file_size:
+                            too_large = True
+                            break
+                        file.write(chunk)
+                        digest.update(chunk)
+                self.metrics.inc("webworm_bytes_total", received, kind="file")
+                self.budget.spend_bytes(received)
+                if too_large:
+                    os.remove(part_path)
+                    if manifest:
+                        manifest.remove(url)
+                    return self._file_too_large(url)
+                if self.store:
+                    file_path = self.store.commit(url, part_path, digest.hexdigest(), offset + received)
+                else:
+                    os.replace(part_path, file_path)
+
+            if manifest:
+                manifest.update(
+                    url,
+                    path=os.path.relpath(file_path, download_dir),
+                    size=os.path.getsize(file_path),
+                    etag=etag,
+                    last_modified=last_modified,
+                    sha256=digest.hexdigest()
+                )
+            self.completed_downloads.add(url)
+            self.record(
+                "download", url, status=response.status, size=os.path.getsize(file_path),
+                content_type=response.headers.get("Content-Type"), path=file_path
+            )
+            logger.info(f"Downloaded file: {url}")
+            print_line(f"{GREEN}Downloaded file: {url}{RESET}")
+            return True
+
+        except aiohttp.ClientResponseError as e:
+            self.record("download", url, status=e.status)
+            logger.error(f"HTTP error when downloading {url}: {e}")
+            print_line(f"{RED}HTTP error occurred when downloading {url}: {e}{RESET}")
+        except Exception as e:
+            logger.error(f"Error downloading {url}: {e}")
+            print_line(f"{RED}Error downloading {url}: {e}{RESET}")
+        return False
+
+    async def _head_matches_async(self, client: "aiohttp.ClientSession", url: str, entry: Dict) -> bool:
+        """Compare a HEAD response's Content-Length with a manifest entry."""
+        async with self._request(
+            client, "HEAD", url, timeout=aiohttp.ClientTimeout(total=10), allow_redirects=True
+        ) as resp:
+            return resp.ok and resp.content_length is not None and resp.content_length == entry.get("size")
@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("Checkpoint")
+
+
+class Checkpointer:
+    """Periodically write a crawl state snapshot to a JSON file.
+
+    ``snapshot`` is called from a background thread every ``interval`` seconds
+    and must return a JSON-serializable dict. Writes go to a temporary file
+    that is then renamed over the checkpoint, so an interrupted write never
+    corrupts the previous checkpoint.
+    """
+
+    def __init__(self, path: str, snapshot: Callable[[], Dict[str, Any]], interval: float = 60):
+        self.path = path
+        self.snapshot = snapshot
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Return the saved state, or None if there is no usable checkpoint."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load checkpoint {self.path}: {e}")
+            return None
+
+    def save(self) -> None:
+        """Write the current state to the checkpoint file."""
+        state = self.snapshot()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+        logger.debug(f"Saved checkpoint to {self.path}")
+
+    def start(self) -> None:
+        """Start saving checkpoints in the background."""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="checkpointer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write a final checkpoint."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        self.save()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.save()
+            except Exception as e:
+                logger.error(f"Failed to save checkpoint {self.path}: {e}")
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger("ContentStore")
+
+BLOB_DIR = ".blobs"
+INDEX_NAME = ".webworm-index.json"
+
+# Characters that are not allowed in file names on common filesystems
+UNSAFE_CHARS = re.compile(r'[<>:"\\|?*\x00-\x1f]')
+
+
+def url_to_path(url: str) -> str:
+    """Map a URL to a relative ``<host>/<path>`` that mirrors its location on the server.
+
+    Directory URLs get an ``index.html``, and a query string becomes a short
+    hash in the file name, so distinct URLs get distinct paths.
+    """
+    parsed = urlparse(url)
+    path = unquote(parsed.path)
+    if not path or path.endswith("/"):
+        path += "index.html"
+    segments = [UNSAFE_CHARS.sub("_", segment) for segment in path.split("/") if segment not in ("", ".", "..")]
+    if not segments:
+        # e.g. http://host/.. names no file at all
+        segments = ["index.html"]
+    if parsed.query:
+        stem, ext = os.path.splitext(segments[-1])
+        segments[-1] = f"{stem}-{hashlib.sha1(parsed.query.encode()).hexdigest()[:8]}{ext}"
+    # Named like the per-host download directories, so a site's own files land in its directory
+    return os.path.join(parsed.netloc or "_", *segments)
+
+
+class ContentStore:
+    """Downloads stored once per SHA-256 digest, with a URL to blob index.
+
+    Blobs live in ``blob_dir/<2 hex chars>/<digest>`` and may be shared by the
+    stores of several hosts. Each downloaded URL is also made available at
+    ``mirror_dir/<host>/<url path>`` as a hard link to its blob (a copy where
+    hard links are not supported), and recorded in
+    ``download_dir/.webworm-index.json``. ``mirror_dir`` defaults to the
+    parent of ``download_dir``, the results root holding one directory per host.
+    """
+
+    def __init__(self, blob_dir: str, download_dir: str, mirror_dir: Optional[str] = None):
+        self.blob_dir = blob_dir
+        self.download_dir = download_dir
+        self.mirror_dir = mirror_dir if mirror_dir is not None else os.path.dirname(os.path.abspath(download_dir))
+        self.index_path = os.path.join(download_dir, INDEX_NAME)
+        self.deduplicated = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict[str, Any]] = {}
+        os.makedirs(blob_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable index {self.index_path}: {e}")
+
+    def path_for(self, url: str) -> str:
+        """Local path at which url is made available."""
+        return os.path.join(self.mirror_dir, url_to_path(url))
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._index.get(url)
+            return dict(entry) if entry else None
+
+    def commit(self, url: str, tmp_path: str, digest: str, size: int) -> str:
+        """Move a finished download into the store and link it at its URL path.
+
+        If a blob with the same digest exists already, the new copy is
+        discarded. Returns the path the file is available at.
+        """
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        if os.path.exists(blob):
+            os.remove(tmp_path)
+            with self._lock:
+                self.deduplicated += 1
+                self.bytes_saved += size
+            logger.info(f"{url} has the same content as a stored file ({digest[:12]})")
+        else:
+            # Atomic, so concurrent downloads of the same content leave one intact blob
+            os.replace(tmp_path, blob)
+
+        path = self.path_for(url)
+        try:
+            self._link(blob, path)
+        except OSError as e:
+            # e.g. a file already stored where this URL needs a directory
+            logger.warning(f"Could not place {url} at {path}: {e}; it is only stored as {blob}")
+            path = blob
+        with self._lock:
+            self._index[url] = {
+                "sha256": digest,
+                "size": size,
+                "path": os.path.relpath(path, self.mirror_dir),
+            }
+        return path
+
+    def _link(self, blob: str, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_link = f"{path}.{threading.get_ident()}.link"
+        try:
+            os.link(blob, tmp_link)
+        except OSError:
+            shutil.copyfile(blob, tmp_link)
+        os.replace(tmp_link, path)
+
+    def save(self) -> None:
+        """Write the index atomically."""
+        with self._lock:
+            data = json.dumps(self._index, indent=1)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, self.index_path)
@@ -0,0 +1,51 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("DownloadManifest")
+
+MANIFEST_NAME = ".webworm-manifest.json"
+
+
+class DownloadManifest:
+    """Record of the files downloaded into a directory, used by incremental downloads.
+
+    Each URL maps to the local path, size, ETag, Last-Modified and SHA-256 of
+    the file. Entries with ``partial`` set describe an unfinished ``.part``
+    download and hold the validators needed to resume it with a Range request.
+    """
+
+    def __init__(self, download_dir: str):
+        self.path = os.path.join(download_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(url)
+            return dict(entry) if entry else None
+
+    def update(self, url: str, **fields: Any) -> None:
+        with self._lock:
+            self._entries[url] = fields
+
+    def remove(self, url: str) -> None:
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        with self._lock:
+            data = json.dumps(self._entries, indent=1)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,245 @@
+import itertools
+import logging
+import posixpath
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+logger = logging.getLogger("Enumerator")
+
+# Probed when no wordlist is given
+COMMON_DIRS = [
+    "admin", "backup", "backups", "data", "db", "debug", "files",
+    "images", "img", "js", "css", "static", "upload", "uploads",
+    "private", "secrets", "api", "v1", "v2", "docs", "documentation"
+]
+COMMON_FILES = [
+    "index.html", "index.php", "config.php", "config.js", ".env",
+    "README.md", "robots.txt", "sitemap.xml", ".git/HEAD"
+]
+
+# Statuses that suggest a path exists
+DEFAULT_MATCH_STATUS = "200-299,301,302,307,308,401,403,405"
+
+WORDLIST_CHUNK = 1000  # words expanded at a time, so wordlists are never loaded whole
+CALIBRATION_PROBES = 3
+MAX_PROBE_BODY = 1024 * 1024  # bytes read from a response to count its words and lines
+
+# Inclusive (low, high) ranges, as parsed by parse_ranges
+Ranges = List[Tuple[int, int]]
+
+
+def parse_ranges(spec: Optional[str]) -> Ranges:
+    """Parse a list such as '200-299,301,403' into inclusive ranges."""
+    ranges: Ranges = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        low, _, high = part.partition("-")
+        ranges.append((int(low), int(high or low)))
+    return ranges
+
+
+def in_ranges(value: int, ranges: Ranges) -> bool:
+    return any(low <= value <= high for low, high in ranges)
+
+
+def read_wordlist(path: str) -> Iterator[str]:
+    """Yield the entries of a wordlist file one at a time, skipping blanks and comments."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            word = line.strip().lstrip("/")
+            if word and not word.startswith("#"):
+                yield word
+
+
+def is_literal_path(word: str) -> bool:
+    """Entries with an extension or a slash are probed as-is, without permutations."""
+    return "/" in word or "." in word
+
+
+def expand_words(words: Iterable[str], extensions: List[str]) -> Iterator[str]:
+    """Yield the relative paths to probe for each word.
+
+    A bare word is probed as a directory (``word/``) and once per extension
+    (``word.ext``); entries that already look like paths are kept as they are.
+    """
+    suffixes = ["/"] + [f".{ext.lstrip('.')}" for ext in extensions]
+    words = iter(words)
+    for chunk in iter(lambda: list(itertools.islice(words, WORDLIST_CHUNK)), []):
+        yield from (word for word in chunk if is_literal_path(word))
+        bare = [word for word in chunk if not is_literal_path(word)]
+        for word, suffix in itertools.product(bare, suffixes):
+            yield word + suffix
+
+
+def suffix_class(path: str) -> str:
+    """Group a probed path by what the server sees of it: a directory or a file extension."""
+    if path.endswith("/"):
+        return "/"
+    return posixpath.splitext(path)[1].lower()
+
+
+def parent_directories(url: str) -> List[str]:
+    """Return the directory URLs that contain url, from the root down."""
+    parsed = urlparse(url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    segments = parsed.path.split("/")[1:-1]
+    return [origin + "/" + "".join(segment + "/" for segment in segments[:i]) for i in range(len(segments) + 1)]
+
+
+def found_directory(url: str, result: "ProbeResult") -> Optional[str]:
+    """Return the directory URL revealed by an accepted probe, if it is one.
+
+    A probe finds a directory when its path ends with a slash, or when the
+    server redirects it to the same path with a slash appended.
+    """
+    if url.endswith("/"):
+        return url
+    if result.location and urljoin(url, result.location) == url + "/":
+        return url + "/"
+    return None
+
+
+class ProbeResult:
+    """Status, length and shape of a probe response, as used by the filters."""
+
+    FIELDS = ("status", "size", "words", "lines", "location")
+
+    def __init__(self, status: int, size: int, words: int, lines: int, location: Optional[str]):
+        self.status = status
+        self.size = size
+        self.words = words
+        self.lines = lines
+        self.location = location
+
+    @classmethod
+    def from_response(cls, status: int, headers: Mapping[str, str], body: bytes) -> "ProbeResult":
+        size = len(body)
+        content_length = headers.get("Content-Length")
+        if content_length and content_length.isdigit():
+            size = int(content_length)
+        return cls(
+            status, size, len(body.split()), body.count(b"\n") + 1 if body else 0,
+            headers.get("Location")
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.status}, {self.size} bytes, {self.words} words"
+
+
+class DirectoryEnumerator:
+    """Wordlist-driven path discovery under one base URL.
+
+    Candidates are streamed from the wordlist and expanded with the
+    extensions. A response is reported when its status matches
+    ``match_status`` and neither its status, size nor word count is
+    filtered out. With ``calibrate`` set, a few random paths of each kind
+    (directory, and each file extension) are probed first; responses that
+    look like those soft-404/wildcard answers are dropped.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        wordlist: Optional[str] = None,
+        extensions: Optional[List[str]] = None,
+        match_status: Optional[str] = DEFAULT_MATCH_STATUS,
+        filter_status: Optional[str] = None,
+        filter_size: Optional[str] = None,
+        filter_words: Optional[str] = None,
+        calibrate: bool = True
+    ):
+        parsed = urlparse(base_url)
+        base_path = parsed.path if parsed.path.endswith("/") else parsed.path + "/"
+        self.base_url = urljoin(f"{parsed.scheme}://{parsed.netloc}", base_path)
+        self.wordlist = wordlist
+        self.extensions = extensions or []
+        self.match_status = parse_ranges(match_status)
+        self.filter_status = parse_ranges(filter_status)
+        self.filter_size = parse_ranges(filter_size)
+        self.filter_words = parse_ranges(filter_words)
+        self.calibrate = calibrate
+        self.results: Dict[str, ProbeResult] = {}
+        # suffix class -> fields shared by every calibration response, None if none matched
+        self._signatures: Dict[str, Optional[Dict[str, object]]] = {}
+        self._lock = threading.Lock()
+        self._calibration_locks: Dict[str, threading.Lock] = {}
+
+    def candidates(self) -> Iterator[str]:
+        """Yield the URLs to probe, streaming the wordlist from disk."""
+        words = read_wordlist(self.wordlist) if self.wordlist else itertools.chain(COMMON_DIRS, COMMON_FILES)
+        for path in expand_words(words, self.extensions):
+            yield urljoin(self.base_url, path)
+
+    def matches(self, result: ProbeResult) -> bool:
+        """Apply the status, size and word-count filters."""
+        return (
+            in_ranges(result.status, self.match_status)
+            and not in_ranges(result.status, self.filter_status)
+            and not in_ranges(result.size, self.filter_size)
+            and not in_ranges(result.words, self.filter_words)
+        )
+
+    def needs_calibration(self, url: str) -> Optional[str]:
+        """Return the suffix class of url if it has not been calibrated yet."""
+        if not self.calibrate:
+            return None
+        suffix = suffix_class(urlparse(url).path)
+        return None if suffix in self._signatures else suffix
+
+    def calibration_urls(self, suffix: str) -> List[str]:
+        """Random paths of the given suffix class that should not exist.
+
+        Their lengths differ, so a soft-404 page that echoes the path does not
+        look like it has a fixed size.
+        """
+        return [
+            urljoin(self.base_url, uuid.uuid4().hex[:8 * (i + 1)] + suffix)
+            for i in range(CALIBRATION_PROBES)
+        ]
+
+    def learn(self, suffix: str, results: List[Optional[ProbeResult]]) -> None:
+        """Record what the server answers for paths of this suffix class that do not exist."""
+        results = [result for result in results if result is not None]
+        signature = None
+        if results and self.matches(results[0]) and all(r.status == results[0].status for r in results):
+            signature = {
+                field: getattr(results[0], field)
+                for field in ProbeResult.FIELDS
+                if all(getattr(r, field) == getattr(results[0], field) for r in results)
+            }
+            if len(signature) == 1:
+                logger.warning(
+                    f"Random '{suffix}' paths under {self.base_url} return {results[0].status} "
+                    f"with varying content; ignoring every {results[0].status} for them"
+                )
+            else:
+                logger.info(f"Wildcard responses for '{suffix}' under {self.base_url}: {signature}")
+        with self._lock:
+            self._signatures[suffix] = signature
+
+    def calibrate_with(self, url: str, probe: Callable[[str], Optional[ProbeResult]]) -> None:
+        """Calibrate the suffix class of url with a blocking probe function, once per class."""
+        suffix = self.needs_calibration(url)
+        if suffix is None:
+            return
+        with self._lock:
+            lock = self._calibration_locks.setdefault(suffix, threading.Lock())
+        with lock:
+            if suffix not in self._signatures:
+                self.learn(suffix, [probe(calibration_url) for calibration_url in self.calibration_urls(suffix)])
+
+    def accept(self, url: str, result: Optional[ProbeResult]) -> bool:
+        """Decide whether a probe found something, and remember it if so."""
+        if result is None or not self.matches(result):
+            return False
+        signature = self._signatures.get(suffix_class(urlparse(url).path))
+        if signature and all(getattr(result, field) == value for field, value in signature.items()):
+            return False
+        logger.info(f"Found directory/file: {url} ({result!r})")
+        with self._lock:
+            self.results[url] = result
+        return True
@@ -0,0 +1,239 @@
+import asyncio
+import heapq
+import itertools
+import posixpath
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from SeenSet import SeenSet
+
+FrontierEntry = Tuple[str, int]
+
+# Extensions of URLs that are crawled as pages rather than downloaded
+PAGE_EXTENSIONS = frozenset([
+    "", ".html", ".htm", ".xhtml", ".shtml", ".php", ".asp", ".aspx", ".jsp", ".cfm", ".cgi", ".pl"
+])
+
+# Path words that suggest a page lists downloadable files
+FILE_HINT_WORDS = frozenset([
+    "download", "downloads", "files", "file", "docs", "documents", "pub", "media",
+    "uploads", "upload", "assets", "attachments", "archive", "archives", "data", "static"
+])
+
+
+class LinkScorer:
+    """Crawl priority of a URL; lower scores are fetched first.
+
+    The depth sets the order between levels, so the crawl stays roughly
+    breadth-first, and within a level directory URLs (likely listings),
+    URLs hinted by a sitemap and paths naming a files area or one of the
+    wanted extensions come first. URLs of non-page files come after every
+    page, since fetching them yields no links.
+    """
+
+    # Hints are dropped when scored; this caps the ones that never are
+    MAX_HINTS = 100_000
+
+    def __init__(self, extensions: Optional[List[str]] = None):
+        self.hint_words = FILE_HINT_WORDS | {ext.lower().lstrip(".") for ext in extensions or []}
+        self.hinted: Set[str] = set()
+
+    def hint(self, urls: Iterable[str]) -> None:
+        """Crawl these URLs (e.g. from a sitemap) before others of the same depth.
+
+        Only hint URLs about to be queued: a hint is dropped when its URL is scored.
+        """
+        for url in urls:
+            if len(self.hinted) >= self.MAX_HINTS:
+                break
+            self.hinted.add(url)
+
+    def score(self, url: str, depth: int) -> float:
+        # Each URL is scored once, when it is queued, so its hint is no longer needed
+        hinted = url in self.hinted
+        if hinted:
+            self.hinted.discard(url)
+        path = urlsplit(url).path.lower()
+        if posixpath.splitext(path)[1] not in PAGE_EXTENSIONS:
+            return depth + 100.0
+        score = float(depth)
+        if path.endswith("/"):
+            score -= 0.4
+        if hinted:
+            score -= 0.3
+        if not self.hint_words.isdisjoint(segment for segment in path.split("/") if segment):
+            score -= 0.2
+        return score
+
+
+class CrawlBudget:
+    """Global limits on the pages, bytes and wall time a crawl may spend.
+
+    Bytes count pages and downloaded files. A limit of None is unlimited.
+    """
+
+    def __init__(self, max_pages: Optional[int] = None, max_bytes: Optional[int] = None,
+                 max_time: Optional[float] = None):
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.max_time = max_time
+        self.pages = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self.started = time.monotonic()
+
+    def take_page(self) -> bool:
+        """Count a page about to be fetched; False if the budget does not allow it."""
+        with self._lock:
+            if self.exhausted():
+                return False
+            self.pages += 1
+            return True
+
+    def spend_bytes(self, count: int) -> None:
+        with self._lock:
+            self.bytes += count
+
+    def exhausted(self, pages: bool = True) -> Optional[str]:
+        """Return the limit that has been reached, or None; the page limit is ignored if pages is False."""
+        if pages and self.max_pages is not None and self.pages >= self.max_pages:
+            return f"{self.max_pages} pages"
+        if self.max_bytes is not None and self.bytes >= self.max_bytes:
+            return f"{self.max_bytes} bytes"
+        if self.max_time is not None and time.monotonic() - self.started >= self.max_time:
+            return f"{self.max_time:g}s"
+        return None
+
+
+class CrawlFrontier(queue.Queue):
+    """Priority queue of (url, depth) entries shared by the crawl workers.
+
+    Entries come out by their ``scorer`` score (the depth by default), in
+    insertion order among equal scores. URLs are claimed in a seen-set when
+    they are pushed, and the entry each worker is currently processing is
+    tracked, so ``snapshot`` always returns every claimed URL that has not
+    been fully processed yet.
+    """
+
+    def __init__(self, scorer: Optional[Callable[[str, int], float]] = None, maxsize: int = 0):
+        self.scorer = scorer or (lambda url, depth: depth)
+        super().__init__(maxsize)
+
+    def _init(self, maxsize: int) -> None:
+        self.queue: List[Tuple[float, int, FrontierEntry]] = []
+        self._counter = itertools.count()
+        self.in_flight: Dict[int, FrontierEntry] = {}
+
+    def _qsize(self) -> int:
+        return len(self.queue)
+
+    def _put(self, entry: FrontierEntry) -> None:
+        heapq.heappush(self.queue, (self.scorer(*entry), next(self._counter), entry))
+
+    def _get(self) -> FrontierEntry:
+        entry = heapq.heappop(self.queue)[2]
+        self.in_flight[threading.get_ident()] = entry
+        return entry
+
+    def push(self, entries: Iterable[FrontierEntry], seen: SeenSet) -> int:
+        """Enqueue the entries whose URL is not in seen yet and finish the caller's current entry.
+
+        Returns the number of entries added.
+        """
+        added = 0
+        with self.mutex:
+            for url, depth in entries:
+                if seen.add(url):
+                    self._put((url, depth))
+                    added += 1
+            self.in_flight.pop(threading.get_ident(), None)
+            self.unfinished_tasks += added
+            for _ in range(added):
+                self.not_empty.notify()
+        return added
+
+    def add_pending(self) -> None:
+        """Count outside work that may still push entries, so join() waits for it.
+
+        Each call must be matched by a task_done() once that work is finished.
+        """
+        with self.mutex:
+            self.unfinished_tasks += 1
+
+    def wait_done(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for every entry to be processed; True if they all are."""
+        with self.all_tasks_done:
+            if self.unfinished_tasks:
+                self.all_tasks_done.wait(timeout)
+            return not self.unfinished_tasks
+
+    def restore(self, entries: Iterable[FrontierEntry]) -> None:
+        """Enqueue entries that were already claimed, e.g. from a checkpoint."""
+        for url, depth in entries:
+            self.put((url, depth))
+
+    def snapshot(self, seen: SeenSet) -> Tuple[List[FrontierEntry], Any]:
+        """Return the in-flight and pending entries together with the matching state of seen."""
+        with self.mutex:
+            return list(self.in_flight.values()) + [entry for _, _, entry in sorted(self.queue)], seen.get_state()
+
+
+class AsyncCrawlFrontier(asyncio.Queue):
+    """CrawlFrontier for the async engine: the same ordering, claiming and snapshots on an event loop.
+
+    The entry each task is processing is tracked per task. Entries are only
+    added and taken on the event loop, but ``snapshot`` may be called from
+    another thread (the checkpointer), so the heap and the in-flight entries
+    are guarded by a lock.
+    """
+
+    def __init__(self, scorer: Optional[Callable[[str, int], float]] = None):
+        self.scorer = scorer or (lambda url, depth: depth)
+        # Reentrant, as push holds it around put_nowait
+        self.lock = threading.RLock()
+        super().__init__()
+
+    def _init(self, maxsize: int) -> None:
+        self._queue: List[Tuple[float, int, FrontierEntry]] = []
+        self._counter = itertools.count()
+        self.in_flight: Dict[Any, FrontierEntry] = {}
+
+    def _put(self, entry: FrontierEntry) -> None:
+        with self.lock:
+            heapq.heappush(self._queue, (self.scorer(*entry), next(self._counter), entry))
+
+    def _get(self) -> FrontierEntry:
+        with self.lock:
+            entry = heapq.heappop(self._queue)[2]
+            self.in_flight[asyncio.current_task()] = entry
+        return entry
+
+    def push(self, entries: Iterable[FrontierEntry], seen: SeenSet) -> int:
+        """Enqueue the entries whose URL is not in seen yet and finish the calling task's current entry.
+
+        Returns the number of entries added.
+        """
+        added = 0
+        with self.lock:
+            for url, depth in entries:
+                if seen.add(url):
+                    self.put_nowait((url, depth))
+                    added += 1
+            self.in_flight.pop(asyncio.current_task(), None)
+        return added
+
+    def restore(self, entries: Iterable[FrontierEntry]) -> None:
+        """Enqueue entries that were already claimed, e.g. from a checkpoint."""
+        for entry in entries:
+            self.put_nowait(entry)
+
+    def snapshot(self, seen: SeenSet) -> Tuple[List[FrontierEntry], Any]:
+        """Return the in-flight and pending entries together with the matching state of seen."""
+        with self.lock:
+            return list(self.in_flight.values()) + [entry for _, _, entry in sorted(self._queue)], seen.get_state()
@@ -0,0 +1,140 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Mapping, Optional
+
+logger = logging.getLogger("HttpCache")
+
+
+class HttpCache:
+    """On-disk cache of page bodies keyed by URL, revalidated with conditional requests.
+
+    Each entry keeps the ETag and Last-Modified validators and the SHA-256
+    digest of the body. Bodies are stored once per digest under
+    ``cache_dir/bodies`` and the least recently used entries are evicted once
+    the stored bodies exceed ``max_size`` bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, "bodies"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "digest TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._conn.commit()
+        self._total_size = self._stored_size()
+
+    def _stored_size(self) -> int:
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)"
+        ).fetchone()
+        return row[0]
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "bodies", digest[:2], digest)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Return the If-None-Match/If-Modified-Since headers for a cached URL."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        headers = {}
+        if row:
+            etag, last_modified = row
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def get_body(self, url: str) -> Optional[bytes]:
+        """Return the cached body for url after a 304 response, or None if it is gone."""
+        with self._lock:
+            row = self._conn.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+            if not row:
+                return None
+            try:
+                with open(self._body_path(row[0]), "rb") as f:
+                    body = f.read()
+            except OSError:
+                self._conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+            self.hits += 1
+            self.bytes_saved += len(body)
+        return body
+
+    def store(self, url: str, headers: Mapping[str, str], body: bytes) -> None:
+        """Cache a 200 response body if it carries a validator."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        if len(body) > self.max_size:
+            return
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._body_path(digest)
+        with self._lock:
+            known = self._conn.execute(
+                "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+            ).fetchone()
+            if not known or not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(body)
+                os.replace(tmp_path, path)
+                if not known:
+                    self._total_size += len(body)
+            old = self._conn.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (url, etag, last_modified, digest, size, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, digest, len(body), time.time())
+            )
+            if old and old[0] != digest:
+                self._release_body(old[0])
+            self._evict()
+            self._conn.commit()
+
+    def _release_body(self, digest: str) -> None:
+        """Delete a body file once no entry references it."""
+        if self._conn.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+            return
+        path = self._body_path(digest)
+        try:
+            self._total_size -= os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_size."""
+        while self._total_size > self.max_size:
+            row = self._conn.execute(
+                "SELECT url, digest FROM entries ORDER BY accessed LIMIT 1"
+            ).fetchone()
+            if not row:
+                break
+            self._conn.execute("DELETE FROM entries WHERE url = ?", (row[0],))
+            self._release_body(row[1])
+            logger.debug(f"Evicted {row[0]} from the HTTP cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
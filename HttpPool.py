@@ -0,0 +1,61 @@
+import threading
+from typing import Dict
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that counts the requests it sends and the TCP/TLS connects it makes.
+
+    A connect is counted every time a pooled connection (re)opens its socket,
+    so a server closing keep-alive connections shows up as a low reuse rate.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.requests_sent = 0
+        self.connections_opened = 0
+        self._stats_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+
+        class CountingHTTPConnection(HTTPConnection):
+            def connect(self):
+                super().connect()
+                adapter._count_connection()
+
+        class CountingHTTPSConnection(HTTPSConnection):
+            def connect(self):
+                super().connect()
+                adapter._count_connection()
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = CountingHTTPConnection
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = CountingHTTPSConnection
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+    def _count_connection(self) -> None:
+        with self._stats_lock:
+            self.connections_opened += 1
+
+    def send(self, request, *args, **kwargs):
+        with self._stats_lock:
+            self.requests_sent += 1
+        return super().send(request, *args, **kwargs)
+
+    def stats(self) -> Dict[str, float]:
+        """Return requests sent, connections opened and the share of requests on a reused connection."""
+        with self._stats_lock:
+            requests_sent, connections = self.requests_sent, self.connections_opened
+        reuse_rate = max(0.0, 1 - connections / requests_sent) if requests_sent else 0.0
+        return {"requests": requests_sent, "connections": connections, "reuse_rate": reuse_rate}
@@ -0,0 +1,163 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:  # selectolax is optional
+    SelectolaxParser = None
+
+PARSERS = ("bs4", "fast", "selectolax")
+
+# (file references from href/src attributes, hrefs of <a> tags)
+ExtractedLinks = Tuple[List[str], List[str]]
+
+# (href, size in bytes or None) of each entry of a directory listing
+Listing = List[Tuple[str, Optional[int]]]
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+# Titles of Apache/nginx/lighttpd autoindex pages and of python -m http.server
+_AUTOINDEX_TITLE = re.compile(rb"<title>\s*(?:Index of |Directory listing for )", re.IGNORECASE)
+# A link and the rest of its row: the text after it up to the next link, end of table row or line
+_LISTING_ENTRY = re.compile(
+    r"""<a\s[^>]*?href\s*=\s*["']([^"']*)["'][^>]*>.*?</a>([^\n]*?)(?=<a\s|</tr>|\n|\Z)""",
+    re.IGNORECASE | re.DOTALL
+)
+_TAG = re.compile(r"<[^>]*>")
+# The modification time column, which the size column follows
+_LISTED_TIME = re.compile(r"^\d{1,2}:\d{2}(?::\d{2})?$")
+# 1234, 1.2K, 12M, 3.4G (binary multiples, as autoindex modules print them)
+_LISTED_SIZE = re.compile(r"^(\d+(?:\.\d+)?)([KMGT]?)B?$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def decode_html(content: bytes) -> str:
+    """Decode page bytes using a BOM or <meta charset>, falling back to UTF-8."""
+    for bom, encoding in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"),
+                          (codecs.BOM_UTF16_BE, "utf-16")):
+        if content.startswith(bom):
+            return content.decode(encoding, errors="replace")
+    match = _META_CHARSET.search(content[:2048])
+    if match:
+        try:
+            return content.decode(match.group(1).decode("ascii"), errors="replace")
+        except LookupError:
+            pass
+    return content.decode("utf-8", errors="replace")
+
+
+class LinkCollector(HTMLParser):
+    """Single-pass HTML parser that only records href/src attribute values.
+
+    No document tree is built; each start tag is inspected and discarded.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hrefs: List[str] = []
+        self.srcs: List[str] = []
+        self.anchors: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, str]]) -> None:
+        href = src = None
+        for name, value in attrs:
+            if name == "href":
+                href = value or ""
+            elif name == "src":
+                src = value or ""
+        if href is not None:
+            self.hrefs.append(href)
+            if tag == "a":
+                self.anchors.append(href)
+        if src is not None:
+            self.srcs.append(src)
+
+    handle_startendtag = handle_starttag
+
+
+def _extract_bs4(content: bytes) -> ExtractedLinks:
+    soup = BeautifulSoup(content, "html.parser")
+    return links_from_soup(soup), [tag["href"] for tag in soup.find_all("a", href=True)]
+
+
+def _extract_fast(content: bytes) -> ExtractedLinks:
+    collector = LinkCollector()
+    collector.feed(decode_html(content))
+    collector.close()
+    return collector.hrefs + collector.srcs, collector.anchors
+
+
+def _extract_selectolax(content: bytes) -> ExtractedLinks:
+    tree = SelectolaxParser(content)
+    hrefs, anchors = [], []
+    for node in tree.css("[href]"):
+        href = node.attributes.get("href") or ""
+        hrefs.append(href)
+        if node.tag == "a":
+            anchors.append(href)
+    srcs = [node.attributes.get("src") or "" for node in tree.css("[src]")]
+    return hrefs + srcs, anchors
+
+
+def _listed_size(row: str) -> Optional[int]:
+    """Return the size column of a listing row, the token right after the modification time.
+
+    None if the row has no such column or it is ``-``.
+    """
+    tokens = _TAG.sub(" ", row).split()
+    for i, token in enumerate(tokens[:-1]):
+        if _LISTED_TIME.match(token):
+            match = _LISTED_SIZE.match(tokens[i + 1])
+            if match:
+                return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+            return None
+    return None
+
+
+def is_autoindex(content: bytes) -> bool:
+    """Tell whether a page is a server-generated directory listing."""
+    return _AUTOINDEX_TITLE.search(content[:2048]) is not None
+
+
+def extract_listing(content: bytes) -> Optional[Listing]:
+    """Return the entries of an autoindex page with their listed sizes, None if content is not one.
+
+    A single regex pass over the page, without HTML parsing. Sizes printed
+    with a K/M/G suffix are approximate; directories and listings without a
+    size column get None. Column sorting links (``?C=N;O=D``) are skipped.
+    """
+    if not is_autoindex(content):
+        return None
+    listing: Listing = []
+    for match in _LISTING_ENTRY.finditer(decode_html(content)):
+        href = match.group(1)
+        if not href or href.startswith("?"):
+            continue
+        listing.append((href, None if href.endswith("/") else _listed_size(match.group(2))))
+    return listing
+
+
+def links_from_soup(soup: BeautifulSoup) -> List[str]:
+    """Return the href values followed by the src values of every tag in soup."""
+    return [tag["href"] for tag in soup.find_all(True, href=True)] + [
+        tag["src"] for tag in soup.find_all(True, src=True)
+    ]
+
+
+def extract_links(content: bytes, parser: str = "bs4") -> ExtractedLinks:
+    """Extract raw file references and anchor hrefs from an HTML page.
+
+    ``parser`` is one of PARSERS: ``bs4`` builds a BeautifulSoup tree,
+    ``fast`` streams the document once through html.parser without building a
+    tree, and ``selectolax`` uses the selectolax C parser when it is installed
+    (falling back to ``fast`` otherwise). All of them return the same links.
+    """
+    if parser == "bs4":
+        return _extract_bs4(content)
+    if parser == "selectolax" and SelectolaxParser is not None:
+        return _extract_selectolax(content)
+    return _extract_fast(content)
@@ -0,0 +1,275 @@
+import bisect
+import contextlib
+import cProfile
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("Metrics")
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS_FORMATS = ("json", "prometheus")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _number(value: float) -> str:
+    """Format a sample value without losing precision on large counts."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _prometheus_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile, None if empty or past the last bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], self.counts)),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """Counters, latency histograms and gauges collected during a crawl.
+
+    Names follow Prometheus conventions (``*_total`` counters, ``*_seconds``
+    histograms) and take keyword labels. Gauges are callables read when a
+    snapshot is taken, so queue depths cost nothing between snapshots.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._gauges: Dict[Tuple[str, Labels], Callable[[], float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """Observe the time spent in the with block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def gauge(self, name: str, read: Callable[[], float], **labels: Any) -> None:
+        """Register a callable returning the current value of a gauge."""
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = read
+
+    def total(self, name: str) -> float:
+        """Sum of a counter over all its labels."""
+        with self._lock:
+            return sum(value for (counter, _), value in self._counters.items() if counter == name)
+
+    def seconds(self, name: str) -> float:
+        """Total time observed by a histogram over all its labels."""
+        with self._lock:
+            return sum(histogram.sum for (observed, _), histogram in self._histograms.items() if observed == name)
+
+    def _read_gauges(self) -> List[Tuple[str, Labels, float]]:
+        with self._lock:
+            gauges = list(self._gauges.items())
+        values = []
+        for (name, labels), read in gauges:
+            try:
+                values.append((name, labels, float(read())))
+            except Exception as e:
+                logger.debug(f"Failed to read gauge {name}: {e}")
+        return values
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return every metric as a JSON-serializable dict."""
+        gauges = self._read_gauges()
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "uptime": time.time() - self.started,
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                    for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0])
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for name, labels, value in sorted(gauges)
+                ],
+            }
+
+    def to_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        typed = set()
+
+        def declare(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        gauges = self._read_gauges()
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                declare(name, "counter")
+                lines.append(f"{name}{_prometheus_labels(labels)} {_number(value)}")
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                declare(name, "histogram")
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    le = bound if isinstance(bound, str) else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_prometheus_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{_prometheus_labels(labels)} {_number(histogram.sum)}")
+                lines.append(f"{name}_count{_prometheus_labels(labels)} {histogram.count}")
+        for name, labels, value in sorted(gauges):
+            declare(name, "gauge")
+            lines.append(f"{name}{_prometheus_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsReporter:
+    """Periodically write a metrics snapshot to a file, as JSON or Prometheus text.
+
+    The file is replaced atomically, so it can be tailed or scraped (e.g. by
+    node_exporter's textfile collector) while the crawl runs.
+    """
+
+    def __init__(self, metrics: Metrics, path: str, interval: float = 10, format: str = "json"):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.format = format
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self) -> None:
+        if self.format == "prometheus":
+            data = self.metrics.to_prometheus()
+        else:
+            data = json.dumps(self.metrics.snapshot(), indent=1)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def start(self) -> None:
+        """Start writing snapshots in the background."""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write a final snapshot."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                logger.error(f"Failed to write metrics to {self.path}: {e}")
+
+
+class Profiler:
+    """cProfile hook covering the calling thread and every worker thread it is installed in.
+
+    cProfile only sees the thread that enabled it, so each thread gets its
+    own profile (``start_thread`` doubles as a thread pool initializer) and
+    the profiles are merged into one pstats file by ``dump``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+
+    def start_thread(self) -> None:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ profiles every thread from the first profile enabled
+            return
+        with self._lock:
+            self._profiles.append(profile)
+
+    def dump(self) -> None:
+        """Merge the profiles collected so far and write them to path."""
+        with self._lock:
+            profiles, self._profiles = self._profiles, []
+        if not profiles:
+            return
+        for profile in profiles:
+            profile.disable()
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(self.path)
+        logger.info(f"Wrote profile of {len(profiles)} threads to {self.path}")
@@ -0,0 +1,176 @@
+import email.utils
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger("Politeness")
+
+# Responses that mean "slow down" rather than "this page is broken"
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class HostState:
+    """Pacing state for one host: a token bucket plus an adaptive concurrency limit."""
+
+    def __init__(self, rate: Optional[float], max_concurrency: int):
+        self.rate = rate  # requests per second, None for unlimited
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.not_before = 0.0  # set by Retry-After / backoff
+        self.max_concurrency = max_concurrency
+        self.concurrency = max_concurrency
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self.latency: Optional[float] = None  # EWMA in seconds
+        self.best_latency: Optional[float] = None
+
+    def refill(self, now: float) -> None:
+        if self.rate is None:
+            self.tokens = 1.0
+            return
+        burst = max(1.0, self.rate)
+        self.tokens = min(burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a request may start, 0 if it can start now."""
+        if now < self.not_before:
+            return self.not_before - now
+        if self.in_flight >= self.concurrency:
+            return 0.05
+        if self.tokens < 1.0:
+            return (1.0 - self.tokens) / self.rate
+        return 0.0
+
+
+class PolitenessScheduler:
+    """Per-host request pacing shared by all the workers of a scraper.
+
+    Each host gets a token bucket refilled at ``rate`` requests per second
+    (tightened by robots.txt Crawl-delay/Request-rate), a concurrency limit
+    that is halved on 429/503 responses, lowered by one on latency spikes and
+    grows back by one after a run of successes, and a ``not_before`` time
+    honouring Retry-After (up to ``MAX_BACKOFF`` seconds).
+    """
+
+    SUCCESSES_TO_GROW = 20
+    LATENCY_SPIKE = 3.0
+    MAX_BACKOFF = 60.0
+
+    def __init__(self, rate: Optional[float] = None, max_concurrency: int = 10, adaptive: bool = True):
+        self.rate = rate
+        self.max_concurrency = max(1, max_concurrency)
+        self.adaptive = adaptive
+        self._hosts: Dict[str, HostState] = {}
+        self._cond = threading.Condition()
+
+    def _host(self, url: str) -> HostState:
+        host = urlparse(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(self.rate, self.max_concurrency)
+        return state
+
+    def set_crawl_delay(self, url: str, delay: float) -> None:
+        """Limit the host of url to one request every delay seconds."""
+        if delay <= 0:
+            return
+        with self._cond:
+            state = self._host(url)
+            rate = 1.0 / delay
+            state.rate = rate if state.rate is None else min(state.rate, rate)
+            state.tokens = min(state.tokens, 1.0)
+        logger.info(f"Pacing {urlparse(url).netloc} at {rate:.2f} requests/second")
+
+    def acquire(self, url: str) -> None:
+        """Block until a request to the host of url is allowed, then take a slot."""
+        with self._cond:
+            state = self._host(url)
+            while True:
+                wait = self._take(state)
+                if wait <= 0:
+                    return
+                self._cond.wait(wait)
+
+    def try_acquire(self, url: str) -> float:
+        """Take a slot if a request to the host of url is allowed now; otherwise return the seconds to wait.
+
+        For callers that cannot block, such as an event loop.
+        """
+        with self._cond:
+            return self._take(self._host(url))
+
+    def _take(self, state: HostState) -> float:
+        now = time.monotonic()
+        state.refill(now)
+        wait = state.wait_time(now)
+        if wait > 0:
+            return wait
+        if state.rate is not None:
+            state.tokens -= 1.0
+        state.in_flight += 1
+        return 0.0
+
+    def release(self, url: str, status: Optional[int], latency: float) -> None:
+        """Return the slot taken by acquire and adapt to the observed response."""
+        with self._cond:
+            state = self._host(url)
+            state.in_flight = max(0, state.in_flight - 1)
+            if status is not None and status not in THROTTLE_STATUSES:
+                state.failures = 0
+                state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+                if state.best_latency is None or latency < state.best_latency:
+                    state.best_latency = latency
+                if self.adaptive:
+                    self._adapt(state)
+            self._cond.notify_all()
+
+    def _adapt(self, state: HostState) -> None:
+        if state.best_latency and state.latency > max(self.LATENCY_SPIKE * state.best_latency, 0.05):
+            # The server is slowing down under load: shed concurrency before it starts refusing
+            if state.concurrency > 1:
+                state.concurrency -= 1
+                state.successes = 0
+                state.latency = state.best_latency * 2
+            return
+        state.successes += 1
+        if state.successes >= self.SUCCESSES_TO_GROW and state.concurrency < state.max_concurrency:
+            state.concurrency += 1
+            state.successes = 0
+
+    def backoff(self, url: str, retry_after: Optional[str] = None) -> float:
+        """Pause the host of url after a 429/503 and return the pause in seconds."""
+        with self._cond:
+            state = self._host(url)
+            state.failures += 1
+            delay = parse_retry_after(retry_after)
+            if delay is None:
+                delay = 2.0 ** state.failures
+            # A huge Retry-After would stall the host for the rest of the crawl
+            delay = min(self.MAX_BACKOFF, delay)
+            state.not_before = max(state.not_before, time.monotonic() + delay)
+            if self.adaptive:
+                state.concurrency = max(1, state.concurrency // 2)
+                state.successes = 0
+                if state.rate is not None:
+                    state.rate = max(state.rate / 2, 0.01)
+            self._cond.notify_all()
+        logger.warning(f"Throttled by {urlparse(url).netloc}, backing off {delay:.1f}s")
+        return delay
@@ -0,0 +1,157 @@
+import abc
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("ResultsSink")
+
+RESULT_FORMATS = ("jsonl", "sqlite")
+
+# Fields of a result record; missing ones are written as null
+RESULT_FIELDS = ("type", "url", "status", "size", "content_type", "parent", "path", "timestamp")
+
+
+class ResultsSink(abc.ABC):
+    """Stream crawl results to a file while the crawl runs.
+
+    ``write`` only appends the record to an in-memory batch; a background
+    thread writes the batch once it holds ``batch_size`` records or every
+    ``flush_interval`` seconds, so workers normally never wait on disk I/O.
+    If the writer falls behind and ``MAX_PENDING_BATCHES`` batches pile up,
+    the worker calling ``write`` writes them itself, so memory does not grow
+    with the number of results. Record types are ``page``, ``file`` (a file
+    URL found on a page), ``download`` and ``probe`` (an enumeration hit).
+    Subclasses implement ``_write_batch``.
+    """
+
+    MAX_PENDING_BATCHES = 4
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._batch: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # Held while a batch is written, so batches are written one at a time and in order
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._open()
+        self._thread = threading.Thread(target=self._run, name="results", daemon=True)
+        self._thread.start()
+
+    def write(self, type: str, url: str, **fields: Any) -> None:
+        record = {"type": type, "url": url, "timestamp": time.time(), **fields}
+        with self._lock:
+            self._batch.append(record)
+            pending = len(self._batch)
+        if pending >= self.batch_size * self.MAX_PENDING_BATCHES:
+            # Backpressure: the writer thread cannot keep up, so this worker waits for the disk too
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the pending batch."""
+        with self._write_lock:
+            with self._lock:
+                batch, self._batch = self._batch, []
+            if not batch:
+                return
+            try:
+                self._write_batch(batch)
+                self.written += len(batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} results to {self.path}: {e}")
+
+    @abc.abstractmethod
+    def _open(self) -> None:
+        """Open the file; its directory exists by then."""
+
+    @abc.abstractmethod
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Write a batch of records to the file."""
+
+    def close(self) -> None:
+        """Stop the writer thread and write what is left."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+
+
+class JsonlSink(ResultsSink):
+    """One JSON object per line, appended to the file."""
+
+    def _open(self) -> None:
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        self._file.write("".join(json.dumps(record) + "\n" for record in batch))
+        self._file.flush()
+
+    def close(self) -> None:
+        super().close()
+        self._file.close()
+
+
+class SqliteSink(ResultsSink):
+    """Rows in a ``results`` table, one transaction per batch.
+
+    The database is in WAL mode, so other processes can read results while
+    the crawl writes them.
+    """
+
+    def _open(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "id INTEGER PRIMARY KEY, type TEXT NOT NULL, url TEXT NOT NULL, status INTEGER, "
+            "size INTEGER, content_type TEXT, parent TEXT, path TEXT, timestamp REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_url ON results (url)")
+        self._conn.commit()
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO results ({', '.join(RESULT_FIELDS)}) "
+                f"VALUES ({', '.join('?' for _ in RESULT_FIELDS)})",
+                [tuple(record.get(field) for field in RESULT_FIELDS) for record in batch]
+            )
+
+    def close(self) -> None:
+        super().close()
+        self._conn.close()
+
+
+def results_format(path: str, format: Optional[str] = None) -> str:
+    """Return format, or guess it from the file extension (sqlite for .db/.sqlite, else jsonl)."""
+    if format:
+        return format
+    return "sqlite" if os.path.splitext(path)[1].lower() in (".db", ".sqlite", ".sqlite3") else "jsonl"
+
+
+def create_results_sink(path: str, format: Optional[str] = None, **kwargs: Any) -> ResultsSink:
+    """Create the sink for one of RESULT_FORMATS."""
+    format = results_format(path, format)
+    if format == "sqlite":
+        return SqliteSink(path, **kwargs)
+    if format == "jsonl":
+        return JsonlSink(path, **kwargs)
+    raise ValueError(f"Unknown results format: {format}")
@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Set
+from urllib.parse import quote, unquote, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+logger = logging.getLogger("RobotsCache")
+
+
+class RobotsRules:
+    """Parsed robots.txt of one origin plus memoized allow/deny decisions."""
+
+    def __init__(self, parser: RobotFileParser, lines: Optional[list], fetched_at: float, status: str):
+        self.parser = parser
+        self.lines = lines
+        self.fetched_at = fetched_at
+        self.status = status  # "parsed", "allow_all", "disallow_all" or "unreachable"
+        self.decisions: Dict[str, bool] = {}
+        # Rules match by path prefix, so the decision for a path only depends on
+        # its first prefix_length characters
+        rule_paths = [
+            rule.path
+            for entry in parser.entries + ([parser.default_entry] if parser.default_entry else [])
+            for rule in entry.rulelines
+        ]
+        self.prefix_length = max((len(path) for path in rule_paths), default=0)
+
+    def decision_key(self, url: str) -> str:
+        """Normalize url the way RobotFileParser.can_fetch does and cut it to the relevant prefix."""
+        parsed = urlparse(unquote(url))
+        path = quote(urlunparse(("", "", parsed.path, parsed.params, parsed.query, parsed.fragment))) or "/"
+        return path[:self.prefix_length]
+
+
+class RobotsCache:
+    """robots.txt rules keyed by origin, fetched on first use through the scraper's session.
+
+    Rules are kept for ``ttl`` seconds and optionally persisted to
+    ``cache_file`` so later runs skip the fetch. Each origin's allow/deny
+    decisions are memoized by path prefix, so checking a link is a dict
+    lookup once its prefix has been seen.
+    """
+
+    MAX_DECISIONS = 100_000
+
+    def __init__(
+        self,
+        session: requests.Session,
+        user_agent: str,
+        ttl: float = 24 * 3600,
+        cache_file: Optional[str] = None,
+        timeout: float = 10,
+        on_rules: Optional[Callable[[str, RobotFileParser], None]] = None
+    ):
+        self.session = session
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.cache_file = cache_file
+        self.timeout = timeout
+        self.on_rules = on_rules
+        self._rules: Dict[str, RobotsRules] = {}
+        self._lock = threading.Lock()
+        self._origin_locks: Dict[str, threading.Lock] = {}
+        self._announced: Set[str] = set()  # origins whose rules were passed to on_rules
+        if cache_file:
+            self._load()
+
+    @staticmethod
+    def origin(url: str) -> str:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def can_fetch(self, url: str) -> bool:
+        """Check if url is allowed for our User-Agent."""
+        rules = self.rules_for(url)
+        key = rules.decision_key(url)
+        allowed = rules.decisions.get(key)
+        if allowed is None:
+            allowed = rules.parser.can_fetch(self.user_agent, url)
+            if len(rules.decisions) < self.MAX_DECISIONS:
+                rules.decisions[key] = allowed
+        return allowed
+
+    def is_cached(self, url: str) -> bool:
+        """Tell whether rules_for(url) can answer without fetching robots.txt."""
+        origin = self.origin(url)
+        rules = self._rules.get(origin)
+        return rules is not None and time.time() - rules.fetched_at < self.ttl and origin in self._announced
+
+    def rules_for(self, url: str) -> RobotsRules:
+        """Return the rules for the origin of url, fetching robots.txt if needed.
+
+        The fetch blocks; code on an event loop should make sure is_cached(url)
+        holds first, fetching in an executor otherwise.
+        """
+        origin = self.origin(url)
+        if self.is_cached(url):
+            return self._rules[origin]
+        with self._lock:
+            origin_lock = self._origin_locks.setdefault(origin, threading.Lock())
+        with origin_lock:
+            # Another thread may have fetched it while we waited
+            rules = self._rules.get(origin)
+            if rules is None or time.time() - rules.fetched_at >= self.ttl:
+                rules = self._fetch(origin)
+                self._rules[origin] = rules
+                self._announced.discard(origin)
+            if origin not in self._announced:
+                # Also reached for rules loaded from cache_file
+                if self.on_rules:
+                    self.on_rules(origin, rules.parser)
+                self._announced.add(origin)
+        return rules
+
+    def _fetch(self, origin: str) -> RobotsRules:
+        robots_url = f"{origin}/robots.txt"
+        parser = RobotFileParser(robots_url)
+        try:
+            response = self.session.get(robots_url, timeout=self.timeout)
+        except requests.RequestException as e:
+            # Unreachable robots.txt: assume everything is disallowed, as urllib does
+            logger.warning(f"Failed to load robots.txt from {robots_url}: {e}")
+            parser.disallow_all = True
+            return RobotsRules(parser, None, time.time(), "unreachable")
+
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+            status, lines = "disallow_all", None
+        elif 400 <= response.status_code < 500:
+            parser.allow_all = True
+            status, lines = "allow_all", None
+        elif response.ok:
+            lines = response.content.decode("utf-8", errors="replace").splitlines()
+            parser.parse(lines)
+            status = "parsed"
+        else:
+            logger.warning(f"Failed to load robots.txt from {robots_url}: HTTP {response.status_code}")
+            parser.disallow_all = True
+            return RobotsRules(parser, None, time.time(), "unreachable")
+        logger.info(f"Loaded robots.txt from {robots_url}")
+        return RobotsRules(parser, lines, time.time(), status)
+
+    def _load(self) -> None:
+        """Load unexpired rules saved by a previous run."""
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable robots cache {self.cache_file}: {e}")
+            return
+        now = time.time()
+        for origin, data in saved.items():
+            if now - data["fetched_at"] >= self.ttl:
+                continue
+            parser = RobotFileParser(f"{origin}/robots.txt")
+            if data["status"] == "allow_all":
+                parser.allow_all = True
+            elif data["status"] == "disallow_all":
+                parser.disallow_all = True
+            else:
+                parser.parse(data["lines"])
+            self._rules[origin] = RobotsRules(parser, data["lines"], data["fetched_at"], data["status"])
+
+    def save(self) -> None:
+        """Persist the successfully fetched rules to cache_file."""
+        if not self.cache_file:
+            return
+        with self._lock:
+            saved: Dict[str, Dict] = {}
+            if os.path.exists(self.cache_file):
+                try:
+                    with open(self.cache_file, "r") as f:
+                        saved = json.load(f)
+                except (OSError, ValueError):
+                    saved = {}
+            for origin, rules in list(self._rules.items()):
+                # Fetch failures are only remembered for this run
+                if rules.status != "unreachable":
+                    saved[origin] = {"fetched_at": rules.fetched_at, "status": rules.status, "lines": rules.lines}
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+            tmp_path = f"{self.cache_file}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(saved, f)
+            os.replace(tmp_path, self.cache_file)
+
+    def crawl_delay(self, parser: RobotFileParser) -> Optional[float]:
+        """Return the minimum delay between requests asked for by robots.txt."""
+        delay = parser.crawl_delay(self.user_agent)
+        request_rate = parser.request_rate(self.user_agent)
+        if request_rate and request_rate.requests:
+            delay = max(float(delay or 0), request_rate.seconds / request_rate.requests)
+        return float(delay) if delay else None
@@ -1,15 +1,38 @@
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 from requests.exceptions import HTTPError, ConnectionError, Timeout, RequestException
+from urllib3.util.retry import Retry
 import os
+import hashlib
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Set, Optional
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 from urllib.robotparser import RobotFileParser
 from tqdm import tqdm
 import http.cookiejar
-from itertools import product
+from SeenSet import create_seen_set
+from TechDetector import TechDetector
+from Frontier import PAGE_EXTENSIONS, CrawlBudget, CrawlFrontier, FrontierEntry, LinkScorer
+from Checkpoint import Checkpointer
+from ContentStore import BLOB_DIR, ContentStore
+from DownloadManifest import DownloadManifest
+from Enumerator import (
+    DEFAULT_MATCH_STATUS, MAX_PROBE_BODY, DirectoryEnumerator, ProbeResult, found_directory, parent_directories
+)
+from HttpCache import HttpCache
+from HttpPool import CountingAdapter
+from Metrics import Metrics, MetricsReporter, Profiler
+from ResultsSink import ResultsSink, create_results_sink
+from RobotsCache import RobotsCache
+from Sitemap import MAX_SITEMAPS, SITEMAP_CHUNK, SitemapEntry, SitemapParser, is_sitemap_url
+from Politeness import PolitenessScheduler, THROTTLE_STATUSES
+from UrlFilter import UrlFilter
+from LinkExtractor import ExtractedLinks, Listing, extract_links, extract_listing, links_from_soup
 
 RED = "\033[91m"
 GREEN = "\033[92m"
@@ -24,6 +47,68 @@ logging.basicConfig(
 )
 logger = logging.getLogger("WebScraper")
 
+# Pages of other content types are not read, as there are no links to extract from them
+PAGE_CONTENT_TYPES = frozenset(["text/html", "application/xhtml+xml", "application/json"])
+MAX_PAGE_SIZE = 10 * 1024 * 1024
+PAGE_CHUNK = 64 * 1024
+
+
+def hash_file(path: str, digest: "hashlib._Hash") -> None:
+    """Feed the contents of a file to a hashlib object."""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+
+def print_time_split(metrics: Metrics) -> None:
+    """Print where the crawl threads spent their time."""
+    print(f"{GREEN}Time spent: {metrics.seconds('webworm_fetch_seconds'):.1f}s fetching, "
+          f"{metrics.seconds('webworm_parse_seconds'):.1f}s parsing, "
+          f"{metrics.seconds('webworm_queue_wait_seconds'):.1f}s waiting for the frontier "
+          f"(summed over threads); {metrics.total('webworm_retries_total'):.0f} retries{RESET}")
+
+
+# Download and crawl workers report from several threads at once
+_print_lock = threading.Lock()
+
+
+def print_line(message: str) -> None:
+    """Print a whole line from a worker thread, so concurrent messages never share a line."""
+    with _print_lock:
+        print(message, flush=True)
+
+
+def build_session(
+    user_agent: str = "WebWorm/1.0",
+    pool_size: int = 10,
+    pool_block: bool = False,
+    retries: int = 3,
+    backoff_factor: float = 0.5,
+    pool_connections: int = 10
+) -> requests.Session:
+    """Create a session with a pooled, retrying adapter for crawling, enumeration and downloads.
+
+    ``pool_size`` is the number of keep-alive connections kept per host (one per
+    worker thread) and ``pool_connections`` the number of hosts whose pools are kept.
+    """
+    session = requests.Session()
+    session.headers.update({"User-Agent": user_agent})
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        # 429/503 are paced by the politeness scheduler in WebScraper.request()
+        status_forcelist=(500, 502, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=False,
+        raise_on_status=False
+    )
+    adapter = CountingAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_size, pool_block=pool_block, max_retries=retry
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 
 class WebScraper:
     def __init__(
@@ -37,25 +122,188 @@ class WebScraper:
         max_file_size: Optional[int] = None,
         cookies: Optional[str] = None,
         cookies_file: Optional[str] = None,
-        output_dir: str = "results"
+        output_dir: str = "results",
+        seen_store: str = "memory",
+        bloom_capacity: int = 1_000_000,
+        bloom_error_rate: float = 0.001,
+        checkpoint: bool = False,
+        checkpoint_interval: float = 60,
+        resume: bool = False,
+        parser: str = "bs4",
+        parse_workers: int = 0,
+        pool_size: Optional[int] = None,
+        pool_block: bool = False,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        rate_limit: Optional[float] = None,
+        host_concurrency: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        cache_size: int = 1024 ** 3,
+        incremental: bool = False,
+        pipeline: bool = False,
+        download_threads: Optional[int] = None,
+        session: Optional[requests.Session] = None,
+        scheduler: Optional[PolitenessScheduler] = None,
+        request_limit: Optional[threading.Semaphore] = None,
+        http_cache: Optional[HttpCache] = None,
+        interrupt: Optional[threading.Event] = None,
+        robots_ttl: float = 24 * 3600,
+        robots_cache_file: Optional[str] = None,
+        robots_cache: Optional[RobotsCache] = None,
+        wordlist: Optional[str] = None,
+        enum_extensions: Optional[List[str]] = None,
+        match_status: Optional[str] = DEFAULT_MATCH_STATUS,
+        filter_status: Optional[str] = None,
+        filter_size: Optional[str] = None,
+        filter_words: Optional[str] = None,
+        calibrate: bool = True,
+        enum_depth: int = 0,
+        metrics: Optional[Metrics] = None,
+        metrics_file: Optional[str] = None,
+        metrics_format: str = "json",
+        metrics_interval: float = 10,
+        profile_file: Optional[str] = None,
+        profiler: Optional[Profiler] = None,
+        results_file: Optional[str] = None,
+        results_format: Optional[str] = None,
+        results_sink: Optional[ResultsSink] = None,
+        content_store: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        scope: Optional[List[str]] = None,
+        max_pages: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_time: Optional[float] = None,
+        sitemaps: bool = False,
+        max_page_size: Optional[int] = MAX_PAGE_SIZE,
+        head_check: bool = False,
+        tech_detector: Optional[TechDetector] = None
     ):
         self.url = url
         self.depth = depth
         self.extensions = extensions if extensions else []
-        self.visited_urls: Set[str] = set()
-        self.downloaded_files: Set[str] = set()
+        # Which links are crawled and which are files; see UrlFilter
+        self.url_filter = UrlFilter(url, self.extensions, include, exclude, scope)
+        # Membership structures for pages and files; see SeenSet.SEEN_STORES
+        netloc = urlparse(url).netloc
+        self.visited_urls = create_seen_set(
+            seen_store, "visited", os.path.join(output_dir, f"{netloc}.visited.sqlite"),
+            bloom_capacity, bloom_error_rate, reset=not resume
+        )
+        self.downloaded_files = create_seen_set(
+            seen_store, "files", os.path.join(output_dir, f"{netloc}.files.sqlite"),
+            bloom_capacity, bloom_error_rate
+        )
+        self.discovered_files: List[str] = []
+        self.files_found = 0
+        self.completed_downloads: Set[str] = set()
         self.max_threads = max_threads
+        self.parser = parser  # see LinkExtractor.PARSERS
+        self.parse_workers = parse_workers
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
         self.user_agent = user_agent
         self.respect_robots_txt = respect_robots_txt
         self.max_file_size = max_file_size  # in bytes
-        self.robots_parser = RobotFileParser()
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": self.user_agent})
+        self.max_page_size = max_page_size
+        # Batch downloads are checked with HEAD requests first; see precheck_files
+        self.head_check = head_check
+        # Technologies are detected from the first HTML page crawled on each origin
+        self.tech_detector = tech_detector
+        self.incremental = incremental
+        # Pipeline mode downloads files while crawling, without the interactive prompt
+        self.pipeline = pipeline
+        self.download_threads = download_threads or max_threads
+        self._download_executor: Optional[ThreadPoolExecutor] = None
+        self._pipeline_dir = output_dir
+        self._pipeline_manifest: Optional[DownloadManifest] = None
+        # Downloads are stored once per content hash and linked at their URL paths
+        self.content_store = content_store
+        self.store: Optional[ContentStore] = None
+        # A session, scheduler and request limit may be shared by several scrapers
+        self.session = session or build_session(
+            user_agent, pool_size or max(max_threads, 10), pool_block, retries, backoff_factor
+        )
+        self.adapter = self.session.get_adapter(url)
+        self.retries = retries
+        self.scheduler = scheduler or PolitenessScheduler(rate_limit, host_concurrency or max_threads)
+        self.request_limit = request_limit
+        # A shared cache is closed by its owner
+        self._owns_http_cache = http_cache is None
+        self.http_cache = http_cache or (HttpCache(cache_dir, cache_size) if cache_dir else None)
         self.output_dir = output_dir
+        # The frontier is ordered by LinkScorer, and the crawl stops once the budget is spent
+        self.scorer = LinkScorer(self.extensions)
+        self.budget = CrawlBudget(max_pages, max_bytes, max_time)
+        self.frontier = CrawlFrontier(self.scorer.score)
+        self._stop_event = threading.Event()
+        # Set by the caller to stop every scraper sharing it, including ones that have not started crawling
+        self.interrupt = interrupt
+        self._resumed_frontier: List[FrontierEntry] = []
+
+        # Crawl state is checkpointed to <output_dir>/<netloc>.checkpoint.json
+        self.resume = resume
+        self.checkpointer: Optional[Checkpointer] = None
+        if checkpoint or resume:
+            self.checkpointer = Checkpointer(
+                os.path.join(output_dir, f"{netloc}.checkpoint.json"),
+                self._checkpoint_state,
+                checkpoint_interval
+            )
         
-        # Initialize robots.txt parser if needed
-        if self.respect_robots_txt:
-            self._setup_robots_txt()
+        # Directory enumeration options; see Enumerator.DirectoryEnumerator
+        self.wordlist = wordlist
+        self.enum_extensions = enum_extensions or []
+        self.match_status = match_status
+        self.filter_status = filter_status
+        self.filter_size = filter_size
+        self.filter_words = filter_words
+        self.calibrate = calibrate
+        # Directories this many levels below the start URL are enumerated too
+        self.enum_depth = enum_depth
+        self._enum_base = urlparse(DirectoryEnumerator(url).base_url)
+        self.enumeration_results: Dict[str, ProbeResult] = {}
+        self._enumerated: Set[str] = set()
+        self._enum_lock = threading.Lock()
+        self._enum_queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._enum_executor: Optional[ThreadPoolExecutor] = None
+        self._enum_window: Optional[threading.BoundedSemaphore] = None
+        self._enum_thread: Optional[threading.Thread] = None
+
+        # Sitemaps from robots.txt (with sitemaps set) and from enumeration feed the frontier
+        self.sitemaps = sitemaps
+        self._sitemaps_seen: Set[str] = set()
+        self._sitemap_queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._sitemap_thread: Optional[threading.Thread] = None
+
+        # Metrics may be shared by several scrapers; only the owner of a file writes it
+        self.metrics = metrics or Metrics()
+        self._owns_metrics = metrics is None
+        self.metrics_reporter = (
+            MetricsReporter(self.metrics, metrics_file, metrics_interval, metrics_format) if metrics_file else None
+        )
+        self.metrics.gauge("webworm_frontier_depth", lambda: self.frontier.qsize(), site=netloc)
+        self.metrics.gauge("webworm_pages_in_flight", lambda: len(self.frontier.in_flight), site=netloc)
+        self.metrics.gauge("webworm_enumeration_queue_depth", lambda: self._enum_queue.qsize(), site=netloc)
+        self.metrics.gauge("webworm_visited_pages", lambda: len(self.visited_urls), site=netloc)
+        self.metrics.gauge(
+            "webworm_bytes_deduplicated", lambda: self.store.bytes_saved if self.store else 0, site=netloc
+        )
+        self.profiler = profiler or (Profiler(profile_file) if profile_file else None)
+        self._owns_profiler = profiler is None and self.profiler is not None
+        # Installed in every worker thread, so the profiler sees them all
+        self._thread_initializer = self.profiler.start_thread if self.profiler else None
+
+        # Crawl results are streamed to a sink, which may be shared by several scrapers
+        self.results = results_sink or (create_results_sink(results_file, results_format) if results_file else None)
+        self._owns_results = results_sink is None and self.results is not None
+        # Files downloaded while crawling only need to be kept in memory for a checkpoint
+        self._keep_discovered_files = not (pipeline and self.results and not self.checkpointer)
+
+        # robots.txt is fetched per origin on first use, not here
+        self.robots = robots_cache or RobotsCache(
+            self.session, user_agent, ttl=robots_ttl, cache_file=robots_cache_file,
+            on_rules=self._apply_robots_delay
+        )
         
         # Setup session with cookies if provided
         if cookies:
@@ -74,40 +322,136 @@ class WebScraper:
             except Exception as e:
                 logger.warning(f"Failed to load cookies from file: {e}")
     
-    def _setup_robots_txt(self) -> None:
-        """Set up and fetch robots.txt if respect_robots_txt is enabled."""
-        try:
-            robots_url = urljoin(self.url, "/robots.txt")
-            self.robots_parser.set_url(robots_url)
-            self.robots_parser.read()
-            logger.info(f"Loaded robots.txt from {robots_url}")
-        except Exception as e:
-            logger.warning(f"Failed to load robots.txt: {e}")
-            # If we can't load robots.txt, we'll assume it doesn't exist
-            pass
+    def connection_stats(self) -> Dict[str, float]:
+        """Return the number of requests and new connections made through the pool."""
+        if isinstance(self.adapter, CountingAdapter):
+            return self.adapter.stats()
+        return {"requests": 0, "connections": 0, "reuse_rate": 0.0}
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the counts reported at the end of a crawl."""
+        return {
+            "url": self.url,
+            "pages": len(self.visited_urls),
+            "files": self.files_found,
+            "downloaded": len(self.completed_downloads),
+        }
+
+    def record(self, type: str, url: str, **fields: Any) -> None:
+        """Write a result record to the results sink, if there is one."""
+        if self.results is not None:
+            self.results.write(type, url, **fields)
+
+    def _record_page(self, url: str, response: requests.Response, body: Optional[bytes]) -> None:
+        self.record(
+            "page", url, status=response.status_code, size=len(body) if body is not None else None,
+            content_type=response.headers.get("Content-Type")
+        )
+
+    def _apply_robots_delay(self, origin: str, parser: RobotFileParser) -> None:
+        """Pace an origin according to its robots.txt Crawl-delay/Request-rate."""
+        delay = self.robots.crawl_delay(parser)
+        if delay:
+            self.scheduler.set_crawl_delay(origin, delay)
 
     def is_allowed_by_robots(self, url: str) -> bool:
         """Check if URL is allowed by robots.txt"""
         if not self.respect_robots_txt:
             return True
         
-        return self.robots_parser.can_fetch(self.user_agent, url)
+        return self.robots.can_fetch(url)
 
     def is_valid_url(self, url: str) -> bool:
         """Check if URL is valid and should be visited."""
         return (
-            urlparse(url).netloc == urlparse(self.url).netloc
+            self.url_filter.allows(url)
             and url not in self.visited_urls
             and self.is_allowed_by_robots(url)
         )
 
+    def is_valid_seed(self, url: str) -> bool:
+        """Like is_valid_url, but the scope and include/exclude rules only apply to links found while crawling."""
+        return url not in self.visited_urls and self.is_allowed_by_robots(url)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the politeness scheduler.
+
+        429/503 responses pause the host (honouring Retry-After) and are retried
+        up to ``retries`` times before the last response is returned. The host
+        slot and the request limit are held until the response is read; for a
+        ``stream=True`` request, that is until the response is closed.
+        """
+        for attempt in range(self.retries + 1):
+            with self.metrics.timer("webworm_politeness_wait_seconds"):
+                self.scheduler.acquire(url)
+            start = time.monotonic()
+            if self.request_limit:
+                self.request_limit.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except BaseException as e:
+                self._release_request(url, None, time.monotonic() - start)
+                if isinstance(e, RequestException):
+                    self.metrics.inc("webworm_request_errors_total", error=type(e).__name__)
+                raise
+            latency = time.monotonic() - start
+            self.metrics.observe("webworm_request_seconds", latency, method=method)
+            self.metrics.inc("webworm_responses_total", status=response.status_code)
+            if response.status_code not in THROTTLE_STATUSES or attempt == self.retries:
+                break
+            self._release_request(url, response.status_code, latency)
+            self.metrics.inc("webworm_retries_total", status=response.status_code)
+            self.scheduler.backoff(url, response.headers.get("Retry-After"))
+            response.close()
+        if kwargs.get("stream"):
+            self._release_on_close(response, url, latency)
+        else:
+            self._release_request(url, response.status_code, latency)
+        return response
+
+    def _release_request(self, url: str, status: Optional[int], latency: float) -> None:
+        """Return the host slot and the request limit taken by request()."""
+        self.scheduler.release(url, status, latency)
+        if self.request_limit:
+            self.request_limit.release()
+
+    def _release_on_close(self, response: requests.Response, url: str, latency: float) -> None:
+        """Hold the request's slot while a streamed body is read, releasing it once the response is closed."""
+        close = response.close
+        released = False
+
+        def close_and_release() -> None:
+            nonlocal released
+            try:
+                close()
+            finally:
+                if not released:
+                    released = True
+                    self._release_request(url, response.status_code, latency)
+
+        response.close = close_and_release
+
     def get_page_content(self, url: str) -> Optional[bytes]:
-        """Fetch the content of a URL."""
+        """Fetch the content of a URL, or None if it failed or is not worth parsing."""
+        with self.metrics.timer("webworm_fetch_seconds"):
+            return self._fetch_page(url)
+
+    def _fetch_page(self, url: str) -> Optional[bytes]:
         try:
             logger.debug(f"Fetching {url}")
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            return response.content
+            headers = self.http_cache.conditional_headers(url) if self.http_cache else None
+            with self.request("GET", url, timeout=10, stream=True, headers=headers) as response:
+                if response.status_code != 304 or self.http_cache is None:
+                    return self._read_page(url, response)
+                body = self.http_cache.get_body(url)
+                if body is not None:
+                    logger.debug(f"Not modified, using cached copy of {url}")
+                    self.metrics.inc("webworm_cache_hits_total")
+                    self._record_page(url, response, body)
+                    return body
+            # The cached body was evicted meanwhile; fetch it again
+            with self.request("GET", url, timeout=10, stream=True) as response:
+                return self._read_page(url, response)
         except HTTPError as e:
             logger.error(f"HTTP error occurred: {e}")
             print(f"{RED}HTTP error occurred: {e}{RESET}")
@@ -122,237 +466,917 @@ class WebScraper:
             print(f"{RED}Unexpected error occurred: {e}{RESET}")
         return None
 
-    def download_files(self, urls: Set[str], download_dir: str = "results") -> None:
+    def _read_page(self, url: str, response: requests.Response) -> Optional[bytes]:
+        """Read a streamed page response, or stop early and return None if it is not worth parsing.
+
+        The headers are checked before any of the body is read, the first
+        chunk is sniffed for binary content, and reading stops once the body
+        grows past max_page_size.
+        """
+        if not response.ok:
+            self._record_page(url, response, None)
+            response.raise_for_status()
+        reason = self.page_skip_reason(url, response.headers)
+        chunks = []
+        received = 0
+        if reason is None:
+            for chunk in response.iter_content(PAGE_CHUNK):
+                received += len(chunk)
+                reason = self.chunk_skip_reason(url, chunk, received)
+                if reason:
+                    break
+                chunks.append(chunk)
+        self.metrics.inc("webworm_bytes_total", received, kind="page")
+        self.budget.spend_bytes(received)
+        if reason:
+            self._record_page(url, response, None)
+            self._page_skipped(url, reason)
+            return None
+        body = b"".join(chunks)
+        self._record_page(url, response, body)
+        if self.http_cache:
+            self.http_cache.store(url, response.headers, body)
+        if self.tech_detector is not None and "html" in response.headers.get("Content-Type", "") \
+                and self.tech_detector.claim(url):
+            self._analyze_tech(url, response.headers, body, response.cookies.get_dict())
+        return body
+
+    def _analyze_tech(self, url: str, headers: Any, body: bytes, cookies: Dict[str, str]) -> None:
+        """Detect technologies from a crawled page, whose origin the caller claimed."""
+        try:
+            self.tech_detector.analyze(url, headers, body.decode("utf-8", errors="replace"), cookies)
+        except Exception as e:
+            logger.error(f"Error detecting technologies on {url}: {e}")
+
+    def report_tech(self) -> None:
+        """Print the technologies detected on the start URL's origin, fetching it if no page was analyzed."""
+        report = self.tech_detector.detect(self.url)
+        print(f"{GREEN}Technologies on {self.url}:{RESET}\n{report or 'Detection failed'}")
+        logger.info(f"Technologies on {self.url}: {report}")
+
+    def page_skip_reason(self, url: str, headers: Any) -> Optional[str]:
+        """Tell from a page's response headers why its body should not be read, if it should not."""
+        if self.is_binary_content(url, b"", headers.get("Content-Type")):
+            return "content_type"
+        content_length = headers.get("Content-Length")
+        if self.max_page_size and content_length and content_length.isdigit() \
+                and int(content_length) > self.max_page_size:
+            return "size"
+        return None
+
+    def chunk_skip_reason(self, url: str, chunk: bytes, received: int) -> Optional[str]:
+        """Check the latest chunk of a page body, received counting the bytes read so far."""
+        if received == len(chunk) and self.is_binary_content(url, chunk):
+            return "binary"
+        if self.max_page_size and received > self.max_page_size:
+            return "size"
+        return None
+
+    def _page_skipped(self, url: str, reason: str) -> None:
+        logger.info(f"Not parsing {url}: {reason}")
+        self.metrics.inc("webworm_pages_skipped_total", reason=reason)
+
+    def _file_too_large(self, url: str) -> bool:
+        logger.warning(f"File {url} exceeds maximum file size ({self.max_file_size} bytes)")
+        print_line(f"{YELLOW}Skipped {url}: exceeds maximum file size{RESET}")
+        self.metrics.inc("webworm_files_skipped_total", reason="size")
+        return False
+
+    def precheck_files(self, urls: Iterable[str]) -> List[str]:
+        """Check files with concurrent HEAD requests and return the ones worth downloading.
+
+        Dropped are files that answer with an error status, are larger than
+        max_file_size, or turn out to be an HTML page (a login form or soft
+        404) although their extension is not a page's. Where HEAD is not
+        allowed, a one-byte Range request is made instead. Files that could
+        not be checked are kept.
+        """
+        urls = [url for url in urls if url not in self.completed_downloads]
+        with ThreadPoolExecutor(max_workers=self.max_threads, initializer=self._thread_initializer) as executor:
+            checks = list(tqdm(executor.map(self._precheck_file, urls), total=len(urls), desc="Checking files"))
+        kept = [url for url, (ok, _) in zip(urls, checks) if ok]
+        known_size = sum(size for ok, size in checks if ok and size)
+        print(f"{GREEN}HEAD check: {len(kept)} of {len(urls)} files to download "
+              f"({known_size} bytes known){RESET}")
+        logger.info(f"HEAD check kept {len(kept)} of {len(urls)} files, {known_size} bytes known")
+        return kept
+
+    def _precheck_file(self, url: str) -> Tuple[bool, Optional[int]]:
+        try:
+            response = self.request("HEAD", url, timeout=10, allow_redirects=True)
+            if response.status_code in (405, 501):
+                with self.request("GET", url, timeout=10, stream=True, headers={"Range": "bytes=0-0"}) as response:
+                    pass
+        except RequestException as e:
+            logger.debug(f"HEAD check of {url} failed: {e}")
+            return True, None
+        return self.file_check(url, response.status_code, response.headers)
+
+    def file_check(self, url: str, status: int, headers: Any) -> Tuple[bool, Optional[int]]:
+        """Decide from a HEAD (or Range) response whether to download a file; also return its size if known."""
+        if status >= 400:
+            logger.info(f"HEAD check: {url} answered {status}")
+            self.record("download", url, status=status)
+            self.metrics.inc("webworm_files_skipped_total", reason="status")
+            return False, None
+        content_range = headers.get("Content-Range", "")
+        size = content_range.rpartition("/")[2] if status == 206 else headers.get("Content-Length")
+        size = int(size) if size and size.isdigit() else None
+        if self.max_file_size and size is not None and size > self.max_file_size:
+            return self._file_too_large(url), size
+        content_type = headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+        if content_type == "text/html" and os.path.splitext(urlparse(url).path)[1].lower() not in PAGE_EXTENSIONS:
+            logger.info(f"HEAD check: {url} is an HTML page")
+            self.metrics.inc("webworm_files_skipped_total", reason="content_type")
+            return False, size
+        return True, size
+
+    def download_files(self, urls: Iterable[str], download_dir: str = "results") -> None:
         """Download files in parallel using ThreadPoolExecutor."""
-        download_dir = os.path.join(download_dir, urlparse(self.url).netloc)
+        download_dir, manifest = self._prepare_download_dir(download_dir)
+        if self.head_check:
+            urls = self.precheck_files(urls)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_threads, initializer=self._thread_initializer) as executor:
+                futures = []
+                for url in urls:
+                    if url in self.completed_downloads:
+                        continue
+                    futures.append(executor.submit(self._download_file, url, download_dir, manifest))
+                
+                with tqdm(total=len(futures), desc="Downloading files") as pbar:
+                    for _ in [future.result() for future in futures]:
+                        pbar.update(1)
+        finally:
+            if manifest:
+                manifest.save()
+            if self.store:
+                self.store.save()
+
+    def _prepare_download_dir(self, download_dir: str) -> Tuple[str, Optional[DownloadManifest]]:
+        """Create the per-host download directory and load its manifest in incremental mode.
+
+        With content_store set, the blob directory at the top of download_dir
+        is shared by every host.
+        """
+        root = download_dir
+        download_dir = os.path.join(root, urlparse(self.url).netloc)
         os.makedirs(download_dir, exist_ok=True)
+        manifest = DownloadManifest(download_dir) if self.incremental else None
+        if self.content_store:
+            self.store = ContentStore(os.path.join(root, BLOB_DIR), download_dir, root)
+        return download_dir, manifest
 
-        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-            futures = []
-            for url in urls:
-                futures.append(executor.submit(self._download_file, url, download_dir))
-            
-            with tqdm(total=len(futures), desc="Downloading files") as pbar:
-                for _ in [future.result() for future in futures]:
-                    pbar.update(1)
-
-    def _download_file(self, url: str, download_dir: str) -> bool:
-        """Download a single file."""
-        filename = os.path.basename(urlparse(url).path)
-        file_path = os.path.join(download_dir, filename)
+    def start_download_pipeline(self) -> None:
+        """Download files as soon as they are discovered, while the crawl continues."""
+        self._pipeline_dir, self._pipeline_manifest = self._prepare_download_dir(self.output_dir)
+        self._download_executor = ThreadPoolExecutor(
+            max_workers=self.download_threads, thread_name_prefix="download", initializer=self._thread_initializer
+        )
+        # Files found before a resume that were never downloaded
+        for file_url in list(self.discovered_files):
+            self._queue_download(file_url)
+
+    def _queue_download(self, file_url: str) -> None:
+        if self._download_executor is not None and file_url not in self.completed_downloads:
+            self._download_executor.submit(
+                self._download_file, file_url, self._pipeline_dir, self._pipeline_manifest
+            )
+
+    def finish_download_pipeline(self) -> None:
+        """Wait for queued downloads to finish and stop the download workers."""
+        if self._download_executor is None:
+            return
+        try:
+            self._download_executor.shutdown(wait=True)
+        finally:
+            self._download_executor = None
+            if self._pipeline_manifest:
+                self._pipeline_manifest.save()
+            if self.store:
+                self.store.save()
+
+    def _download_file(
+        self, url: str, download_dir: str, manifest: Optional[DownloadManifest] = None
+    ) -> bool:
+        """Download a single file.
+
+        With a manifest, unchanged files are skipped with a conditional GET (or a
+        HEAD request when the server sent no validators) and a leftover ``.part``
+        file is resumed with a Range request. The file is hashed as it is
+        written; with a content store, it is then committed to the store.
+        Pipeline downloads stop once the byte or time budget is spent, and
+        with head_check set each file is checked just before its download.
+        """
+        if self.pipeline and self.budget.exhausted(pages=False):
+            return False
+        if self.pipeline and self.head_check and not self._precheck_file(url)[0]:
+            return False
+        with self.metrics.timer("webworm_download_seconds"):
+            downloaded = self._fetch_file(url, download_dir, manifest)
+        self.metrics.inc("webworm_downloads_total", result="ok" if downloaded else "failed")
+        return downloaded
+
+    def _fetch_file(self, url: str, download_dir: str, manifest: Optional[DownloadManifest]) -> bool:
+        headers = {}
+        offset = 0
         try:
+            if self.store:
+                file_path = self.store.path_for(url)
+            else:
+                file_path = os.path.join(download_dir, os.path.basename(urlparse(url).path))
+            part_path = file_path + ".part"
+            entry = manifest.get(url) if manifest else None
+            if entry and not entry.get("partial") and self._is_unchanged_on_disk(file_path, entry):
+                if entry.get("etag") or entry.get("last_modified"):
+                    if entry.get("etag"):
+                        headers["If-None-Match"] = entry["etag"]
+                    if entry.get("last_modified"):
+                        headers["If-Modified-Since"] = entry["last_modified"]
+                elif self._head_matches(url, entry):
+                    return self._skip_unchanged(url)
+            elif entry and entry.get("partial") and os.path.exists(part_path):
+                offset = os.path.getsize(part_path)
+                headers["Range"] = f"bytes={offset}-"
+                validator = entry.get("etag") or entry.get("last_modified")
+                if validator:
+                    headers["If-Range"] = validator
+
             # Stream the file to check its size first
-            with self.session.get(url, stream=True) as response:
+            with self.request("GET", url, stream=True, headers=headers) as response:
+                if response.status_code == 304:
+                    return self._skip_unchanged(url)
                 response.raise_for_status()
+                if response.status_code != 206:
+                    # Full body: the server ignored or rejected the Range request
+                    offset = 0
                 
                 # Check file size if max_file_size is set
                 if self.max_file_size:
                     content_length = response.headers.get('Content-Length')
-                    if content_length and int(content_length) > self.max_file_size:
-                        logger.warning(f"File {url} exceeds maximum file size ({self.max_file_size} bytes)")
-                        print(f"{YELLOW}Skipped {url}: exceeds maximum file size{RESET}")
-                        return False
+                    if content_length and offset + int(content_length) > self.max_file_size:
+                        return self._file_too_large(url)
+
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if manifest:
+                    manifest.update(url, partial=True, etag=etag, last_modified=last_modified)
                 
-                # Download the file
-                with open(file_path, "wb") as file:
+                # Download the file, hashing it on the way
+                digest = hashlib.sha256()
+                if offset:
+                    hash_file(part_path, digest)
+                os.makedirs(os.path.dirname(part_path), exist_ok=True)
+                received = 0
+                too_large = False
+                with open(part_path, "ab" if offset else "wb") as file:
                     for chunk in response.iter_content(chunk_size=8192):
+                        received += len(chunk)
+                        # Also catches files sent without a Content-Length
+                        if self.max_file_size and offset + received > self.max_file_size:
+                            too_large = True
+                            break
                         file.write(chunk)
-                logger.info(f"Downloaded file: {url}")
-                print(f"{GREEN}Downloaded file: {url}{RESET}")
-                return True
+                        digest.update(chunk)
+                self.metrics.inc("webworm_bytes_total", received, kind="file")
+                self.budget.spend_bytes(received)
+                if too_large:
+                    os.remove(part_path)
+                    if manifest:
+                        manifest.remove(url)
+                    return self._file_too_large(url)
+                if self.store:
+                    file_path = self.store.commit(url, part_path, digest.hexdigest(), offset + received)
+                else:
+                    os.replace(part_path, file_path)
+
+            if manifest:
+                manifest.update(
+                    url,
+                    path=os.path.relpath(file_path, download_dir),
+                    size=os.path.getsize(file_path),
+                    etag=etag,
+                    last_modified=last_modified,
+                    sha256=digest.hexdigest()
+                )
+            self.completed_downloads.add(url)
+            self.record(
+                "download", url, status=response.status_code, size=os.path.getsize(file_path),
+                content_type=response.headers.get("Content-Type"), path=file_path
+            )
+            logger.info(f"Downloaded file: {url}")
+            print_line(f"{GREEN}Downloaded file: {url}{RESET}")
+            return True
                 
         except requests.exceptions.HTTPError as e:
+            self.record("download", url, status=e.response.status_code if e.response is not None else None)
             logger.error(f"HTTP error when downloading {url}: {e}")
-            print(f"{RED}HTTP error occurred when downloading {url}: {e}{RESET}")
+            print_line(f"{RED}HTTP error occurred when downloading {url}: {e}{RESET}")
         except Exception as e:
             logger.error(f"Error downloading {url}: {e}")
-            print(f"{RED}Error downloading {url}: {e}{RESET}")
+            print_line(f"{RED}Error downloading {url}: {e}{RESET}")
         return False
 
+    def _is_unchanged_on_disk(self, file_path: str, entry: Dict[str, Any]) -> bool:
+        """Check that a previously downloaded file is still on disk as recorded."""
+        return os.path.exists(file_path) and os.path.getsize(file_path) == entry.get("size")
+
+    def _head_matches(self, url: str, entry: Dict[str, Any]) -> bool:
+        """Compare a HEAD response's Content-Length with a manifest entry."""
+        resp = self.request("HEAD", url, timeout=10, allow_redirects=True)
+        content_length = resp.headers.get("Content-Length")
+        return resp.ok and content_length is not None and int(content_length) == entry.get("size")
+
+    def _skip_unchanged(self, url: str) -> bool:
+        """Mark an unchanged file as done without downloading it again."""
+        self.completed_downloads.add(url)
+        self.record("download", url, status=304)
+        self.metrics.inc("webworm_downloads_unchanged_total")
+        logger.info(f"Unchanged, skipped: {url}")
+        print_line(f"{GREEN}Unchanged, skipped: {url}{RESET}")
+        return True
+
     def extract_files(self, soup: BeautifulSoup, url: str) -> None:
         """Extract file URLs from a page."""
-        links_attributes = ["href", "src"]
-        for tag in soup.find_all(True, href=True) + soup.find_all(True, src=True):
-            for attribute in links_attributes:
-                if tag.has_attr(attribute):
-                    link = tag[attribute]
-                    parsed_link = urlparse(link)
-                    if "." in os.path.basename(parsed_link.path):
-                        if not self.extensions or any(
-                            [link.endswith(ext) for ext in self.extensions]
-                        ):
-                            file_url = urljoin(url, link)
-                            if file_url not in self.downloaded_files:
-                                self.downloaded_files.add(file_url)
-
-    def scrape_page(self, url: str, current_depth: int) -> None:
-        """Scrape a single page recursively."""
-        if current_depth > self.depth or not self.is_valid_url(url):
-            return
+        with self.metrics.timer("webworm_parse_seconds", parser="bs4"):
+            links = links_from_soup(soup)
+        self.add_files(links, url)
+
+    def add_files(self, links: Iterable[str], url: str) -> None:
+        """Record the raw href/src values that point to files, resolved against url."""
+        for file_url in self.url_filter.files(url, links):
+            if self.downloaded_files.add(file_url):
+                self.files_found += 1
+                if self._keep_discovered_files:
+                    self.discovered_files.append(file_url)
+                self.record("file", file_url, parent=url)
+                self._queue_download(file_url)
+
+    def scrape_page(self, url: str, current_depth: int) -> List[Tuple[str, int]]:
+        """Scrape a single page and return the links to crawl next.
+
+        The URL must already be claimed in visited_urls by the frontier.
+        """
+        if current_depth > self.depth:
+            return []
         
         logger.info(f"Scraping {url} at depth {current_depth}")
-        self.visited_urls.add(url)
         content = self.get_page_content(url)
         if content is None:
-            return
+            return []
+        return self.parse_page(url, content, current_depth)
 
-        # Check content type before parsing to avoid errors with binary files
+    def parse_page(self, url: str, content: bytes, current_depth: int) -> List[Tuple[str, int]]:
+        """Extract files from fetched page content and return the links to crawl next."""
+        if self.is_binary_content(url, content):
+            return []
         try:
-            # Try to detect if this is a binary file or text content
-            is_binary = False
-            # Check the first few bytes for null bytes or other binary indicators
-            sample = content[:1000]
-            if b'\x00' in sample:
-                is_binary = True
-            
-            # Or use content-type from headers if available
-            if hasattr(content, 'headers') and 'content-type' in content.headers:
-                content_type = content.headers['content-type'].lower()
-                if 'text/html' not in content_type and 'application/json' not in content_type:
-                    is_binary = True
-            
-            if is_binary:
-                logger.debug(f"Skipping binary content at {url}")
-                return
-                
-            soup = BeautifulSoup(content, "html.parser")
-            self.extract_files(soup, url)
-            
+            listing = extract_listing(content)
+            if listing is not None:
+                with self.metrics.timer("webworm_parse_seconds", parser="autoindex"):
+                    file_links, anchors = self.listing_links(url, listing)
+            else:
+                with self.metrics.timer("webworm_parse_seconds", parser=self.parser):
+                    file_links, anchors = self.extract_page_links(content)
         except Exception as e:
             logger.error(f"Error parsing content from {url}: {e}")
             print(f"{RED}Error parsing content from {url}: {e}{RESET}")
-            return
+            return []
+        return self.process_links(url, file_links, anchors, current_depth)
+
+    def is_binary_content(self, url: str, content: bytes, content_type: Optional[str] = None) -> bool:
+        """Check content type before parsing to avoid errors with binary files."""
+        # Try to detect if this is a binary file or text content
+        is_binary = False
+        # Check the first few bytes for null bytes or other binary indicators
+        sample = content[:1000]
+        if b'\x00' in sample:
+            is_binary = True
+        
+        # Or use the response's Content-Type if given
+        if content_type and content_type.split(";", 1)[0].strip().lower() not in PAGE_CONTENT_TYPES:
+            is_binary = True
+        
+        if is_binary:
+            logger.debug(f"Skipping binary content at {url}")
+        return is_binary
+
+    def listing_links(self, url: str, listing: Listing) -> ExtractedLinks:
+        """Split an autoindex listing into file links and the subdirectories to crawl.
+
+        Files listed as larger than max_file_size are dropped here, before any
+        request is made for them.
+        """
+        file_links, anchors = [], []
+        for href, size in listing:
+            if href.endswith("/"):
+                anchors.append(href)
+            elif self.max_file_size and size is not None and size > self.max_file_size:
+                logger.info(f"Skipped {href} listed in {url}: about {size} bytes")
+                self.metrics.inc("webworm_files_skipped_total", reason="listed_size")
+            else:
+                file_links.append(href)
+        return file_links, anchors
+
+    def extract_page_links(self, content: bytes) -> ExtractedLinks:
+        """Run link extraction, in the parse process pool when one is running."""
+        if self._parse_pool is not None:
+            return self._parse_pool.submit(extract_links, content, self.parser).result()
+        return extract_links(content, self.parser)
+
+    def process_links(
+        self, url: str, file_links: List[str], anchors: List[str], current_depth: int
+    ) -> List[Tuple[str, int]]:
+        """Record the files referenced by a page and return its links to crawl next."""
+        self.add_files(file_links, url)
         
+        links_to_crawl = []
         if current_depth < self.depth:
             # Collect links for the next depth level
-            links_to_crawl = []
             try:
-                for tag in soup.find_all("a", href=True):
-                    link = urljoin(url, tag["href"])
-                    if self.is_valid_url(link):
+                for link in self.url_filter.pages(url, anchors):
+                    if link not in self.visited_urls and self.is_allowed_by_robots(link):
                         links_to_crawl.append((link, current_depth + 1))
-                
-                # Process links in parallel with a limit to prevent too many threads
-                max_links = 100  # Limit to prevent too many threads
-                if len(links_to_crawl) > max_links:
-                    print(f"{YELLOW}Too many links found ({len(links_to_crawl)}). Limiting to {max_links}.{RESET}")
-                    links_to_crawl = links_to_crawl[:max_links]
-                    
-                # Process in batches to prevent excessive thread creation
-                batch_size = 10
-                for i in range(0, len(links_to_crawl), batch_size):
-                    batch = links_to_crawl[i:i+batch_size]
-                    with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-                        futures = []
-                        for link_args in batch:
-                            futures.append(executor.submit(self.scrape_page, *link_args))
-                        
-                        # Wait for all futures to complete
-                        for future in futures:
-                            try:
-                                future.result()
-                            except Exception as e:
-                                logger.error(f"Error in thread: {e}")
-                                
             except Exception as e:
                 logger.error(f"Error processing links from {url}: {e}")
                 print(f"{RED}Error processing links from {url}: {e}{RESET}")
+        return links_to_crawl
+
+    def start_parse_pool(self) -> None:
+        """Start the process pool that parses pages when parse_workers > 0."""
+        if self.parse_workers > 0 and self._parse_pool is None:
+            # spawn, not fork: forking a process that already runs crawl threads is unsafe
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def stop_parse_pool(self) -> None:
+        """Shut down the parse process pool."""
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=True, cancel_futures=True)
+            self._parse_pool = None
+
+    def crawl(self, seeds: List[FrontierEntry], enumerate_dirs: bool = False) -> None:
+        """Crawl from the seed (url, depth) pairs using one shared frontier.
+
+        A fixed pool of ``max_threads`` workers pulls pages from the frontier
+        and pushes the links it finds back onto it, so ``max_threads`` is the
+        real concurrency cap at every depth. With ``parse_workers`` set, the
+        workers hand page bytes to a process pool for parsing so it runs on
+        several cores. With ``enumerate_dirs`` set, directory enumeration runs
+        alongside the crawl; see start_enumeration. Sitemaps are read
+        alongside too; see start_sitemaps. Pages are taken in
+        LinkScorer order until the frontier is empty or the budget is spent.
+        """
+        self.frontier = CrawlFrontier(self.scorer.score)
+        self.budget.start()
+        self._stop_event.clear()
+        if self.interrupt is not None and self.interrupt.is_set():
+            self._stop_event.set()
+        self.frontier.restore(self._resumed_frontier)
+        self._resumed_frontier = []
+        self.frontier.push(
+            [(url, depth) for url, depth in seeds if depth <= self.depth and self.is_valid_seed(url)],
+            self.visited_urls
+        )
+
+        self.start_parse_pool()
+        if self.sitemaps or enumerate_dirs:
+            self.start_sitemaps()
+        if enumerate_dirs:
+            self.start_enumeration()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_threads, initializer=self._thread_initializer) as executor:
+                for _ in range(self.max_threads):
+                    executor.submit(self._crawl_worker)
+                try:
+                    while not self.frontier.wait_done(0.5):
+                        if self._stop_event.is_set() or self.budget.exhausted():
+                            self._report_budget(self.frontier.qsize())
+                            break
+                finally:
+                    # Workers finish the page they are on, leaving the rest of the frontier intact
+                    self._stop_event.set()
+        finally:
+            self.stop_sitemaps()
+            self.stop_enumeration()
+            self.stop_parse_pool()
+
+    def _report_budget(self, queued: int) -> None:
+        reason = self.budget.exhausted()
+        if reason:
+            print(f"{YELLOW}Crawl budget of {reason} spent; {queued} URLs left unvisited.{RESET}")
+            logger.info(f"Crawl budget of {reason} spent with {queued} URLs queued")
+
+    def _crawl_worker(self) -> None:
+        """Process frontier entries until the crawl is stopped."""
+        idle_since = time.perf_counter()
+        while not self._stop_event.is_set():
+            try:
+                item = self.frontier.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self.metrics.observe("webworm_queue_wait_seconds", time.perf_counter() - idle_since)
+            if not self.budget.take_page():
+                # The entry stays in flight, so a checkpoint keeps it for the next run
+                self._stop_event.set()
+                return
+            self.metrics.inc("webworm_pages_total")
+            links = []
+            try:
+                links = self.scrape_page(*item)
+                if self._enum_executor is not None:
+                    for dir_url in parent_directories(item[0]):
+                        self.enqueue_enumeration(dir_url)
+            except Exception as e:
+                logger.error(f"Error in thread: {e}")
+            finally:
+                self.frontier.push(links, self.visited_urls)
+                self.frontier.task_done()
+                idle_since = time.perf_counter()
+
+    def start_enumeration(self) -> None:
+        """Enumerate directories concurrently with the crawl, starting at the start URL.
+
+        Directories are queued by enqueue_enumeration, from the crawl and from
+        the probes themselves. A dispatcher thread streams each directory's
+        wordlist into a pool of ``max_threads`` probe threads, with a bounded
+        number of probes queued, and found paths are pushed onto the frontier.
+        Queued directories and probes count as pending frontier work, so the
+        crawl only finishes once enumeration is done.
+        """
+        self._enum_executor = ThreadPoolExecutor(max_workers=self.max_threads, initializer=self._thread_initializer)
+        self._enum_window = threading.BoundedSemaphore(self.max_threads * 4)
+        self._enum_thread = threading.Thread(target=self._enumeration_dispatcher, daemon=True)
+        self._enum_thread.start()
+        self.enqueue_enumeration(self._enum_base.geturl())
+
+    def stop_enumeration(self) -> None:
+        if self._enum_executor is None:
+            return
+        self._enum_queue.put(None)
+        self._enum_thread.join()
+        self._enum_executor.shutdown(wait=True)
+        self._enum_executor = None
+        self._report_enumeration(self.enumeration_results)
+
+    def enqueue_enumeration(self, dir_url: str) -> None:
+        """Queue a directory for enumeration if it is within enum_depth and not done yet."""
+        depth = self._enumeration_depth(dir_url)
+        if depth is None or depth > self.enum_depth:
+            return
+        with self._enum_lock:
+            if dir_url in self._enumerated:
+                return
+            self._enumerated.add(dir_url)
+        self.frontier.add_pending()
+        self._enum_queue.put(dir_url)
+
+    def _enumeration_depth(self, dir_url: str) -> Optional[int]:
+        """Number of directory levels between the start URL and dir_url, None if outside it."""
+        base = self._enum_base
+        parsed = urlparse(dir_url)
+        if parsed.netloc != base.netloc or not parsed.path.startswith(base.path):
+            return None
+        return parsed.path[len(base.path):].count("/")
+
+    def _enumeration_dispatcher(self) -> None:
+        """Stream the candidates of each queued directory into the probe pool."""
+        if self._thread_initializer:
+            self._thread_initializer()
+        while True:
+            dir_url = self._enum_queue.get()
+            if dir_url is None:
+                return
+            try:
+                if self._stop_event.is_set():
+                    continue
+                logger.info(f"Enumerating {dir_url}")
+                print(f"{YELLOW}Enumerating directories for {dir_url}...{RESET}")
+                enumerator = self.directory_enumerator(dir_url)
+                for test_url in enumerator.candidates():
+                    if self._stop_event.is_set():
+                        break
+                    self._enum_window.acquire()
+                    self.frontier.add_pending()
+                    self._enum_executor.submit(self._enumeration_probe, enumerator, test_url)
+            except Exception as e:
+                logger.error(f"Error enumerating {dir_url}: {e}")
+            finally:
+                self.frontier.task_done()
+
+    def _enumeration_probe(self, enumerator: DirectoryEnumerator, url: str) -> None:
+        """Probe one candidate and feed a hit back into the frontier and the enumeration queue."""
+        try:
+            if self._stop_event.is_set() or not self._test_url_exists(enumerator, url):
+                return
+            result = enumerator.results[url]
+            with self._enum_lock:
+                self.enumeration_results[url] = result
+            # Paths that only answered 401/403 and the like are reported but not crawled
+            if result.status < 400 and self.is_valid_url(url):
+                self.frontier.push([(url, 1)], self.visited_urls)
+            if result.status == 200 and is_sitemap_url(url):
+                self.enqueue_sitemap(url)
+            dir_url = found_directory(url, result)
+            if dir_url:
+                self.enqueue_enumeration(dir_url)
+        except Exception as e:
+            logger.error(f"Error probing {url}: {e}")
+        finally:
+            self._enum_window.release()
+            self.frontier.task_done()
+
+    def start_sitemaps(self) -> None:
+        """Read sitemaps in a background thread, pushing their URLs onto the frontier.
+
+        With ``sitemaps`` set, the sitemaps listed in robots.txt (or
+        /sitemap.xml) are queued right away; enumeration queues the ones it
+        finds. Sitemaps are streamed and parsed incrementally, sitemap indexes
+        queue the sitemaps they list, and queued sitemaps count as pending
+        frontier work.
+        """
+        self._sitemap_thread = threading.Thread(target=self._sitemap_worker, daemon=True)
+        self._sitemap_thread.start()
+        if self.sitemaps:
+            for sitemap_url in self.sitemap_urls():
+                self.enqueue_sitemap(sitemap_url)
+
+    def stop_sitemaps(self) -> None:
+        if self._sitemap_thread is None:
+            return
+        self._sitemap_queue.put(None)
+        self._sitemap_thread.join()
+        self._sitemap_thread = None
+
+    def sitemap_urls(self) -> List[str]:
+        """Return the sitemaps listed in the site's robots.txt, or its /sitemap.xml."""
+        listed = self.robots.rules_for(self.url).parser.site_maps()
+        return listed or [self.robots.origin(self.url) + "/sitemap.xml"]
+
+    def enqueue_sitemap(self, sitemap_url: str) -> None:
+        """Queue a sitemap for reading, once, up to MAX_SITEMAPS per crawl."""
+        if self._sitemap_thread is None:
+            return
+        with self._enum_lock:
+            if sitemap_url in self._sitemaps_seen or len(self._sitemaps_seen) >= MAX_SITEMAPS:
+                return
+            self._sitemaps_seen.add(sitemap_url)
+        self.frontier.add_pending()
+        self._sitemap_queue.put(sitemap_url)
+
+    def _sitemap_worker(self) -> None:
+        if self._thread_initializer:
+            self._thread_initializer()
+        while True:
+            sitemap_url = self._sitemap_queue.get()
+            if sitemap_url is None:
+                return
+            try:
+                if not self._stop_event.is_set():
+                    self._read_sitemap(sitemap_url)
+            except Exception as e:
+                logger.error(f"Error reading sitemap {sitemap_url}: {e}")
+            finally:
+                self.frontier.task_done()
+
+    def _read_sitemap(self, sitemap_url: str) -> None:
+        logger.info(f"Reading sitemap {sitemap_url}")
+        parser = SitemapParser()
+        with self.request("GET", sitemap_url, timeout=10, stream=True) as response:
+            if response.status_code != 200:
+                logger.info(f"No sitemap at {sitemap_url} ({response.status_code})")
+                return
+            print(f"{YELLOW}Reading sitemap {sitemap_url}...{RESET}")
+            for chunk in response.iter_content(SITEMAP_CHUNK):
+                if self._stop_event.is_set():
+                    return
+                links = self.sitemap_links(sitemap_url, parser.feed(chunk), self.enqueue_sitemap)
+                self.frontier.push(links, self.visited_urls)
+        self.frontier.push(self.sitemap_links(sitemap_url, parser.close(), self.enqueue_sitemap), self.visited_urls)
+
+    def sitemap_links(
+        self, sitemap_url: str, entries: List[SitemapEntry], enqueue_sitemap: Callable[[str], None]
+    ) -> List[Tuple[str, int]]:
+        """Queue the nested sitemaps among entries and return their pages as depth 1 links.
+
+        The returned pages are hinted to the scorer, so they are crawled
+        ahead of other links of the same depth; files are recorded like a
+        page's. Pages that are filtered out or already seen are not hinted,
+        as they are never queued and so never scored.
+        """
+        urls = []
+        for kind, loc in entries:
+            if kind == "sitemap":
+                enqueue_sitemap(loc)
+            else:
+                urls.append(loc)
+        if not urls:
+            return []
+        links = self.process_links(sitemap_url, urls, urls, 0)
+        self.scorer.hint(url for url, _ in links)
+        return links
+
+    def _checkpoint_state(self) -> Dict[str, Any]:
+        """Collect the crawl state written to the checkpoint file."""
+        frontier, visited = self.frontier.snapshot(self.visited_urls)
+        return {
+            "url": self.url,
+            "depth": self.depth,
+            "frontier": frontier,
+            "visited": visited,
+            "files": list(self.discovered_files),
+            "completed_downloads": list(self.completed_downloads),
+        }
+
+    def _restore_checkpoint(self, state: Dict[str, Any]) -> None:
+        """Load crawl state saved by _checkpoint_state."""
+        self._resumed_frontier = [(url, depth) for url, depth in state["frontier"]]
+        self.visited_urls.load_state(state["visited"])
+        for file_url in state["files"]:
+            if self.downloaded_files.add(file_url):
+                self.discovered_files.append(file_url)
+        self.files_found = len(self.discovered_files)
+        self.completed_downloads = set(state["completed_downloads"])
+        print(f"{GREEN}Resuming crawl: {len(self.visited_urls)} URLs seen, "
+              f"{len(self._resumed_frontier)} queued, {len(self.discovered_files)} files found{RESET}")
+        logger.info(f"Resumed crawl of {self.url} from {self.checkpointer.path}")
 
     def start_scraping(self) -> None:
         """Start the scraping process."""
         print(f"{GREEN}Starting to scrape {self.url} with depth {self.depth}{RESET}")
         logger.info(f"Starting to scrape {self.url} with depth {self.depth}")
-        
-        # Enumerate directories if requested
-        if hasattr(self, 'enumerate_dirs') and self.enumerate_dirs:
-            discovered_dirs = self.enumerate_directories(self.url)
-            # Add discovered directories to the scraping queue
-            for dir_url in discovered_dirs:
-                if dir_url not in self.visited_urls:
-                    self.scrape_page(dir_url, current_depth=1)
+
+        if self.metrics_reporter:
+            self.metrics_reporter.start()
+        if self._owns_profiler:
+            self.profiler.start_thread()
+
+        resumed = False
+        if self.checkpointer:
+            state = self.checkpointer.load() if self.resume else None
+            if state:
+                self._restore_checkpoint(state)
+                resumed = True
+            self.checkpointer.start()
+
+        try:
+            self._run_scraping(resumed)
+        finally:
+            if self.checkpointer:
+                self.checkpointer.stop()
+                print(f"{GREEN}Crawl state saved to {self.checkpointer.path}{RESET}")
+            self.visited_urls.close()
+            self.downloaded_files.close()
+            self.robots.save()
+            if self.http_cache and self._owns_http_cache:
+                self.http_cache.close()
+            if self.metrics_reporter:
+                self.metrics_reporter.stop()
+                print(f"{GREEN}Metrics written to {self.metrics_reporter.path}{RESET}")
+            if self._owns_profiler:
+                self.profiler.dump()
+                print(f"{GREEN}Profile written to {self.profiler.path} (view with python -m pstats){RESET}")
+            if self._owns_results:
+                self.results.close()
+                print(f"{GREEN}{self.results.written} results written to {self.results.path}{RESET}")
+
+    def _run_scraping(self, resumed: bool) -> None:
+        """Crawl, then offer to download the discovered files (or download them during the crawl)."""
+        # Enumerate directories during the crawl if requested (not repeated when resuming)
+        enumerate_dirs = not resumed and getattr(self, 'enumerate_dirs', False)
         
         # Start the main crawling process
-        self.scrape_page(self.url, current_depth=1)
+        seeds = [(self.url, 1)]
+        if self.pipeline:
+            self.start_download_pipeline()
+            try:
+                self.crawl(seeds, enumerate_dirs)
+            finally:
+                self.finish_download_pipeline()
+            print(f"{GREEN}Downloaded {len(self.completed_downloads)} of "
+                  f"{self.files_found} discovered files.{RESET}")
+            logger.info(f"Pipeline downloads: {len(self.completed_downloads)} of {self.files_found} files")
+        else:
+            self.crawl(seeds, enumerate_dirs)
+            self._prompt_download()
         
-        if len(self.downloaded_files) > 0:
-            print(f"{YELLOW}Discovered {len(self.downloaded_files)} files.{RESET}")
-            for file in self.downloaded_files:
-                print(f"  - {file}")
+        print(f"{GREEN}Crawling complete: Visited {len(self.visited_urls)} pages{RESET}")
+        logger.info(f"Crawling complete: Visited {len(self.visited_urls)} pages")
+
+        stats = self.connection_stats()
+        print(f"{GREEN}Connections: {stats['connections']} opened for {stats['requests']} requests "
+              f"({stats['reuse_rate']:.1%} reused){RESET}")
+        logger.info(f"Connection reuse: {stats}")
+        if self.http_cache:
+            print(f"{GREEN}HTTP cache: {self.http_cache.hits} pages not modified, "
+                  f"{self.http_cache.bytes_saved} bytes not re-downloaded{RESET}")
+            logger.info(f"HTTP cache hits: {self.http_cache.hits}, bytes saved: {self.http_cache.bytes_saved}")
+        if self.store:
+            print(f"{GREEN}Content store: {self.store.deduplicated} duplicate files, "
+                  f"{self.store.bytes_saved} bytes not stored twice{RESET}")
+            logger.info(f"Content store duplicates: {self.store.deduplicated}, bytes saved: {self.store.bytes_saved}")
+        if self.tech_detector:
+            self.report_tech()
+        if self._owns_metrics:
+            print_time_split(self.metrics)
+
+    def _prompt_download(self) -> None:
+        """List the discovered files and download them if the user agrees."""
+        if len(self.discovered_files) > 0:
+            if self.results:
+                # The full list is in the results file rather than on the console
+                print(f"{YELLOW}Discovered {len(self.discovered_files)} files, "
+                      f"listed in {self.results.path}.{RESET}")
+            else:
+                print(f"{YELLOW}Discovered {len(self.discovered_files)} files.{RESET}")
+                for file in self.discovered_files:
+                    print(f"  - {file}")
             
             userRes = input("Do you want to download them? (y/n): ").strip().lower()
             if userRes == "y":
-                self.download_files(self.downloaded_files, self.output_dir)
+                self.download_files(self.discovered_files, self.output_dir)
             else:
                 print(f"{RED}Download aborted.{RESET}")
                 logger.info("Download aborted by user")
         else:
             print(f"{YELLOW}No files found.{RESET}")
             logger.info("No files found")
-        
-        print(f"{GREEN}Crawling complete: Visited {len(self.visited_urls)} pages{RESET}")
-        logger.info(f"Crawling complete: Visited {len(self.visited_urls)} pages")
 
     def enumerate_directories(self, base_url: str) -> List[str]:
-        """Attempt to enumerate directories by common patterns."""
+        """Probe the wordlist paths under base_url and return the ones that exist.
+
+        Candidates are streamed through the thread pool with a bounded number
+        of probes queued, so large wordlists are never held in memory.
+        """
         logger.info(f"Starting directory enumeration for {base_url}")
         print(f"{YELLOW}Enumerating directories for {base_url}...{RESET}")
-        
-        # Common directory names to try
-        common_dirs = [
-            "admin", "backup", "backups", "data", "db", "debug", "files", 
-            "images", "img", "js", "css", "static", "upload", "uploads",
-            "private", "secrets", "api", "v1", "v2", "docs", "documentation"
-        ]
-        
-        # Common file patterns that might exist
-        common_files = [
-            "index.html", "index.php", "config.php", "config.js", ".env",
-            "README.md", "robots.txt", "sitemap.xml", ".git/HEAD"
-        ]
-        
+
+        enumerator = self.directory_enumerator(base_url)
         discovered_urls = []
-        base_path = urlparse(base_url).path
-        base_domain = f"{urlparse(base_url).scheme}://{urlparse(base_url).netloc}"
-        
-        # If base path doesn't end with /, add it for directory tests
-        if not base_path.endswith('/'):
-            base_path = base_path + '/'
-        
-        # Try common directories
-        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-            futures = []
-            
-            # Try directories
-            for directory in common_dirs:
-                test_url = urljoin(base_domain, base_path + directory + "/")
-                futures.append(executor.submit(self._test_url_exists, test_url))
-            
-            # Try files
-            for file in common_files:
-                test_url = urljoin(base_domain, base_path + file)
-                futures.append(executor.submit(self._test_url_exists, test_url))
-            
-            for future in futures:
-                result = future.result()
-                if result:
-                    discovered_urls.append(result)
-                    
-        if discovered_urls:
-            print(f"{GREEN}Discovered {len(discovered_urls)} directories/files:{RESET}")
-            for url in discovered_urls:
-                print(f"  - {url}")
+        window = threading.BoundedSemaphore(self.max_threads * 4)
+
+        with ThreadPoolExecutor(max_workers=self.max_threads, initializer=self._thread_initializer) as executor, \
+                tqdm(desc="Enumerating", unit="req") as pbar:
+            def probe_done(future) -> None:
+                window.release()
+                pbar.update(1)
+                if future.result():
+                    discovered_urls.append(future.result())
+
+            for test_url in enumerator.candidates():
+                window.acquire()
+                executor.submit(self._test_url_exists, enumerator, test_url).add_done_callback(probe_done)
+
+        self._report_enumeration(enumerator.results)
+        return discovered_urls
+
+    def directory_enumerator(self, base_url: str) -> DirectoryEnumerator:
+        """Create the enumerator for base_url from the scraper's enumeration options."""
+        return DirectoryEnumerator(
+            base_url,
+            wordlist=self.wordlist,
+            extensions=self.enum_extensions,
+            match_status=self.match_status,
+            filter_status=self.filter_status,
+            filter_size=self.filter_size,
+            filter_words=self.filter_words,
+            calibrate=self.calibrate
+        )
+
+    def _report_enumeration(self, results: Dict[str, ProbeResult]) -> None:
+        """Print the outcome of a directory enumeration."""
+        if results and self.results:
+            print(f"{GREEN}Discovered {len(results)} directories/files, listed in {self.results.path}{RESET}")
+        elif results:
+            print(f"{GREEN}Discovered {len(results)} directories/files:{RESET}")
+            for url, result in results.items():
+                print(f"  - {url} [{result!r}]")
         else:
             print(f"{YELLOW}No additional directories discovered.{RESET}")
-            
-        return discovered_urls
 
-    def _test_url_exists(self, url: str) -> Optional[str]:
-        """Test if a URL exists by sending a HEAD request."""
+    def _probe(self, url: str) -> Optional[ProbeResult]:
+        """GET url without following redirects and measure the start of its body."""
         try:
-            resp = self.session.head(url, timeout=5, allow_redirects=True)
-            if resp.status_code == 200:
-                logger.info(f"Found directory/file: {url}")
-                return url
-        except Exception:
-            pass
+            with self.request("GET", url, timeout=5, allow_redirects=False, stream=True) as resp:
+                body = b""
+                for chunk in resp.iter_content(64 * 1024):
+                    body += chunk
+                    if len(body) >= MAX_PROBE_BODY:
+                        break
+                return ProbeResult.from_response(resp.status_code, resp.headers, body)
+        except RequestException as e:
+            logger.debug(f"Probe of {url} failed: {e}")
         return None
+
+    def _test_url_exists(self, enumerator: DirectoryEnumerator, url: str) -> Optional[str]:
+        """Probe a candidate URL and return it if the enumerator accepts the response."""
+        enumerator.calibrate_with(url, self._probe)
+        with self.metrics.timer("webworm_probe_seconds"):
+            result = self._probe(url)
+        found = enumerator.accept(url, result)
+        self.metrics.inc("webworm_probes_total", result="found" if found else "miss")
+        if found:
+            self.record("probe", url, status=result.status, size=result.size, parent=enumerator.base_url)
+        return url if found else None
@@ -0,0 +1,234 @@
+import base64
+import hashlib
+import math
+import os
+import posixpath
+import sqlite3
+import threading
+from typing import Any, List, Optional, Set
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Return a canonical form of url used for deduplication.
+
+    The scheme and host are lowercased, default ports, fragments and trailing
+    slashes are dropped, dot segments are resolved and query parameters are
+    sorted, so ``/a``, ``/a/``, ``/a#frag`` and ``/a?y=2&x=1`` vs ``/a?x=1&y=2``
+    all share one key.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+
+    netloc = (parts.hostname or "").lower()
+    if parts.username or parts.password:
+        netloc = f"{parts.netloc.rsplit('@', 1)[0]}@{netloc}"
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+
+    path = parts.path or "/"
+    if "." in path or "//" in path:
+        path = posixpath.normpath(path)
+        if path.startswith("//"):
+            path = "/" + path.lstrip("/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = "&".join(sorted(param for param in parts.query.split("&") if param))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class SeenSet:
+    """Thread-safe set of normalized URLs with an atomic check-and-add."""
+
+    def __init__(self):
+        self._keys: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _key(self, url: str):
+        return normalize_url(url)
+
+    def add(self, url: str) -> bool:
+        """Add url and return True if it had not been seen before."""
+        key = self._key(url)
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            return True
+
+    def __contains__(self, url: str) -> bool:
+        return self._key(url) in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get_state(self) -> Any:
+        """Return a JSON-serializable snapshot of the set."""
+        with self._lock:
+            return list(self._keys)
+
+    def load_state(self, state: Any) -> None:
+        """Restore the contents saved by get_state."""
+        with self._lock:
+            self._keys = set(state)
+
+    def close(self) -> None:
+        """Release any resources held by the set."""
+
+
+class FingerprintSeenSet(SeenSet):
+    """SeenSet that keeps a 64-bit hash of each normalized URL instead of the URL itself.
+
+    Collisions are possible but negligible below billions of URLs.
+    """
+
+    def _key(self, url: str) -> int:
+        digest = hashlib.blake2b(normalize_url(url).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+
+class BloomSeenSet(SeenSet):
+    """SeenSet backed by a fixed-size Bloom filter.
+
+    Memory is sized up front from ``capacity`` and ``error_rate``; a false
+    positive makes the crawler skip a URL it has never seen.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        super().__init__()
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("Bloom filter needs capacity >= 1 and 0 < error_rate < 1")
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _key(self, url: str) -> List[int]:
+        # Double hashing: derive all bit positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(normalize_url(url).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, url: str) -> bool:
+        positions = self._key(url)
+        with self._lock:
+            if all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in positions):
+                return False
+            for pos in positions:
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+            self._count += 1
+            return True
+
+    def __contains__(self, url: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._key(url))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get_state(self) -> Any:
+        with self._lock:
+            return {
+                "num_bits": self.num_bits,
+                "num_hashes": self.num_hashes,
+                "count": self._count,
+                "bits": base64.b64encode(bytes(self._bits)).decode("ascii"),
+            }
+
+    def load_state(self, state: Any) -> None:
+        with self._lock:
+            self.num_bits = state["num_bits"]
+            self.num_hashes = state["num_hashes"]
+            self._count = state["count"]
+            self._bits = bytearray(base64.b64decode(state["bits"]))
+
+
+class SqliteSeenSet(SeenSet):
+    """SeenSet stored in an on-disk sqlite table, so memory use stays flat."""
+
+    COMMIT_EVERY = 1000
+
+    def __init__(self, db_path: str, table: str = "seen", reset: bool = True):
+        super().__init__()
+        self.db_path = db_path
+        self.table = table
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (key TEXT PRIMARY KEY) WITHOUT ROWID')
+        if reset:
+            self._conn.execute(f'DELETE FROM "{table}"')
+        self._conn.commit()
+        self._count = self._conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        self._pending = 0
+
+    def add(self, url: str) -> bool:
+        key = self._key(url)
+        with self._lock:
+            cursor = self._conn.execute(f'INSERT OR IGNORE INTO "{self.table}" (key) VALUES (?)', (key,))
+            if cursor.rowcount == 0:
+                return False
+            self._count += 1
+            self._pending += 1
+            if self._pending >= self.COMMIT_EVERY:
+                self._conn.commit()
+                self._pending = 0
+            return True
+
+    def __contains__(self, url: str) -> bool:
+        key = self._key(url)
+        with self._lock:
+            row = self._conn.execute(f'SELECT 1 FROM "{self.table}" WHERE key = ?', (key,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get_state(self) -> Any:
+        # The table itself is the state; make sure it is on disk
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+            return {"db_path": self.db_path, "table": self.table}
+
+    def load_state(self, state: Any) -> None:
+        # Rows are already in the table when it was opened with reset=False
+        pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+SEEN_STORES = ("memory", "fingerprint", "bloom", "sqlite")
+
+
+def create_seen_set(
+    store: str = "memory",
+    name: str = "seen",
+    db_path: Optional[str] = None,
+    capacity: int = 1_000_000,
+    error_rate: float = 0.001,
+    reset: bool = True,
+) -> SeenSet:
+    """Create a SeenSet for one of the SEEN_STORES backends."""
+    if store == "memory":
+        return SeenSet()
+    if store == "fingerprint":
+        return FingerprintSeenSet()
+    if store == "bloom":
+        return BloomSeenSet(capacity, error_rate)
+    if store == "sqlite":
+        if not db_path:
+            raise ValueError("The sqlite seen store needs a database path")
+        return SqliteSeenSet(db_path, table=name, reset=reset)
+    raise ValueError(f"Unknown seen store: {store}")
@@ -0,0 +1,88 @@
+import logging
+import xml.etree.ElementTree as ET
+import zlib
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger("Sitemap")
+
+GZIP_MAGIC = b"\x1f\x8b"
+MAX_SITEMAPS = 1000  # sitemap files fetched per crawl, index entries included
+SITEMAP_CHUNK = 64 * 1024
+SITEMAP_NAMESPACE = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+# ("sitemap", url) for an entry of a sitemap index, ("url", url) for a page
+SitemapEntry = Tuple[str, str]
+
+
+def is_sitemap_url(url: str) -> bool:
+    """Guess from its name whether a URL found by enumeration is a sitemap."""
+    name = url.split("?", 1)[0].rstrip("/").rpartition("/")[2].lower()
+    return name.startswith("sitemap") and name.endswith((".xml", ".xml.gz"))
+
+
+class SitemapParser:
+    """Incremental parser for sitemaps and sitemap indexes, gzip'd or not.
+
+    Bytes are fed as they arrive and the entries completed so far are
+    returned, so a large sitemap is never held in memory: each finished
+    ``<url>``/``<sitemap>`` element is dropped from the tree right away.
+    Only the ``<loc>`` directly inside an entry counts; the ones of extensions
+    such as image or video sitemaps, in their own namespaces, are ignored.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._decompressor: Optional["zlib._Decompress"] = None
+        self._head = b""  # the first bytes, until there are enough to sniff gzip
+        self._started = False
+        self._root: Optional[ET.Element] = None
+        self._depth = 0
+        self._loc: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> List[SitemapEntry]:
+        if not self._started:
+            self._head += chunk
+            if len(self._head) < len(GZIP_MAGIC):
+                return []
+            chunk = self._start()
+        if self._decompressor is not None:
+            chunk = self._decompressor.decompress(chunk)
+        self._parser.feed(chunk)
+        return self._read_entries()
+
+    def close(self) -> List[SitemapEntry]:
+        if not self._started:
+            self._parser.feed(self._start())
+        if self._decompressor is not None:
+            self._parser.feed(self._decompressor.flush())
+        self._parser.close()
+        return self._read_entries()
+
+    def _start(self) -> bytes:
+        """Sniff gzip from the buffered first bytes and return them."""
+        self._started = True
+        if self._head.startswith(GZIP_MAGIC):
+            # A .xml.gz file, as opposed to a gzip Content-Encoding the HTTP client already undid
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return self._head
+
+    def _read_entries(self) -> List[SitemapEntry]:
+        entries = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                self._depth += 1
+                if self._root is None:
+                    self._root = element
+                continue
+            # Depth 1 is the <urlset>/<sitemapindex>, 2 an entry, 3 the entry's children
+            if self._depth == 3 and element.tag in (SITEMAP_NAMESPACE + "loc", "loc"):
+                self._loc = (element.text or "").strip()
+            elif self._depth == 2:
+                tag = element.tag[len(SITEMAP_NAMESPACE):] if element.tag.startswith(SITEMAP_NAMESPACE) \
+                    else element.tag
+                if self._loc and tag in ("url", "sitemap"):
+                    entries.append((tag, self._loc))
+                self._loc = None
+                self._root.clear()
+            self._depth -= 1
+        return entries
@@ -1,11 +1,156 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
 import webtech
+# Target and dict_from_caseinsensitivedict are not part of webtech's public API;
+# requirements.txt pins the webtech release they match
+from webtech.target import Target
+from webtech.utils import ConnectionException, WrongContentTypeException, dict_from_caseinsensitivedict
 
+logger = logging.getLogger("TechDetector")
 
-def detect_tech(url):
-    wt = webtech.WebTech(options={"random_user_agent": True})
-    try:
-        report = wt.start_from_url(url)
+
+def origin_of(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class TechDetector:
+    """Technology detection for many sites with one webtech instance.
+
+    The signature database is loaded once and shared by every lookup, which
+    may run on several threads. Reports are kept per origin for ``ttl``
+    seconds and optionally persisted to ``cache_file``, so an origin is
+    fingerprinted once. Pages the crawler already fetched can be analyzed
+    with ``analyze`` instead of being requested again.
+    """
+
+    def __init__(self, ttl: float = 24 * 3600, cache_file: Optional[str] = None, timeout: int = 10):
+        self.webtech = webtech.WebTech(options={"random_user_agent": True, "timeout": timeout})
+        self.ttl = ttl
+        self.cache_file = cache_file
+        self._reports: Dict[str, Tuple[float, str]] = {}  # origin -> (detected_at, report)
+        self.failures: Dict[str, str] = {}  # url -> why detection failed
+        self._pending = set()  # origins a crawl thread is analyzing
+        self._lock = threading.Lock()
+        if cache_file:
+            self._load()
+
+    def cached(self, url: str) -> Optional[str]:
+        """Return the unexpired report for url's origin, if any."""
+        with self._lock:
+            entry = self._reports.get(origin_of(url))
+        if entry and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def claim(self, url: str) -> bool:
+        """Tell whether url's origin still needs a report, reserving it for the caller's analyze()."""
+        origin = origin_of(url)
+        if self.cached(url) is not None:
+            return False
+        with self._lock:
+            if origin in self._pending:
+                return False
+            self._pending.add(origin)
+            return True
+
+    def analyze(self, url: str, headers: Any, html: str, cookies: Optional[Dict[str, str]] = None) -> str:
+        """Detect technologies from a response that was already fetched."""
+        target = Target()
+        target.data["url"] = url
+        target.data["html"] = html
+        target.data["headers"] = dict_from_caseinsensitivedict(headers)
+        target.data["cookies"] = cookies or {}
+        try:
+            target.parse_html_page()
+            report = self.webtech.perform(target)
+            self._store(url, report)
+            return report
+        finally:
+            with self._lock:
+                self._pending.discard(origin_of(url))
+
+    def detect(self, url: str) -> Optional[str]:
+        """Return the report for url's origin, fetching url if it is not cached.
+
+        Returns None if detection fails; the reason is kept in ``failures``.
+        """
+        report = self.cached(url)
+        if report is not None:
+            return report
+        try:
+            report = self.webtech.start_from_url(url)
+        except ConnectionException as e:
+            return self._fail(url, f"Connection error: {e}")
+        except WrongContentTypeException as e:
+            return self._fail(url, str(e))
+        except Exception as e:
+            # webtech raises plain ValueErrors and the like on odd URLs and pages
+            return self._fail(url, f"{type(e).__name__}: {e}")
+        self._store(url, report)
+        with self._lock:
+            self.failures.pop(url, None)
         return report
-    except webtech.utils.ConnectionException:
-        print("Connection error")
+
+    def detect_many(self, urls: Iterable[str], max_workers: int = 10) -> Dict[str, Optional[str]]:
+        """Detect the technologies of several sites concurrently, one request per uncached origin.
+
+        A site whose detection fails maps to None and does not stop the others.
+        """
+        by_origin: Dict[str, str] = {}
+        for url in urls:
+            by_origin.setdefault(origin_of(url), url)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            reports = executor.map(self.detect, by_origin.values())
+            return dict(zip(by_origin.values(), reports))
+
+    def _fail(self, url: str, reason: str) -> None:
+        logger.error(f"Cannot detect technologies on {url}: {reason}")
+        with self._lock:
+            self.failures[url] = reason
         return None
+
+    def _store(self, url: str, report: str) -> None:
+        with self._lock:
+            self._reports[origin_of(url)] = (time.time(), report)
+
+    def _load(self) -> None:
+        """Load unexpired reports saved by a previous run."""
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable technology cache {self.cache_file}: {e}")
+            return
+        now = time.time()
+        for origin, data in saved.items():
+            if now - data["detected_at"] < self.ttl:
+                self._reports[origin] = (data["detected_at"], data["report"])
+
+    def save(self) -> None:
+        """Persist the reports to cache_file."""
+        if not self.cache_file:
+            return
+        with self._lock:
+            saved = {
+                origin: {"detected_at": detected_at, "report": report}
+                for origin, (detected_at, report) in self._reports.items()
+            }
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+        tmp_path = f"{self.cache_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(saved, f)
+        os.replace(tmp_path, self.cache_file)
+
+
+def detect_tech(url):
+    return TechDetector().detect(url)
@@ -0,0 +1,124 @@
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, Pattern
+from urllib.parse import urljoin, urlsplit
+
+# Characters urlsplit removes from anywhere in a URL
+_URL_UNSAFE = str.maketrans("", "", "\t\r\n")
+
+
+def compile_patterns(patterns: Optional[List[str]]) -> Optional[Pattern[str]]:
+    """Combine regexes into one alternation, so a URL is searched once for all of them."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+class UrlFilter:
+    """Rules deciding which links of a page are crawled and which are recorded as files.
+
+    Everything that does not depend on the link is prepared once: the start
+    URL's host, the extensions as a set of lowercase suffixes, the include
+    and exclude regexes compiled into one pattern each, and the scope path
+    prefixes as a tuple for a single ``startswith`` call. Each link is then
+    resolved and split once.
+
+    Pages are crawled when they are on the start URL's host, under one of the
+    ``scope`` prefixes (if any), match an ``include`` regex (if any) and no
+    ``exclude`` regex. Files may be on any host and path; only the regexes
+    and ``extensions`` apply to them.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        extensions: Optional[List[str]] = None,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        scope: Optional[List[str]] = None
+    ):
+        self.netloc = urlsplit(base_url).netloc
+        self.extensions = frozenset("." + ext.lower().lstrip(".") for ext in extensions or [])
+        self.include = compile_patterns(include)
+        self.exclude = compile_patterns(exclude)
+        self.scope = tuple("/" + prefix.lstrip("/") for prefix in scope or [])
+
+    @staticmethod
+    def resolver(page_url: str) -> Callable[[str], str]:
+        """Return a function resolving the raw href/src values of a page, without their fragment.
+
+        Tabs and newlines are removed as urljoin does. Absolute links and
+        plain relative paths (no scheme, empty, ``.`` or ``..`` segments) are
+        joined by concatenation with the page's origin or directory; anything
+        else goes through urljoin.
+        """
+        page_url = page_url.partition("#")[0]
+        parts = urlsplit(page_url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        directory = origin + parts.path.rpartition("/")[0] + "/"
+
+        def resolve(link: str) -> str:
+            link = link.translate(_URL_UNSAFE).strip().partition("#")[0]
+            if link.startswith(("http://", "https://")):
+                return link
+            segments = link.partition("?")[0].split("/")
+            if (not link or link.startswith(("//", "?")) or ":" in segments[0]
+                    or "." in segments or ".." in segments or "" in segments[1:-1]):
+                return urljoin(page_url, link)
+            return origin + link if link.startswith("/") else directory + link
+
+        return resolve
+
+    def _matches(self, url: str) -> bool:
+        if self.include is not None and not self.include.search(url):
+            return False
+        return self.exclude is None or not self.exclude.search(url)
+
+    def _in_scope(self, url: str) -> bool:
+        # Cheaper than urlsplit for the absolute http(s) URLs the resolver returns
+        parts = url.split("/", 3)
+        if len(parts) < 3 or parts[2] != self.netloc or parts[0] not in ("http:", "https:"):
+            return False
+        return not self.scope or ("/" + parts[3] if len(parts) > 3 else "/").startswith(self.scope)
+
+    def allows(self, url: str) -> bool:
+        """Tell whether an absolute URL may be crawled."""
+        return self._in_scope(url.partition("#")[0]) and self._matches(url)
+
+    def is_file(self, url: str) -> bool:
+        """Tell whether an absolute URL names a file of one of the wanted extensions."""
+        path = url.partition("?")[0]
+        if path.count("/") < 3:
+            return False  # no path after the host
+        name = path.rpartition("/")[2]
+        dot = name.find(".")
+        if dot < 0:
+            return False
+        if not self.extensions:
+            return True
+        # Every dotted suffix of the name, so 'tar.gz' matches 'a.tar.gz'
+        name = name.lower()
+        while dot >= 0:
+            if name[dot:] in self.extensions:
+                return True
+            dot = name.find(".", dot + 1)
+        return False
+
+    def files(self, page_url: str, links: Iterable[str]) -> Iterator[str]:
+        """Yield the resolved file URLs among the raw links of a page."""
+        resolve = self.resolver(page_url)
+        for link in links:
+            url = resolve(link)
+            # Skips mailto:, javascript: and data: links
+            if url.startswith(("http://", "https://")) and self.is_file(url) and self._matches(url):
+                yield url
+
+    def pages(self, page_url: str, hrefs: Iterable[str]) -> Iterator[str]:
+        """Yield the resolved URLs of a page's anchors that may be crawled, each once."""
+        resolve = self.resolver(page_url)
+        seen = set()
+        for href in hrefs:
+            url = resolve(href)
+            if url not in seen:
+                seen.add(url)
+                if self._in_scope(url) and self._matches(url):
+                    yield url
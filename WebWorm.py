@@ -1,6 +1,21 @@
 import argparse
-from Scraper import WebScraper
-from TechDetector import detect_tech
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List
+from Scraper import WebScraper, build_session, print_time_split
+from AsyncScraper import AsyncWebScraper
+from TechDetector import TechDetector
+from SeenSet import SEEN_STORES
+from LinkExtractor import PARSERS
+from Politeness import PolitenessScheduler
+from RobotsCache import RobotsCache
+from HttpCache import HttpCache
+from Enumerator import DEFAULT_MATCH_STATUS, parse_ranges
+from Metrics import METRICS_FORMATS, Metrics, MetricsReporter, Profiler
+from ResultsSink import RESULT_FORMATS, create_results_sink
 import logging
 
 RED = "\033[91m"
@@ -42,6 +57,156 @@ def format_size(size_bytes: int) -> str:
         return f"{size_bytes/1024**3:.1f} GB"
 
 
+def parse_size(size: str) -> int:
+    """Parse a human-readable size such as '10MB' or '1GB' into bytes."""
+    size = size.strip().upper()
+    if size.endswith("KB"):
+        return int(float(size[:-2]) * 1024)
+    elif size.endswith("MB"):
+        return int(float(size[:-2]) * 1024 * 1024)
+    elif size.endswith("GB"):
+        return int(float(size[:-2]) * 1024 * 1024 * 1024)
+    elif size.endswith("B"):
+        return int(size[:-1])
+    return int(size)
+
+
+def load_urls(args) -> List[str]:
+    """Return the URLs of --urls-file, or the single URL argument."""
+    if not args.urls_file:
+        return [args.url]
+    try:
+        with open(args.urls_file, 'r') as f:
+            urls = [line.strip() for line in f if line.strip() and line.strip().startswith('http')]
+    except Exception as e:
+        print(f"{RED}Error reading URLs file: {e}{RESET}")
+        exit(1)
+    if not urls:
+        print(f"{RED}No valid URLs found in the file.{RESET}")
+        exit(1)
+    print(f"{GREEN}Loaded {len(urls)} URLs to scrape{RESET}")
+    return urls
+
+
+def detect_technologies(urls: List[str], detector: TechDetector, workers: int) -> None:
+    """Print the technologies of each site, detecting up to workers sites at once."""
+    logger.info(f"Detecting technologies on {len(urls)} URLs")
+    reports = detector.detect_many(urls, max_workers=workers)
+    for url, report in reports.items():
+        if report is None:
+            print(f"{RED}Could not detect technologies on {url}: {detector.failures.get(url, 'unknown error')}{RESET}")
+        else:
+            print(f"{BLUE}{report}{RESET}")
+    print(f"{GREEN}Detected technologies on {sum(r is not None for r in reports.values())} "
+          f"of {len(reports)} sites{RESET}")
+
+
+def crawl_sites_parallel(urls: List[str], build_scraper: Callable[..., WebScraper], args) -> None:
+    """Crawl several sites at once with a shared session, scheduler, HTTP cache and request budget.
+
+    Up to ``args.parallel_sites`` sites run concurrently, each with its own
+    ``args.threads`` workers, while ``args.max_concurrency`` caps the requests
+    in flight across all of them. Files are downloaded during the crawl.
+    """
+    session = build_session(
+        args.user_agent,
+        args.pool_size or max(args.threads, 10),
+        args.pool_block,
+        args.retries,
+        args.backoff,
+        pool_connections=max(10, args.parallel_sites)
+    )
+    scheduler = PolitenessScheduler(args.rate, args.host_concurrency or args.threads)
+
+    def apply_robots_delay(origin, robots_parser):
+        delay = robots_cache.crawl_delay(robots_parser)
+        if delay:
+            scheduler.set_crawl_delay(origin, delay)
+
+    robots_cache = RobotsCache(
+        session, args.user_agent, ttl=args.robots_ttl, cache_file=args.robots_cache,
+        on_rules=apply_robots_delay
+    )
+    shared = {
+        "session": session,
+        "scheduler": scheduler,
+        "request_limit": threading.BoundedSemaphore(args.max_concurrency) if args.max_concurrency else None,
+        "robots_cache": robots_cache,
+        "http_cache": HttpCache(args.cache_dir, parse_size(args.cache_size)) if args.cache_dir else None,
+        "interrupt": threading.Event(),
+        "metrics": Metrics(),
+        "profiler": Profiler(args.profile) if args.profile else None,
+    }
+    reporter = None
+    if args.metrics_file:
+        reporter = MetricsReporter(shared["metrics"], args.metrics_file, args.metrics_interval, args.metrics_format)
+        reporter.start()
+    if shared["profiler"]:
+        shared["profiler"].start_thread()
+    print(f"{GREEN}Crawling {len(urls)} sites, {args.parallel_sites} at a time{RESET}")
+    logger.info(f"Parallel crawl of {len(urls)} sites with {args.parallel_sites} workers")
+
+    scrapers: List[WebScraper] = []
+
+    def run_site(url: str) -> Dict[str, Any]:
+        start = time.monotonic()
+        result = {"url": url, "pages": 0, "files": 0, "downloaded": 0, "error": None}
+        try:
+            scraper = build_scraper(url, **shared)
+            scrapers.append(scraper)
+            scraper.start_scraping()
+            result.update(scraper.summary())
+        except Exception as e:
+            print(f"{RED}Error processing {url}: {e}{RESET}")
+            logger.error(f"Error processing {url}: {e}")
+            result["error"] = str(e)
+        result["elapsed"] = time.monotonic() - start
+        return result
+
+    results = []
+    executor = ThreadPoolExecutor(
+        max_workers=args.parallel_sites, thread_name_prefix="site",
+        initializer=shared["profiler"].start_thread if shared["profiler"] else None
+    )
+    futures = []
+    try:
+        for url in urls:
+            futures.append(executor.submit(run_site, url))
+        for future in as_completed(futures):
+            results.append(future.result())
+    except KeyboardInterrupt:
+        print(f"{RED}Crawling interrupted. Stopping all sites.{RESET}")
+        # Sites that have not reached crawl() yet see the interrupt when they do
+        shared["interrupt"].set()
+        for future in futures:
+            future.cancel()
+        for scraper in list(scrapers):
+            scraper._stop_event.set()
+    finally:
+        executor.shutdown(wait=True)
+        if shared["http_cache"]:
+            shared["http_cache"].close()
+        if reporter:
+            reporter.stop()
+            print(f"{GREEN}Metrics written to {args.metrics_file}{RESET}")
+        if shared["profiler"]:
+            shared["profiler"].dump()
+            print(f"{GREEN}Profile written to {args.profile} (view with python -m pstats){RESET}")
+
+    print(f"\n{GREEN}Summary for {len(results)} of {len(urls)} sites:{RESET}")
+    for result in sorted(results, key=lambda r: r["url"]):
+        status = f"{RED}error: {result['error']}{RESET}" if result["error"] else f"{GREEN}ok{RESET}"
+        print(f"  - {result['url']}: {result['pages']} pages, {result['files']} files, "
+              f"{result['downloaded']} downloaded in {result['elapsed']:.1f}s [{status}]")
+    stats = session.get_adapter("http://").stats()
+    print(f"{GREEN}Total: {sum(r['pages'] for r in results)} pages, "
+          f"{sum(r['files'] for r in results)} files, {sum(r['downloaded'] for r in results)} downloaded; "
+          f"{stats['connections']} connections for {stats['requests']} requests "
+          f"({stats['reuse_rate']:.1%} reused){RESET}")
+    print_time_split(shared["metrics"])
+    logger.info(f"Parallel crawl finished: {results}")
+
+
 def main():
     print_banner()
 
@@ -72,7 +237,23 @@ def main():
         "-t",
         "--tech",
         action="store_true",
-        help=f"{YELLOW}Detect technologies used on the website.{RESET}",
+        help=f"{YELLOW}Detect technologies used on the website (or on each site of --urls-file, --threads at a time) and exit.{RESET}",
+    )
+    parser.add_argument(
+        "--tech-crawl",
+        action="store_true",
+        help=f"{YELLOW}Detect technologies from the first page crawled on each site, without extra requests.{RESET}"
+    )
+    parser.add_argument(
+        "--tech-cache",
+        type=str,
+        help=f"{YELLOW}JSON file where technology reports are kept per site between runs.{RESET}"
+    )
+    parser.add_argument(
+        "--tech-ttl",
+        type=float,
+        default=24 * 3600,
+        help=f"{YELLOW}Seconds a technology report stays valid (default: 86400).{RESET}"
     )
     
     # New arguments
@@ -98,6 +279,17 @@ def main():
         type=str,
         help=f"{YELLOW}Maximum file size to download (e.g. '10MB', '1GB').{RESET}"
     )
+    parser.add_argument(
+        "--max-page-size",
+        type=str,
+        default="10MB",
+        help=f"{YELLOW}Stop reading crawled pages larger than this; they are not parsed (default: 10MB).{RESET}"
+    )
+    parser.add_argument(
+        "--head-check",
+        action="store_true",
+        help=f"{YELLOW}Check the files to download with HEAD requests first, dropping dead links, HTML pages and files over --max-file-size. With --pipeline each file is checked as it is queued.{RESET}"
+    )
     parser.add_argument(
         "--output-dir",
         type=str,
@@ -133,6 +325,279 @@ def main():
         action="store_true",
         help=f"{YELLOW}Attempt to discover common directories.{RESET}"
     )
+    parser.add_argument(
+        "--wordlist",
+        type=str,
+        help=f"{YELLOW}Wordlist file of paths to probe, streamed from disk; implies --enumerate-dirs.{RESET}"
+    )
+    parser.add_argument(
+        "--enum-extensions",
+        type=str,
+        help=f'{YELLOW}Comma-separated extensions to try on each wordlist entry (e.g., "php,bak,zip").{RESET}'
+    )
+    parser.add_argument(
+        "--match-status",
+        type=str,
+        default=DEFAULT_MATCH_STATUS,
+        help=f"{YELLOW}Statuses that count as found during enumeration (default: {DEFAULT_MATCH_STATUS}).{RESET}"
+    )
+    parser.add_argument(
+        "--filter-status",
+        type=str,
+        help=f'{YELLOW}Enumeration statuses to ignore (e.g., "403,500-599").{RESET}'
+    )
+    parser.add_argument(
+        "--filter-size",
+        type=str,
+        help=f'{YELLOW}Enumeration response sizes in bytes to ignore (e.g., "0,1234-1300").{RESET}'
+    )
+    parser.add_argument(
+        "--filter-words",
+        type=str,
+        help=f"{YELLOW}Enumeration response word counts to ignore.{RESET}"
+    )
+    parser.add_argument(
+        "--enum-depth",
+        type=int,
+        default=0,
+        help=f"{YELLOW}Also enumerate directories found by crawling or probing, up to this many levels below the start URL (default: 0).{RESET}"
+    )
+    parser.add_argument(
+        "--no-calibrate",
+        action="store_true",
+        help=f"{YELLOW}Do not probe random paths to detect wildcard/soft-404 responses before enumerating.{RESET}"
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=["threads", "async"],
+        default="threads",
+        help=f"{YELLOW}Crawl engine: 'threads' (requests + thread pool) or 'async' (asyncio + aiohttp). Default is threads.{RESET}"
+    )
+    parser.add_argument(
+        "--per-host-limit",
+        type=int,
+        default=10,
+        help=f"{YELLOW}Maximum concurrent connections per host with --engine async (default: 10).{RESET}"
+    )
+
+    parser.add_argument(
+        "--seen-store",
+        choices=SEEN_STORES,
+        default="memory",
+        help=f"{YELLOW}How visited pages and files are remembered: 'memory' (full URLs), 'fingerprint' (64-bit hashes), 'bloom' (Bloom filter) or 'sqlite' (on-disk index in the output directory). Default is memory.{RESET}"
+    )
+    parser.add_argument(
+        "--bloom-capacity",
+        type=int,
+        default=1_000_000,
+        help=f"{YELLOW}Expected number of URLs for --seen-store bloom (default: 1000000).{RESET}"
+    )
+    parser.add_argument(
+        "--bloom-error-rate",
+        type=float,
+        default=0.001,
+        help=f"{YELLOW}False-positive rate for --seen-store bloom (default: 0.001).{RESET}"
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help=f"{YELLOW}Periodically save the crawl state to <output-dir>/<host>.checkpoint.json.{RESET}"
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=60,
+        help=f"{YELLOW}Seconds between crawl state checkpoints (default: 60).{RESET}"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=f"{YELLOW}Resume an interrupted crawl from its checkpoint (implies --checkpoint).{RESET}"
+    )
+
+    parser.add_argument(
+        "--parser",
+        choices=PARSERS,
+        default="bs4",
+        help=f"{YELLOW}HTML link extraction: 'bs4' (BeautifulSoup tree), 'fast' (single streaming pass, no tree) or 'selectolax' (if installed). Default is bs4.{RESET}"
+    )
+
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help=f"{YELLOW}Number of processes used to parse pages, so parsing scales across CPU cores (default: 0, parse in the crawl threads).{RESET}"
+    )
+
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        help=f"{YELLOW}Keep-alive connections pooled per host (default: max(threads, 10)).{RESET}"
+    )
+    parser.add_argument(
+        "--pool-block",
+        action="store_true",
+        help=f"{YELLOW}Wait for a pooled connection instead of opening extra ones when the pool is full.{RESET}"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=3,
+        help=f"{YELLOW}Retries for connection errors and 429/5xx responses (default: 3).{RESET}"
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=0.5,
+        help=f"{YELLOW}Exponential backoff factor in seconds between retries (default: 0.5).{RESET}"
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help=f"{YELLOW}Directory for an HTTP cache of crawled pages; repeat crawls revalidate them with If-None-Match/If-Modified-Since.{RESET}"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=str,
+        default="1GB",
+        help=f"{YELLOW}Maximum size of the HTTP cache before least recently used pages are evicted (default: 1GB).{RESET}"
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"{YELLOW}Keep a manifest of downloaded files, skip unchanged ones and resume partial downloads.{RESET}"
+    )
+
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help=f"{YELLOW}Download files while crawling instead of prompting after the crawl (non-interactive).{RESET}"
+    )
+    parser.add_argument(
+        "--download-threads",
+        type=int,
+        help=f"{YELLOW}Number of download workers (default: same as --threads).{RESET}"
+    )
+
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help=f"{YELLOW}Maximum requests per second to each host (default: unlimited, or the robots.txt Crawl-delay).{RESET}"
+    )
+    parser.add_argument(
+        "--host-concurrency",
+        type=int,
+        help=f"{YELLOW}Maximum concurrent requests to each host; lowered automatically on 429/503 and latency spikes (default: same as --threads).{RESET}"
+    )
+
+    parser.add_argument(
+        "--parallel-sites",
+        type=int,
+        default=1,
+        help=f"{YELLOW}Number of sites from --urls-file to crawl at the same time, sharing one connection pool; implies --pipeline (default: 1).{RESET}"
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        help=f"{YELLOW}Global cap on requests in flight across all sites with --parallel-sites (default: unlimited).{RESET}"
+    )
+
+    parser.add_argument(
+        "--robots-ttl",
+        type=float,
+        default=24 * 3600,
+        help=f"{YELLOW}Seconds a fetched robots.txt stays valid (default: 86400).{RESET}"
+    )
+    parser.add_argument(
+        "--robots-cache",
+        type=str,
+        help=f"{YELLOW}JSON file where fetched robots.txt rules are kept between runs.{RESET}"
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        help=f"{YELLOW}Write crawl metrics (latency histograms, status codes, bytes, retries, queue depths) to this file periodically.{RESET}"
+    )
+    parser.add_argument(
+        "--metrics-format",
+        choices=METRICS_FORMATS,
+        default="json",
+        help=f"{YELLOW}Format of --metrics-file: json or prometheus text (default: json).{RESET}"
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=10,
+        help=f"{YELLOW}Seconds between metrics snapshots; 0 writes only at the end (default: 10).{RESET}"
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        help=f"{YELLOW}Profile the crawl with cProfile across all threads and write the stats to this file.{RESET}"
+    )
+
+    parser.add_argument(
+        "--include",
+        action="append",
+        metavar="REGEX",
+        help=f"{YELLOW}Only crawl pages and record files whose URL matches this regex (repeatable).{RESET}"
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        metavar="REGEX",
+        help=f"{YELLOW}Skip pages and files whose URL matches this regex (repeatable).{RESET}"
+    )
+    parser.add_argument(
+        "--scope",
+        action="append",
+        metavar="PATH",
+        help=f"{YELLOW}Only crawl pages under this path prefix, e.g. /docs/ (repeatable; files are recorded wherever they are).{RESET}"
+    )
+
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        help=f"{YELLOW}Stop crawling after this many pages; the most promising URLs are fetched first.{RESET}"
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=str,
+        help=f"{YELLOW}Stop crawling (and pipeline downloads) after receiving this much data (e.g., 500MB).{RESET}"
+    )
+    parser.add_argument(
+        "--max-time",
+        type=float,
+        help=f"{YELLOW}Stop crawling after this many seconds.{RESET}"
+    )
+
+    parser.add_argument(
+        "--sitemap",
+        action="store_true",
+        help=f"{YELLOW}Seed the crawl from the site's sitemaps (the robots.txt Sitemap lines, or /sitemap.xml), gzip'd or not.{RESET}"
+    )
+
+    parser.add_argument(
+        "--content-store",
+        action="store_true",
+        help=f"{YELLOW}Store each downloaded file once per content hash under <output-dir>/.blobs and mirror the URL paths with hard links, so same-named files never overwrite each other.{RESET}"
+    )
+
+    parser.add_argument(
+        "--results",
+        type=str,
+        help=f"{YELLOW}Stream pages, files, downloads and enumeration hits to this file while crawling, instead of listing them at the end.{RESET}"
+    )
+    parser.add_argument(
+        "--results-format",
+        choices=RESULT_FORMATS,
+        help=f"{YELLOW}Format of --results: jsonl or sqlite (default: sqlite for .db/.sqlite files, jsonl otherwise).{RESET}"
+    )
 
     args = parser.parse_args()
 
@@ -149,11 +614,17 @@ def main():
         logger.error(f"Invalid URL format: {args.url}")
         exit(1)
 
+    # One detector, and so one loaded signature database, for every site
+    tech_detector = None
+    if args.tech or args.tech_crawl:
+        tech_detector = TechDetector(ttl=args.tech_ttl, cache_file=args.tech_cache)
+
     # Technology detection
     if args.tech:
-        logger.info(f"Detecting technologies on {args.url}")
-        techs = detect_tech(args.url)
-        print(f"{BLUE}{techs}{RESET}")
+        try:
+            detect_technologies(load_urls(args), tech_detector, args.threads)
+        finally:
+            tech_detector.save()
         exit(0)
 
     # Depth validation
@@ -170,27 +641,63 @@ def main():
             for ext in args.extensions.split(",")
         ]
 
+    # Validate enumeration filters
+    for option in ("match_status", "filter_status", "filter_size", "filter_words"):
+        try:
+            parse_ranges(getattr(args, option))
+        except ValueError:
+            print(f"{RED}Error: Invalid --{option.replace('_', '-')} list. Use values like 200,301-399.{RESET}")
+            logger.error(f"Invalid {option}: {getattr(args, option)}")
+            exit(1)
+    for option in ("include", "exclude"):
+        for pattern in getattr(args, option) or []:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                print(f"{RED}Error: Invalid --{option} regex {pattern!r}: {e}{RESET}")
+                logger.error(f"Invalid {option} regex {pattern!r}: {e}")
+                exit(1)
+    if args.wordlist and not os.path.isfile(args.wordlist):
+        print(f"{RED}Error: Wordlist {args.wordlist} not found.{RESET}")
+        logger.error(f"Wordlist not found: {args.wordlist}")
+        exit(1)
+
     # Parse max file size
     max_file_size = None
     if args.max_file_size:
-        size = args.max_file_size.upper()
-        if size.endswith("KB"):
-            max_file_size = int(float(size[:-2]) * 1024)
-        elif size.endswith("MB"):
-            max_file_size = int(float(size[:-2]) * 1024 * 1024)
-        elif size.endswith("GB"):
-            max_file_size = int(float(size[:-2]) * 1024 * 1024 * 1024)
-        elif size.endswith("B"):
-            max_file_size = int(size[:-1])
-        else:
-            try:
-                max_file_size = int(size)
-            except ValueError:
-                print(f"{RED}Error: Invalid file size format. Use 10MB, 1GB, etc.{RESET}")
-                logger.error(f"Invalid file size format: {args.max_file_size}")
-                exit(1)
+        try:
+            max_file_size = parse_size(args.max_file_size)
+        except ValueError:
+            print(f"{RED}Error: Invalid file size format. Use 10MB, 1GB, etc.{RESET}")
+            logger.error(f"Invalid file size format: {args.max_file_size}")
+            exit(1)
         print(f"{GREEN}Max file size: {format_size(max_file_size)}{RESET}")
 
+    # Parse the crawl byte budget
+    max_bytes = None
+    if args.max_bytes:
+        try:
+            max_bytes = parse_size(args.max_bytes)
+        except ValueError:
+            print(f"{RED}Error: Invalid --max-bytes format. Use 500MB, 1GB, etc.{RESET}")
+            logger.error(f"Invalid --max-bytes format: {args.max_bytes}")
+            exit(1)
+
+    try:
+        max_page_size = parse_size(args.max_page_size)
+    except ValueError:
+        print(f"{RED}Error: Invalid --max-page-size format. Use 5MB, 10MB, etc.{RESET}")
+        logger.error(f"Invalid --max-page-size format: {args.max_page_size}")
+        exit(1)
+
+    # Parse HTTP cache size
+    try:
+        cache_size = parse_size(args.cache_size)
+    except ValueError:
+        print(f"{RED}Error: Invalid cache size format. Use 500MB, 1GB, etc.{RESET}")
+        logger.error(f"Invalid cache size format: {args.cache_size}")
+        exit(1)
+
     # Log configuration
     if extensions:
         print(f"{GREEN}Scraping for files with extensions: {', '.join(extensions)}{RESET}")
@@ -200,58 +707,119 @@ def main():
         logger.info("Scraping for all files")
     
     print(f"{GREEN}Maximum crawl depth: {args.depth}{RESET}")
-    print(f"{GREEN}Using {args.threads} threads{RESET}")
+    print(f"{GREEN}Using {args.threads} threads{RESET}" if args.engine == "threads"
+          else f"{GREEN}Using async engine with {args.threads} concurrent tasks ({args.per_host_limit} per host){RESET}")
     print(f"{GREEN}User-Agent: {args.user_agent}{RESET}")
     print(f"{GREEN}Respecting robots.txt: {not args.ignore_robots}{RESET}")
     
     logger.info(f"Starting scrape with depth={args.depth}, threads={args.threads}")
 
     # Handle multiple URLs
-    urls_to_scrape = []
-    if args.urls_file:
-        try:
-            with open(args.urls_file, 'r') as f:
-                urls_to_scrape = [line.strip() for line in f if line.strip() and line.strip().startswith('http')]
-            if not urls_to_scrape:
-                print(f"{RED}No valid URLs found in the file.{RESET}")
-                exit(1)
-            print(f"{GREEN}Loaded {len(urls_to_scrape)} URLs to scrape{RESET}")
-        except Exception as e:
-            print(f"{RED}Error reading URLs file: {e}{RESET}")
-            exit(1)
-    else:
-        urls_to_scrape = [args.url]
+    urls_to_scrape = load_urls(args)
 
-    # Process each URL with error handling
-    for url in urls_to_scrape:
-        try:
-            print(f"\n{GREEN}Processing URL: {url}{RESET}")
-            # Create and start the scraper for this URL
-            scraper = WebScraper(
-                url, 
-                args.depth, 
-                extensions,
-                max_threads=args.threads,
-                user_agent=args.user_agent,
-                respect_robots_txt=not args.ignore_robots,
-                max_file_size=max_file_size,
-                cookies=args.cookies,
-                cookies_file=args.cookies_file,
-                output_dir=args.output_dir
-            )
-            
-            # Set additional flags for new features
-            scraper.enumerate_dirs = args.enumerate_dirs if 'enumerate_dirs' in args else False
-            
-            scraper.start_scraping()
-            
-        except KeyboardInterrupt:
-            print(f"{RED}Crawling interrupted. Moving to next URL.{RESET}")
-            continue
-        except Exception as e:
-            print(f"{RED}Error processing {url}: {e}{RESET}")
-            logger.error(f"Error processing {url}: {e}")
-            continue
+    # One results file for every URL
+    results_sink = create_results_sink(args.results, args.results_format) if args.results else None
+    if results_sink:
+        print(f"{GREEN}Writing results to {args.results}{RESET}")
+
+    def build_scraper(url, **shared):
+        """Create the scraper for one URL from the command-line options."""
+        engine_kwargs = {}
+        scraper_class = WebScraper
+        if args.engine == "async":
+            scraper_class = AsyncWebScraper
+            engine_kwargs["per_host_limit"] = args.per_host_limit
+        scraper = scraper_class(
+            url, 
+            args.depth, 
+            extensions,
+            max_threads=args.threads,
+            user_agent=args.user_agent,
+            respect_robots_txt=not args.ignore_robots,
+            max_file_size=max_file_size,
+            cookies=args.cookies,
+            cookies_file=args.cookies_file,
+            output_dir=args.output_dir,
+            seen_store=args.seen_store,
+            bloom_capacity=args.bloom_capacity,
+            bloom_error_rate=args.bloom_error_rate,
+            checkpoint=args.checkpoint,
+            checkpoint_interval=args.checkpoint_interval,
+            resume=args.resume,
+            parser=args.parser,
+            parse_workers=args.parse_workers,
+            pool_size=args.pool_size,
+            pool_block=args.pool_block,
+            retries=args.retries,
+            backoff_factor=args.backoff,
+            rate_limit=args.rate,
+            host_concurrency=args.host_concurrency,
+            cache_dir=args.cache_dir,
+            cache_size=cache_size,
+            incremental=args.incremental,
+            pipeline=args.pipeline or args.parallel_sites > 1,
+            download_threads=args.download_threads,
+            robots_ttl=args.robots_ttl,
+            robots_cache_file=args.robots_cache,
+            wordlist=args.wordlist,
+            enum_extensions=args.enum_extensions.split(",") if args.enum_extensions else None,
+            match_status=args.match_status,
+            filter_status=args.filter_status,
+            filter_size=args.filter_size,
+            filter_words=args.filter_words,
+            calibrate=not args.no_calibrate,
+            enum_depth=args.enum_depth,
+            # With shared resources, metrics and the profile are written once for all sites
+            metrics_file=None if shared else args.metrics_file,
+            metrics_format=args.metrics_format,
+            metrics_interval=args.metrics_interval,
+            profile_file=None if shared else args.profile,
+            results_sink=results_sink,
+            content_store=args.content_store,
+            include=args.include,
+            exclude=args.exclude,
+            scope=args.scope,
+            max_pages=args.max_pages,
+            max_bytes=max_bytes,
+            max_time=args.max_time,
+            sitemaps=args.sitemap,
+            max_page_size=max_page_size,
+            head_check=args.head_check,
+            tech_detector=tech_detector,
+            **shared,
+            **engine_kwargs
+        )
+        
+        # Set additional flags for new features
+        scraper.enumerate_dirs = args.enumerate_dirs or bool(args.wordlist)
+        return scraper
+
+    try:
+        if args.parallel_sites > 1:
+            crawl_sites_parallel(urls_to_scrape, build_scraper, args)
+            return
+
+        # Process each URL with error handling
+        for url in urls_to_scrape:
+            try:
+                print(f"\n{GREEN}Processing URL: {url}{RESET}")
+                # Create and start the scraper for this URL
+                scraper = build_scraper(url)
+                scraper.start_scraping()
+
+            except KeyboardInterrupt:
+                print(f"{RED}Crawling interrupted. Moving to next URL.{RESET}")
+                continue
+            except Exception as e:
+                print(f"{RED}Error processing {url}: {e}{RESET}")
+                logger.error(f"Error processing {url}: {e}")
+                continue
+    finally:
+        if results_sink:
+            results_sink.close()
+            print(f"{GREEN}{results_sink.written} results written to {args.results}{RESET}")
+        if tech_detector:
+            tech_detector.save()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,295 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterator, List
+
+# Run from anywhere: the scraper modules live one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Scraper import WebScraper, RED, GREEN, YELLOW, RESET
+from LinkExtractor import PARSERS
+from SyntheticSite import SiteConfig, SyntheticSite, serve
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+ENGINES = ("threads", "async")
+SCENARIOS = ("crawl", "enumerate", "download")
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        if resource is None:
+            return 0
+        # Lifetime peak in KiB; the best that is available without /proc
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ResourceSampler:
+    """Record the peak RSS and thread count of this process while a scenario runs."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_threads = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self) -> None:
+        self.peak_rss = max(self.peak_rss, current_rss())
+        # Not counting the sampler itself
+        self.peak_threads = max(self.peak_threads, threading.active_count() - 1)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "ResourceSampler":
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+class SiteServer:
+    """The synthetic site served from a separate process, so it does not skew the measurements."""
+
+    def __init__(self, config: SiteConfig):
+        context = multiprocessing.get_context("spawn")
+        self._port = context.Value("i", 0)
+        self._requests = context.Value("q", 0)
+        self._bytes = context.Value("q", 0)
+        self._process = context.Process(
+            target=serve, args=(config, 0, self._port, self._requests, self._bytes), daemon=True
+        )
+
+    def __enter__(self) -> "SiteServer":
+        self._process.start()
+        deadline = time.monotonic() + 30
+        while not self._port.value:
+            if time.monotonic() > deadline or not self._process.is_alive():
+                raise RuntimeError("The synthetic site server did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._process.terminate()
+        self._process.join()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._port.value}/"
+
+    def counters(self) -> Dict[str, int]:
+        return {"requests": self._requests.value, "bytes": self._bytes.value}
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool) -> Iterator[None]:
+    """Silence the scraper's console output and progress bars."""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        yield
+
+
+def write_wordlist(path: str, site: SyntheticSite, words: int) -> None:
+    """Write a wordlist with the site's directories mixed into words that do not exist."""
+    hits = [directory.strip("/") for directory in site.directory_paths()]
+    with open(path, "w") as f:
+        for n in range(max(words, len(hits))):
+            f.write(f"{hits[n // 10]}\n" if n % 10 == 0 and n // 10 < len(hits) else f"missing{n}\n")
+
+
+def build_scraper(engine: str, url: str, args: argparse.Namespace, workdir: str, wordlist: str) -> WebScraper:
+    scraper_class = WebScraper
+    engine_kwargs: Dict[str, Any] = {}
+    if engine == "async":
+        from AsyncScraper import AsyncWebScraper
+        scraper_class = AsyncWebScraper
+        engine_kwargs["per_host_limit"] = args.threads
+    return scraper_class(
+        url,
+        args.depth,
+        max_threads=args.threads,
+        parser=args.parser,
+        parse_workers=args.parse_workers,
+        output_dir=workdir,
+        wordlist=wordlist,
+        **engine_kwargs
+    )
+
+
+def run_scenario(
+    scenario: str, engine: str, server: SiteServer, site: SyntheticSite, args: argparse.Namespace
+) -> Dict[str, Any]:
+    """Run one scenario against the server and return its measurements.
+
+    ``items`` counts pages for a crawl, probes for an enumeration and files
+    for a download.
+    """
+    workdir = tempfile.mkdtemp(prefix="webworm-bench-")
+    wordlist = os.path.join(workdir, "wordlist.txt")
+    write_wordlist(wordlist, site, args.words)
+    scraper = build_scraper(engine, server.url, args, workdir, wordlist)
+    before = server.counters()
+    try:
+        with quiet(not args.verbose), ResourceSampler() as sampler:
+            start = time.perf_counter()
+            if scenario == "crawl":
+                scraper.crawl([(server.url, 1)])
+                items = len(scraper.visited_urls)
+            elif scenario == "enumerate":
+                scraper.enumerate_directories(server.url)
+                with open(wordlist, "r") as f:
+                    items = sum(1 for _ in f)
+            else:
+                files = [server.url.rstrip("/") + path for path in site.all_file_paths()]
+                scraper.download_files(files, workdir)
+                items = len(scraper.completed_downloads)
+            elapsed = time.perf_counter() - start
+    finally:
+        scraper.visited_urls.close()
+        scraper.downloaded_files.close()
+        scraper.session.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    after = server.counters()
+    requests = after["requests"] - before["requests"]
+    sent = after["bytes"] - before["bytes"]
+    return {
+        "scenario": scenario,
+        "engine": engine,
+        "seconds": elapsed,
+        "items": items,
+        "items_per_sec": items / elapsed,
+        "requests": requests,
+        "requests_per_sec": requests / elapsed,
+        "bytes": sent,
+        "bytes_per_sec": sent / elapsed,
+        "peak_rss": sampler.peak_rss,
+        "peak_threads": sampler.peak_threads,
+    }
+
+
+def median_run(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Return the run with the median duration."""
+    runs = sorted(runs, key=lambda run: run["seconds"])
+    result = dict(runs[len(runs) // 2])
+    result["repeats"] = len(runs)
+    result["seconds_stdev"] = statistics.pstdev(run["seconds"] for run in runs)
+    return result
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"{'scenario':<10} {'engine':<8} {'seconds':>8} {'items':>7} {'items/s':>9} "
+          f"{'req/s':>9} {'MB/s':>8} {'peak RSS':>9} {'threads':>7}")
+    for result in results:
+        print(f"{result['scenario']:<10} {result['engine']:<8} {result['seconds']:>8.2f} "
+              f"{result['items']:>7} {result['items_per_sec']:>9.1f} {result['requests_per_sec']:>9.1f} "
+              f"{result['bytes_per_sec'] / 1024 ** 2:>8.2f} {result['peak_rss'] / 1024 ** 2:>7.1f}MB "
+              f"{result['peak_threads']:>7}")
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> bool:
+    """Print the throughput change against a saved run; return False on a regression."""
+    with open(baseline_path, "r") as f:
+        baseline = {(run["scenario"], run["engine"]): run for run in json.load(f)["results"]}
+    ok = True
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result["scenario"], result["engine"]))
+        if not previous:
+            continue
+        change = result["requests_per_sec"] / previous["requests_per_sec"] - 1
+        regressed = change < -tolerance
+        ok = ok and not regressed
+        color = RED if regressed else GREEN if change > tolerance else YELLOW
+        print(f"  {result['scenario']:<10} {result['engine']:<8} {color}{change:+.1%} req/s{RESET}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark WebWorm against a generated local site.")
+    parser.add_argument("--pages", type=int, default=500, help="Number of pages on the site.")
+    parser.add_argument("--fanout", type=int, default=10, help="Links to child pages per page.")
+    parser.add_argument("--depth", type=int, default=4, help="Depth of the page tree.")
+    parser.add_argument("--files-per-page", type=int, default=2, help="Files linked from each page.")
+    parser.add_argument("--file-size", type=int, default=64 * 1024, help="Size of each file in bytes.")
+    parser.add_argument("--page-size", type=int, default=4096, help="Approximate size of each page in bytes.")
+    parser.add_argument("--directories", type=int, default=20, help="Directories the pages are spread over.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many random seconds added on top.")
+    parser.add_argument("--words", type=int, default=2000, help="Wordlist entries for the enumerate scenario.")
+    parser.add_argument("--scenarios", type=str, default=",".join(SCENARIOS),
+                        help=f"Comma-separated scenarios to run ({', '.join(SCENARIOS)}).")
+    parser.add_argument("--engines", type=str, default="threads",
+                        help=f"Comma-separated engines to compare ({', '.join(ENGINES)}).")
+    parser.add_argument("--threads", type=int, default=10, help="Scraper threads / concurrent tasks.")
+    parser.add_argument("--parser", choices=PARSERS, default="bs4", help="HTML parser for the crawl.")
+    parser.add_argument("--parse-workers", type=int, default=0, help="Processes used to parse pages.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the median is reported.")
+    parser.add_argument("--save", type=str, help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", type=str, help="JSON file from --save to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Slowdown in req/s against --baseline reported as a regression (default: 0.1).")
+    parser.add_argument("--verbose", action="store_true", help="Show the scraper's own output.")
+    args = parser.parse_args()
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    for name, chosen, allowed in (("scenario", scenarios, SCENARIOS), ("engine", engines, ENGINES)):
+        unknown = set(chosen) - set(allowed)
+        if unknown:
+            parser.error(f"unknown {name}(s): {', '.join(sorted(unknown))}")
+
+    config = SiteConfig(
+        args.pages, args.fanout, args.depth, args.files_per_page, args.file_size,
+        args.page_size, args.directories, args.latency, args.jitter
+    )
+    site = SyntheticSite(config)
+    print(f"{GREEN}Synthetic site: {site.page_count} pages, {len(site.all_file_paths())} files "
+          f"of {args.file_size} bytes, {args.latency * 1000:.0f}ms latency{RESET}")
+
+    results = []
+    with SiteServer(config) as server:
+        for engine in engines:
+            for scenario in scenarios:
+                print(f"{YELLOW}Running {scenario} with the {engine} engine...{RESET}")
+                try:
+                    runs = [run_scenario(scenario, engine, server, site, args) for _ in range(args.repeat)]
+                except RuntimeError as e:
+                    print(f"{RED}Skipping the {engine} engine: {e}{RESET}")
+                    break
+                results.append(median_run(runs))
+
+    print()
+    print_results(results)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"site": config.to_dict(), "threads": args.threads, "results": results}, f, indent=1)
+        print(f"{GREEN}Results saved to {args.save}{RESET}")
+    if args.baseline and not compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
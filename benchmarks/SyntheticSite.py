@@ -0,0 +1,249 @@
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SiteConfig:
+    """Shape of a generated site.
+
+    Pages form a tree: the root links to ``fanout`` pages, each of which
+    links to ``fanout`` more, down to ``depth`` levels or until ``pages``
+    pages exist. Every page also links ``files_per_page`` binary files of
+    ``file_size`` bytes. Pages live in ``directories`` directories named
+    ``section<n>/``, which is also what enumeration can find. Each response
+    is delayed by ``latency`` seconds plus up to ``jitter`` seconds.
+    """
+
+    def __init__(
+        self,
+        pages: int = 500,
+        fanout: int = 10,
+        depth: int = 4,
+        files_per_page: int = 2,
+        file_size: int = 64 * 1024,
+        page_size: int = 4096,
+        directories: int = 20,
+        latency: float = 0.0,
+        jitter: float = 0.0
+    ):
+        self.pages = pages
+        self.fanout = fanout
+        self.depth = depth
+        self.files_per_page = files_per_page
+        self.file_size = file_size
+        self.page_size = page_size
+        self.directories = max(1, directories)
+        self.latency = latency
+        self.jitter = jitter
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+class SyntheticSite:
+    """Deterministic site generated in memory from a SiteConfig."""
+
+    def __init__(self, config: SiteConfig):
+        self.config = config
+        self.children: List[List[int]] = [[]]
+        # Breadth-first, so the page count is reached level by level
+        pending = deque([(0, 1)])
+        while pending and len(self.children) < config.pages:
+            page, level = pending.popleft()
+            if level >= config.depth:
+                continue
+            for _ in range(config.fanout):
+                if len(self.children) >= config.pages:
+                    break
+                child = len(self.children)
+                self.children.append([])
+                self.children[page].append(child)
+                pending.append((child, level + 1))
+        self.file_block = bytes(range(256)) * 256
+
+    @property
+    def page_count(self) -> int:
+        return len(self.children)
+
+    def page_path(self, page: int) -> str:
+        return "/" if page == 0 else f"/section{page % self.config.directories}/page{page}.html"
+
+    def file_paths(self, page: int) -> List[str]:
+        section = page % self.config.directories
+        return [f"/section{section}/file{page}-{k}.bin" for k in range(self.config.files_per_page)]
+
+    def all_file_paths(self) -> List[str]:
+        return [path for page in range(self.page_count) for path in self.file_paths(page)]
+
+    def directory_paths(self) -> List[str]:
+        return [f"/section{n}/" for n in range(min(self.config.directories, self.page_count))]
+
+    def render_page(self, page: int) -> bytes:
+        links = [f'<a href="{self.page_path(child)}">page {child}</a>' for child in self.children[page]]
+        links += [f'<a href="{path}">file</a>' for path in self.file_paths(page)]
+        body = f"<html><head><title>Page {page}</title></head><body>{''.join(links)}"
+        padding = max(0, self.config.page_size - len(body) - len("</body></html>"))
+        filler = " ".join(f"word{n % 97}" for n in range(padding // 6 + 1))[:padding]
+        return f"{body}<p>{filler}</p></body></html>".encode()
+
+    def render_directory(self, path: str) -> bytes:
+        return f"<html><body><h1>Index of {path}</h1></body></html>".encode()
+
+    def resolve(self, path: str) -> Optional[Tuple[str, int]]:
+        """Return the (kind, id) served at path, None for a 404."""
+        path = path.split("?", 1)[0]
+        if path == "/":
+            return "page", 0
+        if path == "/robots.txt":
+            return "robots", 0
+        parts = path.strip("/").split("/")
+        if len(parts) == 1 and path.endswith("/") and parts[0].startswith("section"):
+            number = parts[0][len("section"):]
+            if number.isdigit() and int(number) < min(self.config.directories, self.page_count):
+                return "directory", int(number)
+            return None
+        if len(parts) != 2:
+            return None
+        name = parts[1]
+        try:
+            if name.startswith("page") and name.endswith(".html"):
+                page = int(name[4:-5])
+                if 0 < page < self.page_count and path == self.page_path(page):
+                    return "page", page
+            elif name.startswith("file") and name.endswith(".bin"):
+                page, k = (int(n) for n in name[4:-4].split("-"))
+                if 0 <= page < self.page_count and k < self.config.files_per_page and path in self.file_paths(page):
+                    return "file", page
+        except ValueError:
+            pass
+        return None
+
+    def body_for(self, path: str) -> Tuple[int, str, Optional[bytes]]:
+        """Return the status, content type and body (None for a sized binary file) of path."""
+        resolved = self.resolve(path)
+        if resolved is None:
+            return 404, "text/html", b"<html><body>Not Found</body></html>"
+        kind, number = resolved
+        if kind == "page":
+            return 200, "text/html", self.render_page(number)
+        if kind == "directory":
+            return 200, "text/html", self.render_directory(path)
+        if kind == "robots":
+            return 200, "text/plain", b"User-agent: *\nAllow: /\n"
+        return 200, "application/octet-stream", None
+
+
+class SiteStats:
+    """Requests and bytes served, optionally backed by shared memory for a server process."""
+
+    def __init__(self, requests: Any = None, bytes_sent: Any = None):
+        self.requests = requests
+        self.bytes_sent = bytes_sent
+        self._lock = threading.Lock()
+
+    def add(self, body_bytes: int) -> None:
+        if self.requests is None:
+            return
+        with self._lock:
+            self.requests.value += 1
+            self.bytes_sent.value += body_bytes
+
+
+def make_handler(site: SyntheticSite, stats: SiteStats):
+    class SyntheticHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            self._respond(send_body=True)
+
+        def do_HEAD(self) -> None:
+            self._respond(send_body=False)
+
+        def _respond(self, send_body: bool) -> None:
+            config = site.config
+            if config.latency or config.jitter:
+                time.sleep(config.latency + random.uniform(0, config.jitter))
+            status, content_type, body = site.body_for(self.path)
+            length = config.file_size if body is None else len(body)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(length))
+            self.end_headers()
+            sent = 0
+            if send_body:
+                if body is not None:
+                    self.wfile.write(body)
+                else:
+                    block = site.file_block
+                    while sent < length - len(block):
+                        self.wfile.write(block)
+                        sent += len(block)
+                    self.wfile.write(block[:length - sent])
+                sent = length
+            stats.add(sent)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return SyntheticHandler
+
+
+class SyntheticServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Crawlers abort streamed reads on purpose; only report real errors
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def make_server(config: SiteConfig, port: int = 0, stats: Optional[SiteStats] = None) -> SyntheticServer:
+    """Create a threaded HTTP/1.1 server for the site described by config."""
+    site = SyntheticSite(config)
+    return SyntheticServer(("127.0.0.1", port), make_handler(site, stats or SiteStats()))
+
+
+def serve(config: SiteConfig, port: int, port_value: Any, requests: Any, bytes_sent: Any) -> None:
+    """Serve the site forever; used as the target of the benchmark's server process."""
+    server = make_server(config, port, SiteStats(requests, bytes_sent))
+    port_value.value = server.server_address[1]
+    server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a generated site for benchmarking WebWorm.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--files-per-page", type=int, default=2)
+    parser.add_argument("--file-size", type=int, default=64 * 1024)
+    parser.add_argument("--page-size", type=int, default=4096)
+    parser.add_argument("--directories", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = SiteConfig(
+        args.pages, args.fanout, args.depth, args.files_per_page, args.file_size,
+        args.page_size, args.directories, args.latency, args.jitter
+    )
+    server = make_server(config, args.port)
+    site = SyntheticSite(config)
+    print(f"Serving {site.page_count} pages and {len(site.all_file_paths())} files "
+          f"on http://127.0.0.1:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import json
+
+from Checkpoint import Checkpointer
+from Frontier import CrawlFrontier
+from SeenSet import create_seen_set
+
+
+def test_snapshot_keeps_in_flight_entries():
+    frontier = CrawlFrontier()
+    seen = create_seen_set("memory")
+    frontier.push([("https://h/a", 0), ("https://h/b", 1)], seen)
+    frontier.get()
+    entries, _ = frontier.snapshot(seen)
+    assert entries == [("https://h/a", 0), ("https://h/b", 1)]
+    # Pushing the links of the current entry finishes it
+    frontier.push([("https://h/c", 1)], seen)
+    entries, _ = frontier.snapshot(seen)
+    assert entries == [("https://h/b", 1), ("https://h/c", 1)]
+
+
+def test_checkpointer_round_trip(tmp_path):
+    path = str(tmp_path / "site.checkpoint.json")
+    checkpointer = Checkpointer(path, lambda: {"frontier": [["https://h/a", 1]]}, interval=0)
+    assert checkpointer.load() is None
+    checkpointer.start()
+    checkpointer.stop()
+    assert checkpointer.load() == {"frontier": [["https://h/a", 1]]}
+    assert not (tmp_path / "site.checkpoint.json.tmp").exists()
+
+
+def test_checkpointer_ignores_a_corrupt_file(tmp_path):
+    path = tmp_path / "site.checkpoint.json"
+    path.write_text("{not json")
+    assert Checkpointer(str(path), dict).load() is None
+    path.write_text(json.dumps({"ok": True}))
+    assert Checkpointer(str(path), dict).load() == {"ok": True}
@@ -0,0 +1,53 @@
+import hashlib
+import json
+import os
+
+from ContentStore import BLOB_DIR, ContentStore, url_to_path
+
+
+def test_url_to_path_mirrors_host_and_path():
+    assert url_to_path("https://h/a/b.pdf") == os.path.join("h", "a", "b.pdf")
+    assert url_to_path("https://h/docs/") == os.path.join("h", "docs", "index.html")
+    assert url_to_path("https://h:8080/x") == os.path.join("h:8080", "x")
+
+
+def test_url_to_path_without_segments():
+    assert url_to_path("http://h") == os.path.join("h", "index.html")
+    assert url_to_path("http://h/..") == os.path.join("h", "index.html")
+    assert url_to_path("http://h/./..?a=1").startswith(os.path.join("h", "index-"))
+
+
+def test_queries_get_distinct_paths():
+    assert url_to_path("https://h/f.csv?page=1") != url_to_path("https://h/f.csv?page=2")
+    assert url_to_path("https://h/f.csv?page=1").endswith(".csv")
+
+
+def _commit(store, tmp_path, url, body):
+    part = tmp_path / "part"
+    part.write_bytes(body)
+    return store.commit(url, str(part), hashlib.sha256(body).hexdigest(), len(body))
+
+
+def test_same_path_on_two_hosts_does_not_collide(tmp_path):
+    root = tmp_path / "results"
+    store = ContentStore(str(root / BLOB_DIR), str(root / "a.example"), str(root))
+    first = _commit(store, tmp_path, "https://a.example/logo.png", b"logo a")
+    second = _commit(store, tmp_path, "https://cdn.example/logo.png", b"logo b")
+    assert first == str(root / "a.example" / "logo.png")
+    assert second == str(root / "cdn.example" / "logo.png")
+    assert open(first, "rb").read() == b"logo a"
+    assert open(second, "rb").read() == b"logo b"
+
+
+def test_duplicate_content_is_stored_once(tmp_path):
+    root = tmp_path / "results"
+    store = ContentStore(str(root / BLOB_DIR), str(root / "h"))
+    _commit(store, tmp_path, "https://h/a.bin", b"same bytes")
+    path = _commit(store, tmp_path, "https://h/copy/a.bin", b"same bytes")
+    assert (store.deduplicated, store.bytes_saved) == (1, 10)
+    assert open(path, "rb").read() == b"same bytes"
+    store.save()
+    with open(store.index_path) as f:
+        index = json.load(f)
+    assert index["https://h/copy/a.bin"]["path"] == os.path.join("h", "copy", "a.bin")
+    assert ContentStore(str(root / BLOB_DIR), str(root / "h")).get("https://h/a.bin")["size"] == 10
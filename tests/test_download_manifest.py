@@ -0,0 +1,91 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from DownloadManifest import DownloadManifest
+from Scraper import WebScraper
+
+BODY = bytes(range(256)) * 64
+ETAG = '"body-v1"'
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves BODY with an ETag, honouring Range/If-Range and If-None-Match."""
+
+    requests = []
+
+    def do_GET(self):
+        RangeHandler.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range", ETAG) == ETAG:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(BODY) - 1}/{len(BODY)}")
+        else:
+            self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(BODY) - start))
+        self.end_headers()
+        self.wfile.write(BODY[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    RangeHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_manifest_round_trip(tmp_path):
+    manifest = DownloadManifest(str(tmp_path))
+    manifest.update("https://h/a.bin", path="a.bin", size=3, etag='"x"')
+    manifest.update("https://h/b.bin", partial=True)
+    manifest.remove("https://h/b.bin")
+    manifest.save()
+    reloaded = DownloadManifest(str(tmp_path))
+    assert reloaded.get("https://h/a.bin") == {"path": "a.bin", "size": 3, "etag": '"x"'}
+    assert reloaded.get("https://h/b.bin") is None
+
+
+def test_unreadable_manifest_is_ignored(tmp_path):
+    (tmp_path / ".webworm-manifest.json").write_text("{broken")
+    assert DownloadManifest(str(tmp_path)).get("https://h/a.bin") is None
+
+
+def test_partial_download_is_resumed_then_skipped(server, tmp_path):
+    url = f"{server}/file.bin"
+    download_dir = str(tmp_path)
+    scraper = WebScraper(server + "/", 1, output_dir=download_dir, incremental=True)
+    manifest = DownloadManifest(download_dir)
+    # An earlier run stopped after 1000 bytes
+    with open(os.path.join(download_dir, "file.bin.part"), "wb") as f:
+        f.write(BODY[:1000])
+    manifest.update(url, partial=True, etag=ETAG, last_modified=None)
+
+    assert scraper._download_file(url, download_dir, manifest)
+    assert RangeHandler.requests[-1]["Range"] == "bytes=1000-"
+    assert RangeHandler.requests[-1]["If-Range"] == ETAG
+    with open(os.path.join(download_dir, "file.bin"), "rb") as f:
+        assert f.read() == BODY
+    entry = manifest.get(url)
+    assert not entry.get("partial")
+    assert entry["sha256"] == hashlib.sha256(BODY).hexdigest()
+
+    # Unchanged on the server and on disk: a conditional GET, no body
+    assert scraper._download_file(url, download_dir, manifest)
+    assert RangeHandler.requests[-1]["If-None-Match"] == ETAG
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+
+from Frontier import AsyncCrawlFrontier, CrawlBudget, CrawlFrontier, LinkScorer
+from SeenSet import create_seen_set
+
+
+def test_scorer_order():
+    scorer = LinkScorer(["pdf"])
+    scorer.hint(["https://h/hinted.html"])
+    urls = [
+        "https://h/plain.html",
+        "https://h/a.pdf",
+        "https://h/dir/",
+        "https://h/hinted.html",
+        "https://h/downloads/page.html",
+    ]
+    ranked = sorted(urls, key=lambda url: scorer.score(url, 1))
+    assert ranked == [
+        "https://h/dir/",
+        "https://h/hinted.html",
+        "https://h/downloads/page.html",
+        "https://h/plain.html",
+        "https://h/a.pdf",
+    ]
+    assert scorer.score(urls[0], 0) < scorer.score("https://h/dir/", 1)
+
+
+def test_hints_are_dropped_when_scored_and_capped():
+    scorer = LinkScorer()
+    scorer.hint(["https://h/a.html", "https://h/b.pdf"])
+    scorer.score("https://h/a.html", 1)
+    scorer.score("https://h/b.pdf", 1)
+    assert not scorer.hinted
+    scorer.MAX_HINTS = 2
+    scorer.hint(f"https://h/{n}" for n in range(5))
+    assert len(scorer.hinted) == 2
+
+
+def test_push_skips_seen_urls_and_orders_by_depth():
+    frontier = CrawlFrontier()
+    seen = create_seen_set("memory")
+    assert frontier.push([("https://h/b", 2), ("https://h/a", 1), ("https://h/b", 2)], seen) == 2
+    assert frontier.push([("https://h/a", 1)], seen) == 0
+    assert frontier.get() == ("https://h/a", 1)
+    assert frontier.get() == ("https://h/b", 2)
+
+
+def test_equal_scores_keep_insertion_order():
+    frontier = CrawlFrontier()
+    seen = create_seen_set("memory")
+    frontier.push([(f"https://h/{n}", 1) for n in range(5)], seen)
+    assert [frontier.get()[0] for _ in range(5)] == [f"https://h/{n}" for n in range(5)]
+
+
+def test_wait_done_counts_pending_work():
+    frontier = CrawlFrontier()
+    seen = create_seen_set("memory")
+    assert frontier.wait_done(0)
+    frontier.add_pending()
+    assert not frontier.wait_done(0.01)
+
+    def finish():
+        frontier.push([("https://h/a", 1)], seen)
+        frontier.task_done()
+        frontier.get()
+        frontier.task_done()
+
+    worker = threading.Thread(target=finish)
+    worker.start()
+    assert frontier.wait_done(5)
+    worker.join()
+
+
+def test_async_frontier_tracks_entries_per_task():
+    async def crawl():
+        frontier = AsyncCrawlFrontier()
+        seen = create_seen_set("memory")
+        assert frontier.push([("https://h/b", 2), ("https://h/a", 1), ("https://h/a", 1)], seen) == 2
+        assert await frontier.get() == ("https://h/a", 1)
+        assert frontier.snapshot(seen)[0] == [("https://h/a", 1), ("https://h/b", 2)]
+        # Pushing the links of the current entry finishes it
+        frontier.push([("https://h/c", 1)], seen)
+        assert frontier.snapshot(seen)[0] == [("https://h/c", 1), ("https://h/b", 2)]
+
+    asyncio.run(crawl())
+
+
+def test_budget_pages():
+    budget = CrawlBudget(max_pages=2)
+    assert budget.take_page() and budget.take_page()
+    assert not budget.take_page()
+    assert budget.pages == 2
+    assert budget.exhausted() == "2 pages"
+    # Downloads are not limited by the page count
+    assert budget.exhausted(pages=False) is None
+
+
+def test_budget_bytes_and_time():
+    budget = CrawlBudget(max_bytes=100)
+    budget.spend_bytes(60)
+    assert budget.exhausted() is None
+    budget.spend_bytes(40)
+    assert budget.exhausted(pages=False) == "100 bytes"
+    assert not budget.take_page()
+
+    budget = CrawlBudget(max_time=0.01)
+    time.sleep(0.02)
+    assert budget.exhausted() == "0.01s"
+    budget.start()
+    assert budget.exhausted() is None
+
+
+def test_unlimited_budget():
+    budget = CrawlBudget()
+    for _ in range(1000):
+        assert budget.take_page()
+    budget.spend_bytes(10 ** 12)
+    assert budget.exhausted() is None
@@ -0,0 +1,68 @@
+import os
+
+from HttpCache import HttpCache
+
+VALIDATED = {"ETag": '"v1"', "Last-Modified": "Sat, 01 Jan 2022 00:00:00 GMT"}
+
+
+def test_store_then_revalidate(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    assert cache.conditional_headers("https://h/a") == {}
+    cache.store("https://h/a", VALIDATED, b"page a")
+    assert cache.conditional_headers("https://h/a") == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Sat, 01 Jan 2022 00:00:00 GMT"
+    }
+    assert cache.get_body("https://h/a") == b"page a"
+    assert (cache.hits, cache.bytes_saved) == (1, 6)
+    cache.close()
+
+
+def test_responses_without_validators_are_not_stored(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.store("https://h/a", {"Content-Type": "text/html"}, b"page a")
+    assert cache.get_body("https://h/a") is None
+    cache.close()
+
+
+def test_entries_survive_a_restart(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.store("https://h/a", {"ETag": '"v1"'}, b"page a")
+    cache.close()
+    cache = HttpCache(str(tmp_path))
+    assert cache.get_body("https://h/a") == b"page a"
+    cache.close()
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.store("https://h/a", {"ETag": '"a"'}, b"same body")
+    cache.store("https://h/b", {"ETag": '"b"'}, b"same body")
+    bodies = [name for _, _, names in os.walk(tmp_path / "bodies") for name in names]
+    assert len(bodies) == 1
+    # Replacing one entry keeps the body the other still uses
+    cache.store("https://h/a", {"ETag": '"a2"'}, b"new body")
+    assert cache.get_body("https://h/b") == b"same body"
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = HttpCache(str(tmp_path), max_size=25)
+    cache.store("https://h/a", {"ETag": '"a"'}, b"a" * 10)
+    cache.store("https://h/b", {"ETag": '"b"'}, b"b" * 10)
+    cache.get_body("https://h/a")
+    cache.store("https://h/c", {"ETag": '"c"'}, b"c" * 10)
+    assert cache.get_body("https://h/b") is None
+    assert cache.get_body("https://h/a") == b"a" * 10
+    assert cache.get_body("https://h/c") == b"c" * 10
+    cache.close()
+
+
+def test_missing_body_file_drops_the_entry(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.store("https://h/a", {"ETag": '"a"'}, b"page a")
+    for root, _, names in os.walk(tmp_path / "bodies"):
+        for name in names:
+            os.remove(os.path.join(root, name))
+    assert cache.get_body("https://h/a") is None
+    assert cache.conditional_headers("https://h/a") == {}
+    cache.close()
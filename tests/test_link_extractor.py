@@ -0,0 +1,20 @@
+import pytest
+
+from LinkExtractor import PARSERS, decode_html, extract_links
+
+PAGE = b"""<html><head><link href="style.css"><script src="app.js"></script></head>
+<body><a href="/a">a</a><img src="b.png"><a name="top">no href</a><a href="d.pdf">d</a>
+<area href="map.html"></body></html>"""
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_parsers_return_the_same_links(parser):
+    files, anchors = extract_links(PAGE, parser)
+    assert sorted(files) == sorted(extract_links(PAGE, "bs4")[0])
+    assert sorted(files) == ["/a", "app.js", "b.png", "d.pdf", "map.html", "style.css"]
+    assert anchors == ["/a", "d.pdf"]
+
+
+def test_decode_html_uses_meta_charset():
+    content = '<meta charset="iso-8859-1"><a href="café.pdf">'.encode("iso-8859-1")
+    assert "café.pdf" in decode_html(content)
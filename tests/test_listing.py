@@ -0,0 +1,48 @@
+from LinkExtractor import extract_listing, is_autoindex
+
+APACHE_PRE = b"""<html><head><title>Index of /pub</title></head><body>
+<h1>Index of /pub</h1>
+<pre><a href="?C=N;O=D">Name</a>                    <a href="?C=M;O=A">Last modified</a>      <a href="?C=S;O=A">Size</a>
+<hr><a href="/">Parent Directory</a>                             -
+<a href="nosize.txt">nosize.txt</a>              2023-01-01 10:00    -
+<a href="big.iso">big.iso</a>                 2023-01-01 10:00  4.2G
+</pre><address>Apache Server at example.com Port 80 12:00 1K</address></body></html>"""
+
+APACHE_TABLE = b"""<html><head><title>Index of /docs</title></head><body><table>
+<tr><th><a href="?C=N;O=D">Name</a></th></tr>
+<tr><td><a href="sub/">sub/</a></td><td align="right">2023-01-01 10:00  </td><td align="right">  - </td></tr>
+<tr><td><a href="a.pdf">a.pdf</a></td><td align="right">2023-01-01 10:00  </td><td align="right">1.5K</td></tr>
+<tr><td><a href="nosize">nosize</a></td><td align="right">2023-01-01 10:00  </td><td align="right">  - </td></tr>
+</table></body></html>"""
+
+NGINX = b"""<html><head><title>Index of /files/</title></head><body><h1>Index of /files/</h1><hr><pre>
+<a href="../">../</a>
+<a href="report.pdf">report.pdf</a>                                         01-Jan-2023 10:00              200000
+</pre><hr></body></html>"""
+
+HTTP_SERVER = b"""<html><head><title>Directory listing for /</title></head><body><ul>
+<li><a href="a.bin">a.bin</a></li>
+<li><a href="dir/">dir/</a></li>
+</ul></body></html>"""
+
+
+def test_apache_pre_listing_reads_size_column_only():
+    assert extract_listing(APACHE_PRE) == [("/", None), ("nosize.txt", None), ("big.iso", 4509715660)]
+
+
+def test_apache_table_listing():
+    assert extract_listing(APACHE_TABLE) == [("sub/", None), ("a.pdf", 1536), ("nosize", None)]
+
+
+def test_nginx_listing():
+    assert extract_listing(NGINX) == [("../", None), ("report.pdf", 200000)]
+
+
+def test_listing_without_size_column():
+    assert extract_listing(HTTP_SERVER) == [("a.bin", None), ("dir/", None)]
+
+
+def test_regular_page_is_not_a_listing():
+    page = b"<html><head><title>Home</title></head><body><a href='a.pdf'>a</a></body></html>"
+    assert not is_autoindex(page)
+    assert extract_listing(page) is None
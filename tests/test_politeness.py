@@ -0,0 +1,107 @@
+import email.utils
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from Politeness import PolitenessScheduler, parse_retry_after
+from Scraper import WebScraper
+
+URL = "https://example.com/page"
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    in_a_minute = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 <= parse_retry_after(in_a_minute) <= 60
+    assert parse_retry_after("Sat, 01 Jan 2000 00:00:00 GMT") == 0.0
+
+
+def test_backoff_caps_retry_after():
+    scheduler = PolitenessScheduler()
+    assert scheduler.backoff(URL, "86400") == PolitenessScheduler.MAX_BACKOFF
+    assert scheduler.try_acquire(URL) <= PolitenessScheduler.MAX_BACKOFF
+
+
+def test_backoff_grows_and_halves_concurrency():
+    scheduler = PolitenessScheduler(rate=8, max_concurrency=8)
+    assert scheduler.backoff(URL) == 2.0
+    assert scheduler.backoff(URL) == 4.0
+    state = scheduler._host(URL)
+    assert state.concurrency == 2
+    assert state.rate == 2
+
+
+def test_rate_limit_spaces_requests():
+    scheduler = PolitenessScheduler(rate=10)
+    assert scheduler.try_acquire(URL) == 0.0
+    wait = scheduler.try_acquire(URL)
+    assert 0 < wait <= 0.1
+    scheduler.release(URL, 200, 0.01)
+
+
+def test_concurrency_limit_until_release():
+    scheduler = PolitenessScheduler(max_concurrency=1)
+    assert scheduler.try_acquire(URL) == 0.0
+    assert scheduler.try_acquire(URL) > 0
+    # Other hosts are independent
+    assert scheduler.try_acquire("https://other.com/") == 0.0
+    scheduler.release(URL, 200, 0.01)
+    assert scheduler.try_acquire(URL) == 0.0
+
+
+def test_crawl_delay_only_tightens():
+    scheduler = PolitenessScheduler(rate=0.5)
+    scheduler.set_crawl_delay(URL, 0.5)
+    assert scheduler._host(URL).rate == 0.5
+    scheduler.set_crawl_delay(URL, 4)
+    assert scheduler._host(URL).rate == 0.25
+
+
+def test_latency_spike_lowers_concurrency_by_one_and_successes_grow_it():
+    scheduler = PolitenessScheduler(max_concurrency=4)
+    state = scheduler._host(URL)
+    for latency in (0.01, 0.5):
+        scheduler.try_acquire(URL)
+        scheduler.release(URL, 200, latency)
+    assert state.concurrency == 3
+    for _ in range(PolitenessScheduler.SUCCESSES_TO_GROW):
+        scheduler.try_acquire(URL)
+        scheduler.release(URL, 200, 0.01)
+    assert state.concurrency == 4
+
+
+class BodyHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "5")
+        self.end_headers()
+        self.wfile.write(b"hello")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), BodyHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_streamed_response_holds_its_slot_until_closed(server):
+    scraper = WebScraper(server + "/", 1, request_limit=threading.BoundedSemaphore(1))
+    state = scraper.scheduler._host(server + "/")
+    with scraper.request("GET", server + "/a", stream=True) as response:
+        assert state.in_flight == 1
+        assert not scraper.request_limit.acquire(blocking=False)
+        assert response.content == b"hello"
+    assert state.in_flight == 0
+    scraper.request("GET", server + "/b")
+    assert state.in_flight == 0
+    assert scraper.request_limit.acquire(blocking=False)
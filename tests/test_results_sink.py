@@ -0,0 +1,67 @@
+import json
+import sqlite3
+import time
+
+import pytest
+
+from ResultsSink import JsonlSink, ResultsSink, SqliteSink, create_results_sink, results_format
+
+
+def test_results_sink_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        ResultsSink(str(tmp_path / "results"))
+
+
+def test_jsonl_sink(tmp_path):
+    path = tmp_path / "out" / "results.jsonl"
+    sink = create_results_sink(str(path))
+    assert isinstance(sink, JsonlSink)
+    sink.write("page", "https://h/", status=200, size=10)
+    sink.write("file", "https://h/a.pdf", parent="https://h/")
+    sink.close()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(r["type"], r["url"]) for r in records] == [("page", "https://h/"), ("file", "https://h/a.pdf")]
+    assert records[0]["status"] == 200 and records[1]["parent"] == "https://h/"
+    assert sink.written == 2
+
+
+def test_sqlite_sink(tmp_path):
+    path = str(tmp_path / "out" / "results.db")
+    sink = create_results_sink(path)
+    assert isinstance(sink, SqliteSink)
+    for n in range(1200):
+        sink.write("page", f"https://h/{n}", status=200)
+    sink.close()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*), MIN(status) FROM results").fetchone() == (1200, 200)
+
+
+def test_results_format():
+    assert results_format("out.db") == "sqlite"
+    assert results_format("out.SQLITE") == "sqlite"
+    assert results_format("out.json") == "jsonl"
+    assert results_format("out.db", "jsonl") == "jsonl"
+    with pytest.raises(ValueError):
+        create_results_sink("out", "csv")
+
+
+class SlowSink(ResultsSink):
+    """Takes its time writing, as a slow disk would."""
+
+    def _open(self):
+        self.batches = []
+
+    def _write_batch(self, batch):
+        time.sleep(0.01)
+        self.batches.append(len(batch))
+
+
+def test_write_applies_backpressure_to_a_slow_writer(tmp_path):
+    sink = SlowSink(str(tmp_path / "results"), batch_size=10, flush_interval=60)
+    limit = sink.batch_size * SlowSink.MAX_PENDING_BATCHES
+    for n in range(1000):
+        sink.write("page", f"https://h/{n}")
+        assert len(sink._batch) < limit
+    sink.close()
+    assert sink.written == 1000
+    assert sum(sink.batches) == 1000
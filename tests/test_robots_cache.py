@@ -0,0 +1,87 @@
+import requests
+
+from RobotsCache import RobotsCache
+
+ROBOTS = b"User-agent: *\nDisallow: /private\nCrawl-delay: 2\n"
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+        self.ok = status_code < 400
+
+
+class FakeSession:
+    """Answers robots.txt requests from a dict of url -> (status, body), counting fetches."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.fetched = []
+
+    def get(self, url, timeout=None):
+        self.fetched.append(url)
+        answer = self.responses.get(url)
+        if answer is None:
+            raise requests.ConnectionError(f"cannot reach {url}")
+        return FakeResponse(*answer)
+
+
+def test_rules_are_fetched_once_per_origin_until_they_expire():
+    session = FakeSession({"https://h/robots.txt": (200, ROBOTS)})
+    robots = RobotsCache(session, "WebWorm/1.0", ttl=3600)
+    assert not robots.is_cached("https://h/")
+    assert robots.can_fetch("https://h/public")
+    assert not robots.can_fetch("https://h/private/x")
+    assert robots.is_cached("https://h/other")
+    assert session.fetched == ["https://h/robots.txt"]
+
+    robots.rules_for("https://h/").fetched_at -= 3600
+    assert not robots.is_cached("https://h/")
+    robots.can_fetch("https://h/public")
+    assert len(session.fetched) == 2
+
+
+def test_status_codes():
+    session = FakeSession({
+        "https://forbidden/robots.txt": (403,),
+        "https://missing/robots.txt": (404,),
+        "https://broken/robots.txt": (500,),
+    })
+    robots = RobotsCache(session, "WebWorm/1.0")
+    assert not robots.can_fetch("https://forbidden/a")
+    assert robots.can_fetch("https://missing/a")
+    assert not robots.can_fetch("https://broken/a")
+    assert not robots.can_fetch("https://unreachable/a")
+
+
+def test_crawl_delay_is_announced_once():
+    announced = []
+    session = FakeSession({"https://h/robots.txt": (200, ROBOTS)})
+    robots = RobotsCache(session, "WebWorm/1.0", on_rules=lambda origin, parser: announced.append(origin))
+    robots.can_fetch("https://h/a")
+    robots.can_fetch("https://h/b")
+    assert announced == ["https://h"]
+    assert robots.crawl_delay(robots.rules_for("https://h/").parser) == 2.0
+
+
+def test_cache_file_skips_the_fetch_within_ttl(tmp_path):
+    cache_file = str(tmp_path / "robots.json")
+    session = FakeSession({"https://h/robots.txt": (200, ROBOTS)})
+    robots = RobotsCache(session, "WebWorm/1.0", cache_file=cache_file)
+    robots.can_fetch("https://h/a")
+    robots.can_fetch("https://unreachable/a")
+    robots.save()
+
+    later = FakeSession({})
+    robots = RobotsCache(later, "WebWorm/1.0", cache_file=cache_file)
+    assert not robots.can_fetch("https://h/private")
+    assert later.fetched == []
+    # Failures are not persisted
+    robots.can_fetch("https://unreachable/a")
+    assert later.fetched == ["https://unreachable/robots.txt"]
+
+    expired = FakeSession({"https://h/robots.txt": (200, b"")})
+    robots = RobotsCache(expired, "WebWorm/1.0", ttl=0, cache_file=cache_file)
+    assert robots.can_fetch("https://h/private")
+    assert expired.fetched == ["https://h/robots.txt"]
@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+from SeenSet import SEEN_STORES, BloomSeenSet, SeenSet, SqliteSeenSet, create_seen_set, normalize_url
+
+
+def test_normalize_url_shares_one_key():
+    key = normalize_url("https://example.com/a")
+    for url in (
+        "HTTPS://Example.COM:443/a", "https://example.com/a/", "https://example.com/a#frag",
+        "https://example.com/b/../a", "https://example.com//a",
+    ):
+        assert normalize_url(url) == key
+    assert normalize_url("https://h/a?y=2&x=1") == normalize_url("https://h/a?x=1&y=2")
+    assert normalize_url("http://h:8080/") != normalize_url("http://h/")
+
+
+def test_add_is_check_and_add():
+    seen = SeenSet()
+    assert seen.add("https://h/a")
+    assert not seen.add("https://h/a/")
+    assert "https://h/a#x" in seen
+    assert len(seen) == 1
+
+
+def test_concurrent_adds_claim_each_url_once():
+    seen = SeenSet()
+    claimed = []
+
+    def add_all():
+        claimed.extend(url for url in (f"https://h/{n}" for n in range(500)) if seen.add(url))
+
+    threads = [threading.Thread(target=add_all) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(f"https://h/{n}" for n in range(500))
+
+
+def test_state_round_trip():
+    seen = SeenSet()
+    seen.add("https://h/a")
+    restored = SeenSet()
+    restored.load_state(seen.get_state())
+    assert "https://h/a" in restored
+
+
+@pytest.mark.parametrize("store", SEEN_STORES)
+def test_every_backend_deduplicates(store, tmp_path):
+    seen = create_seen_set(store, db_path=str(tmp_path / "seen.db"), capacity=1000)
+    try:
+        assert seen.add("https://h/a")
+        assert not seen.add("https://h/a/")
+        assert seen.add("https://h/b")
+        assert "https://h/a" in seen and "https://h/c" not in seen
+        assert len(seen) == 2
+    finally:
+        seen.close()
+
+
+def test_bloom_false_positive_rate_stays_near_target():
+    seen = BloomSeenSet(capacity=10_000, error_rate=0.01)
+    for n in range(10_000):
+        seen.add(f"https://h/page{n}")
+    false_positives = sum(f"https://h/other{n}" in seen for n in range(10_000))
+    assert false_positives < 300
+
+
+def test_bloom_state_round_trip():
+    seen = BloomSeenSet(capacity=100)
+    seen.add("https://h/a")
+    restored = BloomSeenSet(capacity=100)
+    restored.load_state(seen.get_state())
+    assert "https://h/a" in restored
+    assert len(restored) == 1
+
+
+def test_bloom_rejects_bad_sizing():
+    with pytest.raises(ValueError):
+        BloomSeenSet(capacity=0)
+    with pytest.raises(ValueError):
+        BloomSeenSet(error_rate=1.5)
+
+
+def test_sqlite_keeps_rows_when_reopened_without_reset(tmp_path):
+    db_path = str(tmp_path / "seen.db")
+    seen = SqliteSeenSet(db_path)
+    seen.add("https://h/a")
+    seen.get_state()
+    seen.close()
+
+    reopened = SqliteSeenSet(db_path, reset=False)
+    assert "https://h/a" in reopened
+    assert len(reopened) == 1
+    reopened.close()
+
+    fresh = SqliteSeenSet(db_path)
+    assert len(fresh) == 0
+    fresh.close()
+
+
+def test_sqlite_needs_a_path():
+    with pytest.raises(ValueError):
+        create_seen_set("sqlite")
@@ -0,0 +1,59 @@
+import gzip
+
+from Sitemap import SitemapParser, is_sitemap_url
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+  <url>
+    <loc>https://example.com/a.html</loc>
+    <image:image><image:loc>https://example.com/a.png</image:loc></image:image>
+  </url>
+  <url><loc>https://example.com/b/</loc><lastmod>2023-01-01</lastmod></url>
+</urlset>"""
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-1.xml</loc></sitemap>
+  <sitemap><loc>https://example.com/sitemap-2.xml.gz</loc></sitemap>
+</sitemapindex>"""
+
+PAGES = [("url", "https://example.com/a.html"), ("url", "https://example.com/b/")]
+
+
+def parse(data, chunk_size):
+    parser = SitemapParser()
+    entries = []
+    for i in range(0, len(data), chunk_size):
+        entries += parser.feed(data[i:i + chunk_size])
+    return entries + parser.close()
+
+
+def test_urlset_ignores_extension_locs():
+    assert parse(URLSET, len(URLSET)) == PAGES
+
+
+def test_urlset_in_small_chunks():
+    assert parse(URLSET, 7) == PAGES
+
+
+def test_gzip_fed_one_byte_at_a_time():
+    assert parse(gzip.compress(URLSET), 1) == PAGES
+
+
+def test_sitemap_index():
+    assert parse(INDEX, 64) == [
+        ("sitemap", "https://example.com/sitemap-1.xml"),
+        ("sitemap", "https://example.com/sitemap-2.xml.gz"),
+    ]
+
+
+def test_sitemap_without_namespace():
+    data = b"<urlset><url><loc> https://example.com/c </loc></url></urlset>"
+    assert parse(data, 5) == [("url", "https://example.com/c")]
+
+
+def test_is_sitemap_url():
+    assert is_sitemap_url("https://example.com/sitemap_index.xml")
+    assert is_sitemap_url("https://example.com/sitemap-pages.xml.gz?x=1")
+    assert not is_sitemap_url("https://example.com/site.xml")
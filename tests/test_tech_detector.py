@@ -0,0 +1,26 @@
+import TechDetector as tech_detector_module
+from TechDetector import TechDetector
+
+
+class FakeWebTech:
+    def __init__(self, options=None):
+        pass
+
+    def start_from_url(self, url):
+        if "broken" in url:
+            raise ValueError("unparsable page")
+        return f"report for {url}"
+
+
+def test_one_failure_does_not_abort_the_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(tech_detector_module.webtech, "WebTech", FakeWebTech)
+    detector = TechDetector(cache_file=str(tmp_path / "tech.json"))
+    reports = detector.detect_many(["https://a/", "https://broken/", "https://c/x", "https://a/other"])
+    assert reports == {
+        "https://a/": "report for https://a/",
+        "https://broken/": None,
+        "https://c/x": "report for https://c/x",
+    }
+    assert detector.failures == {"https://broken/": "ValueError: unparsable page"}
+    detector.save()
+    assert TechDetector(cache_file=str(tmp_path / "tech.json")).cached("https://c/") == "report for https://c/x"
@@ -0,0 +1,62 @@
+from urllib.parse import urljoin
+
+import pytest
+
+from UrlFilter import UrlFilter
+
+PAGE_URLS = ["http://h/x/y.html", "http://h/x/y.html#frag", "http://h/x/", "http://h"]
+LINKS = [
+    "", "#g", "a.html", "a/b/", "/p?x=1", "?q", "a\tb\n", "a//b", "/a//b", "../c", "./d",
+    "//other/p", "https://e/z#k", "mailto:someone@example.com", "x.html#f",
+]
+
+
+@pytest.mark.parametrize("page_url", PAGE_URLS)
+@pytest.mark.parametrize("link", LINKS)
+def test_resolver_matches_urljoin(page_url, link):
+    resolve = UrlFilter.resolver(page_url)
+    assert resolve(link) == urljoin(page_url, link).partition("#")[0]
+
+
+def test_allows_host_and_scope():
+    url_filter = UrlFilter("https://example.com/", scope=["docs", "/pub/"])
+    assert url_filter.allows("https://example.com/docs/a.html")
+    assert url_filter.allows("https://example.com/pub/")
+    assert not url_filter.allows("https://example.com/blog/")
+    assert not url_filter.allows("https://other.com/docs/")
+    assert not url_filter.allows("ftp://example.com/docs/")
+
+
+def test_include_and_exclude():
+    url_filter = UrlFilter("https://example.com/", include=[r"/docs/", r"\.pdf$"], exclude=[r"draft"])
+    assert url_filter.allows("https://example.com/docs/")
+    assert not url_filter.allows("https://example.com/blog/")
+    assert not url_filter.allows("https://example.com/docs/draft/")
+
+
+def test_is_file_matches_multi_dot_extensions():
+    url_filter = UrlFilter("https://example.com/", extensions=["tar.gz", ".PDF"])
+    assert url_filter.is_file("https://example.com/a.tar.gz")
+    assert url_filter.is_file("https://example.com/docs/Report.pdf?v=2")
+    assert not url_filter.is_file("https://example.com/a.gz")
+    assert not url_filter.is_file("https://example.com/docs/")
+    assert not url_filter.is_file("https://example.com")
+
+
+def test_is_file_without_extensions_needs_a_dot():
+    url_filter = UrlFilter("https://example.com/")
+    assert url_filter.is_file("https://example.com/a.bin")
+    assert not url_filter.is_file("https://example.com/readme")
+
+
+def test_files_and_pages():
+    url_filter = UrlFilter("https://example.com/", extensions=["pdf"])
+    page_url = "https://example.com/docs/index.html"
+    links = ["a.pdf", "https://cdn.example.net/b.pdf", "mailto:x@example.com", "c.html"]
+    assert list(url_filter.files(page_url, links)) == [
+        "https://example.com/docs/a.pdf", "https://cdn.example.net/b.pdf"
+    ]
+    hrefs = ["c.html", "c.html#top", "https://other.com/", "/"]
+    assert list(url_filter.pages(page_url, hrefs)) == [
+        "https://example.com/docs/c.html", "https://example.com/"
+    ]